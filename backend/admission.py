@@ -0,0 +1,175 @@
+from collections import deque
+from time import perf_counter
+from typing import Deque, Dict, Optional, Tuple
+import asyncio
+import json
+import math
+
+from metrics import MetricsRegistry
+
+# Weight of the latest request in the moving average of service time
+SERVICE_TIME_SMOOTHING = 0.2
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionLimit:
+    """
+    Concurrency limit for one route with a bounded FIFO wait queue. Requests
+    that would wait longer than max_wait, judging by the queue ahead of them
+    and the recent service time, are shed on arrival instead of timing out.
+    """
+
+    def __init__(self, concurrency: int, queue_size: int, max_wait: float):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self.queued = 0
+        self.service_time = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def expected_wait(self) -> float:
+        return (self.queued + 1) * self.service_time / self.concurrency
+
+    async def acquire(self) -> float:
+        """Wait for a slot and return the time spent queued, raises Overloaded when shed"""
+        if self.active < self.concurrency and not self.queued:
+            self.active += 1
+            return 0.0
+        if self.queued >= self.queue_size:
+            raise Overloaded("queue_full", self.expected_wait())
+        expected = self.expected_wait()
+        if expected > self.max_wait:
+            raise Overloaded("deadline", expected)
+
+        started = perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        try:
+            # asyncio.wait leaves the future alone on timeout, unlike wait_for
+            await asyncio.wait((future,), timeout=self.max_wait)
+        except BaseException:
+            self._abandon(future)
+            raise
+        finally:
+            self.queued -= 1
+        if not future.done():
+            self._abandon(future)
+            raise Overloaded("timeout", self.expected_wait())
+        return perf_counter() - started
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        # A slot handed over just before the waiter gave up must be passed on
+        if future.done() and not future.cancelled():
+            self.release()
+        else:
+            future.cancel()
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        if service_time is not None:
+            self.service_time += SERVICE_TIME_SMOOTHING * (service_time - self.service_time)
+        # Hand the slot straight to the oldest waiter that has not given up
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+class AdmissionController:
+    """
+    Per-route admission limits and their metrics. A limit covers its path
+    and every path below it, so "/api/note-info" also covers
+    "/api/note-info/A4", and the longest matching route wins.
+    """
+
+    def __init__(self, limits: Dict[str, AdmissionLimit], registry: MetricsRegistry):
+        self.limits = limits
+        routes = tuple(limits)
+        wait = registry.histogram("admission_queue_wait_seconds", "Time admitted requests spent queued",
+                                  label_name="route", label_values=routes)
+        rejected = registry.counter("admission_rejected_total", "Requests shed with a 503 by admission control",
+                                    label_name="route", label_values=routes)
+        timeouts = registry.counter("admission_timeouts_total", "Queued requests shed after waiting max_wait",
+                                    label_name="route", label_values=routes)
+        in_flight = registry.gauge("admission_in_flight", "Requests holding an admission slot",
+                                   label_name="route", label_values=routes)
+        queued = registry.gauge("admission_queued", "Requests waiting for an admission slot",
+                                label_name="route", label_values=routes)
+        # Hold each route's children directly so the request path never looks up labels
+        self._metrics = {
+            route: (wait.labels(route=route), rejected.labels(route=route), timeouts.labels(route=route))
+            for route in routes
+        }
+        for route, limit in limits.items():
+            in_flight.labels(route=route).callback = lambda limit=limit: limit.active
+            queued.labels(route=route).callback = lambda limit=limit: limit.queued
+
+    def route_metrics(self, route: str) -> Tuple:
+        return self._metrics[route]
+
+    def match(self, path: str) -> Optional[str]:
+        """The limited route covering a request path, if any"""
+        # Walk up one path segment at a time, a handful of dict lookups per request
+        while path:
+            if path in self.limits:
+                return path
+            path = path.rpartition('/')[0]
+        return None
+
+def parse_limit(spec: str) -> AdmissionLimit:
+    """An AdmissionLimit from "concurrency:queue_size:max_wait_ms" """
+    concurrency, queue_size, max_wait_ms = (value.strip() for value in spec.split(':'))
+    return AdmissionLimit(int(concurrency), int(queue_size), float(max_wait_ms) / 1000)
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that admits requests to limited routes before any body
+    parsing, and answers shed requests with a fast 503 and Retry-After
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        route = self.controller.match(scope["path"]) if scope["type"] == "http" else None
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.controller.limits[route]
+        wait_seconds, rejected, timeouts = self.controller.route_metrics(route)
+        try:
+            waited = await limit.acquire()
+        except Overloaded as e:
+            rejected.inc()
+            if e.reason == "timeout":
+                timeouts.inc()
+            await self._reject(send, e)
+            return
+
+        wait_seconds.observe(waited)
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release(perf_counter() - started)
+
+    async def _reject(self, send, overloaded: Overloaded) -> None:
+        body = json.dumps({"detail": f"Server overloaded ({overloaded.reason}), retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(overloaded.retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,197 @@
+"""
+Offline bulk chord recognition over streams of logged note sets
+
+Reads JSONL or CSV note sets from files or stdin and writes one JSON result
+per input line, in input order. Lines are shipped to a process pool in
+chunks with a bounded number of chunks in flight, so memory stays constant
+whatever the input size. Every worker memoizes results per pitch-class set,
+and there are only 4096 of those, so repeated sets are never scored twice.
+
+Usage:
+    python bulk_analyzer.py notes.jsonl > chords.jsonl
+    cat notes.csv | python bulk_analyzer.py --format csv - --output chords.jsonl
+    python bulk_analyzer.py --workers 8 --match-table chord_table.bin day1.jsonl day2.jsonl
+
+JSONL lines are either a list of notes or an object with a "notes" list and
+an optional "id". CSV files need a header with a notes column holding notes
+separated by spaces, and may have an id column.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+from chord_recognition import ChordRecognitionEngine
+
+# Encoded results kept per worker, (mask, note count) keys bound it in practice
+MAX_CACHED_RESULTS = 65536
+
+# (notes, id) column indexes of CSV input, None for JSONL
+Columns = Optional[Tuple[int, int]]
+
+engine: Optional[ChordRecognitionEngine] = None
+results_cache: Dict[Tuple[int, int], str] = {}
+cache_hits = 0
+
+def initialize_worker(match_table: Optional[str], file_vocabulary: bool = False) -> None:
+    global engine
+    engine = ChordRecognitionEngine()
+    if match_table:
+        engine.use_match_table(Path(match_table), check_interval=float('inf'), trust_file_vocabulary=file_vocabulary)
+
+def parse_line(line: str, columns: Columns) -> Tuple[object, List[str]]:
+    """(id, notes) of one input line"""
+    if columns is None:
+        item = json.loads(line)
+        if isinstance(item, list):
+            return None, item
+        notes = item['notes']
+        if not isinstance(notes, list):
+            raise ValueError("notes must be a list")
+        return item.get('id'), notes
+    notes_index, id_index = columns
+    row = next(csv.reader([line]))
+    return (row[id_index] if 0 <= id_index < len(row) else None), row[notes_index].split()
+
+def encode_chords(notes: List[str]) -> str:
+    """JSON list of recognized chords, memoized by pitch-class set and note count"""
+    global cache_hits
+    unique_notes = engine.normalize_notes(notes)
+    if len(notes) < 2:
+        return '[]'
+    # Unknown notes only count towards the note total, so the mask and size decide the result
+    key = (engine.pitch_class_mask(unique_notes), len(unique_notes))
+    encoded = results_cache.get(key)
+    if encoded is not None:
+        cache_hits += 1
+        return encoded
+
+    encoded = json.dumps([
+        {'name': chord.name, 'type': chord.type, 'confidence': chord.confidence,
+         'is_exact_match': chord.is_exact_match}
+        for chord in engine.recognize_chords(notes)
+    ], ensure_ascii=False, separators=(',', ':'))
+    if len(results_cache) < MAX_CACHED_RESULTS:
+        results_cache[key] = encoded
+    return encoded
+
+def analyze_chunk(first_line: int, lines: List[str], columns: Columns) -> Tuple[str, int, int]:
+    """Output lines for a chunk of input lines, with the chunk's count of cache hits and errors"""
+    global cache_hits
+    cache_hits = 0
+    errors = 0
+    output = []
+    for line_number, line in enumerate(lines, first_line):
+        try:
+            item_id, notes = parse_line(line, columns)
+            if not all(isinstance(note, str) for note in notes):
+                raise ValueError("notes must be strings")
+            chords = encode_chords(notes)
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            errors += 1
+            output.append(json.dumps({'line': line_number, 'error': str(e) or type(e).__name__}, separators=(',', ':')))
+            continue
+        if item_id is None:
+            output.append(f'{{"line":{line_number},"chords":{chords}}}')
+        else:
+            output.append(f'{{"line":{line_number},"id":{json.dumps(item_id)},"chords":{chords}}}')
+    output.append('')
+    return '\n'.join(output), cache_hits, errors
+
+def read_lines(paths: List[str], csv_header: bool) -> Iterator[Tuple[int, str, List[str]]]:
+    """
+    Lazy stream of (line number, line, CSV header) over all inputs. Line
+    numbers count data lines from 1 across every input, blank lines excluded.
+    """
+    line_number = 0
+    for path in paths:
+        with (open(path, encoding='utf-8', newline='') if path != '-' else sys.stdin) as stream:
+            header = next(csv.reader([stream.readline()]), []) if csv_header else []
+            for line in stream:
+                line = line.rstrip('\r\n')
+                if line:
+                    line_number += 1
+                    yield line_number, line, header
+
+def csv_columns(header: List[str], notes_column: str, id_column: str) -> Tuple[int, int]:
+    if notes_column not in header:
+        raise SystemExit(f"CSV input has no '{notes_column}' column")
+    return header.index(notes_column), header.index(id_column) if id_column in header else -1
+
+def chunks(lines: Iterator[Tuple[int, str, List[str]]], chunk_size: int,
+           columns: Callable[[List[str]], Columns]) -> Iterator[Tuple[int, List[str], Columns]]:
+    """(first line number, lines, CSV columns) chunks that never span two different CSV headers"""
+    for header, group in itertools.groupby(lines, key=lambda item: item[2]):
+        item_columns = columns(header)
+        while True:
+            chunk = list(itertools.islice(group, chunk_size))
+            if not chunk:
+                break
+            yield chunk[0][0], [line for _, line, _ in chunk], item_columns
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recognize chords for a stream of note sets")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="JSONL or CSV files, - for stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format, defaults to the first file's extension")
+    parser.add_argument("--output", help="Output JSONL file, defaults to stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes, 1 runs in-process")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Lines sent to a worker at a time")
+    parser.add_argument("--match-table", help="Precomputed chord match table shared by every worker")
+    parser.add_argument("--file-vocabulary", action="store_true",
+                        help="Use the match table's own vocabulary instead of rebuilding it from the built-in one")
+    parser.add_argument("--notes-column", default="notes", help="CSV column with space-separated notes")
+    parser.add_argument("--id-column", default="id", help="CSV column echoed as the result id")
+    args = parser.parse_args()
+
+    input_format = args.format or ('csv' if args.inputs[0].endswith('.csv') else 'jsonl')
+    is_csv = input_format == 'csv'
+    lines = read_lines(args.inputs, is_csv)
+    columns = (lambda header: csv_columns(header, args.notes_column, args.id_column)) if is_csv else \
+        (lambda header: None)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+
+    started = time.perf_counter()
+    total_lines = total_hits = total_errors = 0
+
+    def write(result: Tuple[str, int, int], line_count: int) -> None:
+        nonlocal total_lines, total_hits, total_errors
+        text, hits, errors = result
+        output.write(text)
+        total_lines += line_count
+        total_hits += hits
+        total_errors += errors
+
+    with output:
+        if args.workers <= 1:
+            initialize_worker(args.match_table, args.file_vocabulary)
+            for first_line, chunk, chunk_columns in chunks(lines, args.chunk_size, columns):
+                write(analyze_chunk(first_line, chunk, chunk_columns), len(chunk))
+        else:
+            with ProcessPoolExecutor(args.workers, initializer=initialize_worker,
+                                     initargs=(args.match_table, args.file_vocabulary)) as pool:
+                # A bounded window of chunks in flight keeps memory constant, and
+                # collecting them oldest first keeps the output in input order
+                in_flight = deque()
+                for first_line, chunk, chunk_columns in chunks(lines, args.chunk_size, columns):
+                    if len(in_flight) >= args.workers * 2:
+                        future, line_count = in_flight.popleft()
+                        write(future.result(), line_count)
+                    in_flight.append((pool.submit(analyze_chunk, first_line, chunk, chunk_columns), len(chunk)))
+                while in_flight:
+                    future, line_count = in_flight.popleft()
+                    write(future.result(), line_count)
+
+    elapsed = time.perf_counter() - started
+    print(f"{total_lines} lines in {elapsed:.2f}s ({total_lines / max(elapsed, 1e-9):,.0f}/s), "
+          f"{total_hits} repeated pitch-class sets, {total_errors} errors", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,73 @@
-from typing import List, Set, Dict, Tuple
+from typing import List, Set, Dict, Tuple, NamedTuple, Optional
+from pathlib import Path
 from models import RecognizedChord
+from match_table import (
+    MatchTable, load_or_build_match_table, open_match_table, vocabulary_version,
+    ANSWERS_PER_SET, EMPTY_ENTRY, EXACT_MATCH_FLAG
+)
+import logging
 import re
+import sys
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+PITCH_CLASSES = {note: i for i, note in enumerate(NOTE_NAMES)}
+
+# Bump when the client index layout or the scoring rules ported to the frontend change
+CLIENT_INDEX_FORMAT = 1
+
+# Salience column of chord notes without a pitch class, always 0
+NO_PITCH_CLASS = 12
+
+# Number of pitch classes in each 12-bit set
+POPCOUNT = np.array([mask.bit_count() for mask in range(4096)], dtype=np.int64)
+
+# Note sets scored together by recognize_weighted
+WEIGHTED_BLOCK_SIZE = 512
+
+class ChordQuality(NamedTuple):
+    """Metadata shared by every chord of the same quality"""
+    type: str
+    structure: str
+    category: str
+
+class ChordRecord(NamedTuple):
+    """Compact chord vocabulary entry, pitch classes stored as 12-bit masks"""
+    name: str
+    notes: Tuple[str, ...]
+    quality: ChordQuality
+    mask: int  # Bit i is set when pitch class i is in the chord
+    triad_mask: int  # Mask of the first three chord notes
+    size: int
+    triad_size: int
+    id: int  # Stable position in the vocabulary
+    root: int  # Pitch class of the root, the first chord note
+
+class ChordMatch(NamedTuple):
+    """A chord that passed the recognition threshold, before ranking"""
+    record: ChordRecord
+    confidence: int
+    is_exact_match: bool
+    matching_notes: int
 
 class ChordRecognitionEngine:
     def __init__(self):
-        self.chord_database = self._initialize_chord_database()
         self.note_map = self._initialize_note_map()
+        self.chord_database = self._initialize_chord_database()
+        self.chords_by_name = self._index_chord_names(self.chord_database)
+        # Chord ids are positions in the vocabulary, stable for a given vocabulary version
+        self.vocabulary_version = vocabulary_version(self.vocabulary_definitions())
+        # Vocabulary defined in code, match tables holding another one are rebuilt unless trusted
+        self.builtin_vocabulary_version = self.vocabulary_version
+        self._trust_file_vocabulary = False
+        self.match_table = None
+        self._vocabulary_matrix: Optional[Tuple[int, Tuple[np.ndarray, ...]]] = None
+        self._match_table_path: Optional[Path] = None
+        self._match_table_check_interval = 0.0
+        self._next_match_table_check = 0.0
 
     def _initialize_note_map(self) -> Dict[str, str]:
         """Convert flats to sharps for consistency"""
@@ -14,7 +76,78 @@ class ChordRecognitionEngine:
             'Ab': 'G#', 'Bb': 'A#'
         }
 
-    def _initialize_chord_database(self) -> List[Dict]:
+    def _initialize_chord_database(self) -> List[ChordRecord]:
+        return self.compile_vocabulary(self._chord_definitions())
+
+    def compile_vocabulary(self, definitions: List[Dict]) -> List[ChordRecord]:
+        """Compile chord definitions into compact records with shared quality metadata"""
+        qualities: Dict[Tuple[str, str, str], ChordQuality] = {}
+        records = []
+        for chord_id, chord in enumerate(definitions):
+            key = (chord['type'], chord['structure'], chord['category'])
+            quality = qualities.get(key)
+            if quality is None:
+                quality = ChordQuality(*(sys.intern(value) for value in key))
+                qualities[key] = quality
+            records.append(self._compile_chord(chord['name'], chord['notes'], quality, chord_id))
+        return records
+
+    def _index_chord_names(self, chord_database: List[ChordRecord]) -> Dict[str, ChordRecord]:
+        return {chord.name: chord for chord in chord_database}
+
+    def find_chord(self, name: str) -> Optional[ChordRecord]:
+        """Look up a chord by name, accepting a flat root such as 'Bbm7'"""
+        chord = self.chords_by_name.get(name)
+        if chord is None and len(name) >= 2 and name[1] == 'b':
+            chord = self.chords_by_name.get(self.normalize_note(name[:2]) + name[2:])
+        return chord
+
+    def vocabulary_definitions(self) -> List[Dict]:
+        """Chord definitions of the current vocabulary, in record order"""
+        return [
+            {'name': chord.name, 'notes': list(chord.notes), 'type': chord.quality.type,
+             'structure': chord.quality.structure, 'category': chord.quality.category}
+            for chord in self.chord_database
+        ]
+
+    def client_index(self) -> Dict:
+        """
+        Compact vocabulary for clients that recognize chords locally: the
+        distinct qualities once, then each chord as [name, quality index,
+        pitch classes in chord order]. Masks and sizes are derived on decode.
+        """
+        qualities: Dict[ChordQuality, int] = {}
+        chords = []
+        for chord in self.chord_database:
+            quality_index = qualities.setdefault(chord.quality, len(qualities))
+            chords.append([chord.name, quality_index, [PITCH_CLASSES.get(note, -1) for note in chord.notes]])
+        return {
+            'format': CLIENT_INDEX_FORMAT,
+            'version': f"{self.vocabulary_version:08x}",
+            'note_names': list(NOTE_NAMES),
+            'flats': self.note_map,
+            'qualities': [list(quality) for quality in qualities],
+            'chords': chords,
+        }
+
+    def _compile_chord(self, name: str, notes: List[str], quality: ChordQuality, chord_id: int = -1) -> ChordRecord:
+        # Reuse the NOTE_NAMES strings so every record shares the same note objects
+        unique_notes = tuple(NOTE_NAMES[PITCH_CLASSES[note]] if note in PITCH_CLASSES else note
+                             for note in self.normalize_notes(notes))
+        triad_notes = unique_notes[:3]
+        return ChordRecord(
+            name=sys.intern(name),
+            notes=unique_notes,
+            quality=quality,
+            mask=self.pitch_class_mask(unique_notes),
+            triad_mask=self.pitch_class_mask(triad_notes),
+            size=len(unique_notes),
+            triad_size=len(triad_notes),
+            id=chord_id,
+            root=PITCH_CLASSES.get(unique_notes[0], -1) if unique_notes else -1
+        )
+
+    def _chord_definitions(self) -> List[Dict]:
         """Comprehensive chord database with basic and advanced chords"""
         return [
             # Major Chords
@@ -167,96 +300,431 @@ class ChordRecognitionEngine:
         """Convert flats to sharps for consistency"""
         return self.note_map.get(note, note)
 
-    def calculate_chord_match(self, input_notes: List[str], chord_notes: List[str]) -> Dict:
-        """Calculate how well input notes match a chord"""
-        normalized_input = [self.normalize_note(note) for note in input_notes]
-        normalized_chord = [self.normalize_note(note) for note in chord_notes]
-        
-        # Remove duplicates while preserving order
-        unique_input = list(dict.fromkeys(normalized_input))
-        unique_chord = list(dict.fromkeys(normalized_chord))
-        
-        matching_notes = [note for note in unique_input if note in unique_chord]
+    def normalize_notes(self, input_notes: List[str]) -> List[str]:
+        """Normalize input notes and remove duplicates while preserving order"""
+        return list(dict.fromkeys([self.normalize_note(note) for note in input_notes]))
+
+    def pitch_class_mask(self, notes) -> int:
+        """12-bit pitch-class set of normalized notes, unknown note names are ignored"""
+        mask = 0
+        for note in notes:
+            pitch_class = PITCH_CLASSES.get(note)
+            if pitch_class is not None:
+                mask |= 1 << pitch_class
+        return mask
+
+    def notes_for_mask(self, mask: int) -> List[str]:
+        """Note names of a 12-bit pitch-class set, in chromatic order from C"""
+        return [NOTE_NAMES[i] for i in range(12) if mask >> i & 1]
+
+    def _match(self, input_mask: int, input_size: int, chord: ChordRecord) -> Tuple[int, int, bool]:
+        """Score a chord against an input pitch-class set, returns (matching notes, percentage, exact)"""
+        matching_notes = (input_mask & chord.mask).bit_count()
         
         # For exact matches
-        if len(unique_input) == len(unique_chord) and len(matching_notes) == len(unique_chord):
-            return {
-                'matching_notes': len(matching_notes),
-                'percentage': 100,
-                'is_exact_match': True,
-                'extra_notes': 0
-            }
-        
-        # For extended chords, prioritize matches that contain triad + extensions
-        # Check if input contains the basic triad of the chord
-        basic_triad_notes = unique_chord[:3] if len(unique_chord) >= 3 else unique_chord
-        triad_matches = [note for note in unique_input if note in basic_triad_notes]
+        if input_size == chord.size and matching_notes == chord.size:
+            return matching_notes, 100, True
         
         # Calculate match percentage based on input notes vs chord notes
-        match_percentage = len(matching_notes) / len(unique_chord) * 100 if unique_chord else 0
+        match_percentage = matching_notes / chord.size * 100
         
         # Special scoring for extended chords (9th, 11th, 13th)
-        if len(unique_chord) > 3:  # Extended chord
+        if chord.size > 3:  # Extended chord
             # Bonus if we have the triad + some extensions
-            if len(triad_matches) == len(basic_triad_notes) and len(matching_notes) >= 4:
+            triad_matches = (input_mask & chord.triad_mask).bit_count()
+            if triad_matches == chord.triad_size and matching_notes >= 4:
                 match_percentage += 10  # Bonus for extended chord recognition
         
         # Penalty for extra notes that don't belong to the chord
-        extra_notes = len(unique_input) - len(matching_notes)
+        extra_notes = input_size - matching_notes
         extra_notes_penalty = max(0, extra_notes * 10)  # Reduced penalty
         final_percentage = max(0, match_percentage - extra_notes_penalty)
         
+        return matching_notes, min(100, int(final_percentage)), False
+
+    def calculate_chord_match(self, input_notes: List[str], chord_notes: List[str],
+                              weights: Optional[List[float]] = None) -> Dict:
+        """Calculate how well input notes match a chord, optionally with a weight per input note"""
+        unique_input = self.normalize_notes(input_notes)
+        chord = self._compile_chord('', chord_notes, None)
+        if weights is not None:
+            salience, unknown = self.salience(input_notes, weights)
+            matching, confidences, exact, _ = self._score_weighted(
+                salience[None], np.array([unknown]), self._pitch_class_matrix([chord])
+            )
+            matching_notes, percentage, is_exact_match = int(matching[0, 0]), int(confidences[0, 0]), bool(exact[0, 0])
+            heard_notes = {self.normalize_note(note) for note, weight in zip(input_notes, weights) if weight > 0}
+            return {
+                'matching_notes': matching_notes,
+                'percentage': percentage,
+                'is_exact_match': is_exact_match,
+                'extra_notes': 0 if is_exact_match else len(heard_notes) - matching_notes
+            }
+        matching_notes, percentage, is_exact_match = self._match(
+            self.pitch_class_mask(unique_input), len(unique_input), chord
+        )
+        
         return {
-            'matching_notes': len(matching_notes),
-            'percentage': min(100, int(final_percentage)),
-            'is_exact_match': False,
-            'extra_notes': extra_notes
+            'matching_notes': matching_notes,
+            'percentage': percentage,
+            'is_exact_match': is_exact_match,
+            'extra_notes': 0 if is_exact_match else len(unique_input) - matching_notes
         }
 
-    def recognize_chords(self, input_notes: List[str]) -> List[RecognizedChord]:
-        """Main chord recognition function"""
-        if not input_notes or len(input_notes) < 2:
-            return []
-        
-        unique_notes = list(dict.fromkeys([self.normalize_note(note) for note in input_notes]))
+    def score_chords(self, unique_notes: List[str],
+                     chord_database: Optional[List[ChordRecord]] = None) -> List[ChordMatch]:
+        """Score every chord in the database and keep those above the threshold"""
+        # Unknown note names never match but still count as extra notes
+        input_mask = self.pitch_class_mask(unique_notes)
+        input_size = len(unique_notes)
         matches = []
         
-        for chord in self.chord_database:
-            match = self.calculate_chord_match(unique_notes, chord['notes'])
+        for chord in chord_database if chord_database is not None else self.chord_database:
+            matching_notes, percentage, is_exact_match = self._match(input_mask, input_size, chord)
             
             # Improved threshold logic for extended chords
-            min_matching_notes = 3 if len(chord['notes']) >= 4 else 2
+            min_matching_notes = 3 if chord.size >= 4 else 2
             min_percentage = 50  # Lowered threshold
             
-            if match['matching_notes'] >= min_matching_notes and match['percentage'] >= min_percentage:
-                recognized_chord = RecognizedChord(
-                    name=chord['name'],
-                    type=chord['type'],
-                    structure=chord['structure'],
-                    confidence=match['percentage'],
-                    notes=chord['notes'],
-                    is_exact_match=match['is_exact_match'],
-                    category=chord['category']
-                )
-                matches.append(recognized_chord)
+            if matching_notes >= min_matching_notes and percentage >= min_percentage:
+                matches.append(ChordMatch(chord, percentage, is_exact_match, matching_notes))
+        
+        return matches
+
+    def to_recognized_chord(self, match: ChordMatch) -> RecognizedChord:
+        """Build the API model for a match, sharing the record's notes tuple"""
+        chord = match.record
+        # Records are trusted, so skip validation and the copy it would make
+        return RecognizedChord.model_construct(
+            name=chord.name,
+            type=chord.quality.type,
+            structure=chord.quality.structure,
+            confidence=match.confidence,
+            notes=chord.notes,
+            is_exact_match=match.is_exact_match,
+            category=chord.quality.category
+        )
+
+    def rank_matches(self, matches: List[ChordMatch], unique_notes: List[str]) -> List[ChordMatch]:
+        """Sort matches by quality and return the best ones"""
+        input_size = len(unique_notes)
         
         # Enhanced sorting: prioritize by match quality and chord complexity
-        def sort_key(chord):
+        def sort_key(match):
             # Exact matches first
-            if chord.is_exact_match:
-                return (0, -chord.confidence, len(chord.notes))
-            
-            # For extended chords, consider how many notes match
-            input_set = set(unique_notes)
-            chord_set = set([self.normalize_note(note) for note in chord.notes])
-            common_notes = len(input_set.intersection(chord_set))
+            if match.is_exact_match:
+                return (0, -match.confidence, match.record.size)
             
             # Prioritize chords that use more of the input notes
-            coverage_score = common_notes / len(unique_notes) * 100
+            coverage_score = match.matching_notes / input_size * 100
             
-            return (1, -coverage_score, -chord.confidence, len(chord.notes))
+            return (1, -coverage_score, -match.confidence, match.record.size)
         
         matches.sort(key=sort_key)
         
         # Return top 6 matches
-        return matches[:6]
\ No newline at end of file
+        return matches[:6]
+
+    def rank_chords(self, matches: List[ChordMatch], unique_notes: List[str]) -> List[RecognizedChord]:
+        """Sort matches by quality and build the API models for the best ones"""
+        return [self.to_recognized_chord(match) for match in self.rank_matches(matches, unique_notes)]
+
+    def use_match_table(self, path: Path, check_interval: float = 5.0, trust_file_vocabulary: bool = False) -> bool:
+        """
+        Answer recognition from a precomputed match table file, building it
+        from the built-in vocabulary if it is missing, unreadable or holds a
+        different vocabulary. The file is memory-mapped, so every worker
+        shares one copy in the page cache. When the file is atomically
+        replaced, the new table is picked up within `check_interval` seconds.
+        A table with another vocabulary, as written by `match_table.py
+        --vocabulary`, is only used with `trust_file_vocabulary`.
+        """
+        expected_version = None if trust_file_vocabulary else self.builtin_vocabulary_version
+        table = load_or_build_match_table(self, path, expected_version)
+        if table is None:
+            return False
+        self._attach_match_table(table)
+        self._trust_file_vocabulary = trust_file_vocabulary
+        self._match_table_path = Path(path)
+        self._match_table_check_interval = check_interval
+        self._next_match_table_check = time.monotonic() + check_interval
+        source = "built-in" if table.vocabulary_version == self.builtin_vocabulary_version else "file"
+        logger.info(f"Using chord match table {path}, {source} vocabulary version {table.vocabulary_version:08x} "
+                    f"with {len(table.records)} chords")
+        return True
+
+    def _attach_match_table(self, table) -> None:
+        self.match_table = table
+        self.chord_database = table.records
+        self.chords_by_name = self._index_chord_names(table.records)
+        self.vocabulary_version = table.vocabulary_version
+
+    def check_match_table(self) -> None:
+        """Pick up a replaced match table file once the check interval has passed"""
+        if self.match_table is not None and time.monotonic() >= self._next_match_table_check:
+            self._refresh_match_table()
+
+    def _refresh_match_table(self) -> None:
+        self._next_match_table_check = time.monotonic() + self._match_table_check_interval
+        try:
+            if self.match_table.is_current():
+                return
+            expected_version = None if self._trust_file_vocabulary else self.builtin_vocabulary_version
+            self._attach_match_table(open_match_table(self, self._match_table_path, expected_version))
+            logger.info(f"Reloaded chord match table, vocabulary version {self.match_table.vocabulary_version:08x}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Keeping current chord match table: {str(e)}")
+
+    def best_match_for_mask(self, mask: int) -> Optional[ChordMatch]:
+        """Top-ranked chord for a pitch-class set, or None when nothing passes the threshold"""
+        if self.match_table is not None:
+            if time.monotonic() >= self._next_match_table_check:
+                self._refresh_match_table()
+            answers = self.match_table.lookup(mask)
+            if not answers:
+                return None
+            chord, confidence, is_exact_match = answers[0]
+            return ChordMatch(chord, confidence, is_exact_match, (mask & chord.mask).bit_count())
+        
+        unique_notes = self.notes_for_mask(mask)
+        if len(unique_notes) < 2:
+            return None
+        ranked = self.rank_matches(self.score_chords(unique_notes), unique_notes)
+        return ranked[0] if ranked else None
+
+    def recognize_masks(self, masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Ranked answers for many pitch-class sets at once, as (chord ids,
+        confidences, exact flags) arrays of shape (sets, ANSWERS_PER_SET).
+        Unused slots have chord id -1.
+        """
+        if self.match_table is not None:
+            if time.monotonic() >= self._next_match_table_check:
+                self._refresh_match_table()
+            answers = self.match_table.answers[masks]
+            chord_ids = answers['chord_id'].astype(np.int32)
+            chord_ids[chord_ids == EMPTY_ENTRY] = -1
+            return chord_ids, answers['confidence'], (answers['flags'] & EXACT_MATCH_FLAG) != 0
+        
+        # Score each distinct set once
+        unique_masks, inverse = np.unique(masks, return_inverse=True)
+        chord_ids = np.full((len(unique_masks), ANSWERS_PER_SET), -1, dtype=np.int32)
+        confidences = np.zeros((len(unique_masks), ANSWERS_PER_SET), dtype=np.uint8)
+        exact = np.zeros((len(unique_masks), ANSWERS_PER_SET), dtype=bool)
+        for row, mask in enumerate(unique_masks.tolist()):
+            unique_notes = self.notes_for_mask(mask)
+            if len(unique_notes) < 2:
+                continue
+            for slot, match in enumerate(self.rank_matches(self.score_chords(unique_notes), unique_notes)):
+                chord_ids[row, slot] = match.record.id
+                confidences[row, slot] = match.confidence
+                exact[row, slot] = match.is_exact_match
+        return chord_ids[inverse], confidences[inverse], exact[inverse]
+
+    def salience(self, input_notes: List[str], weights: List[float]) -> Tuple[np.ndarray, float]:
+        """
+        Salience of each pitch class for notes weighted by velocity, duration
+        or detection confidence, scaled so the strongest note is 1. A pitch
+        class heard more than once keeps its strongest weight, and zero
+        weights drop a note. Returns the (12,) saliences and the total
+        salience of unknown note names, which can only count as extra notes.
+        """
+        salience, unknown = self.salience_matrix([input_notes], [weights])
+        return salience[0], float(unknown[0])
+
+    def salience_matrix(self, items: List[List[str]], weights: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Saliences of many weighted note sets as (sets, 12) and (sets,) arrays, see salience"""
+        rows = []
+        unknown_totals = []
+        strongest = []
+        for input_notes, note_weights in zip(items, weights):
+            row = [0.0] * 12
+            unknown: Dict[str, float] = {}
+            for note, weight in zip(input_notes, note_weights):
+                note = self.note_map.get(note, note)
+                pitch_class = PITCH_CLASSES.get(note)
+                if pitch_class is None:
+                    unknown[note] = max(unknown.get(note, 0.0), weight)
+                elif weight > row[pitch_class]:
+                    row[pitch_class] = weight
+            rows.append(row)
+            unknown_totals.append(sum(unknown.values()))
+            strongest.append(max(max(row), max(unknown.values(), default=0.0)))
+        
+        scale = np.array(strongest, dtype=np.float64)
+        scale[scale <= 0] = 1
+        salience = np.array(rows, dtype=np.float64).reshape(len(rows), 12)
+        salience /= scale[:, None]
+        return salience, np.array(unknown_totals, dtype=np.float64) / scale
+
+    def _pitch_class_matrix(self, records: List[ChordRecord]) -> Tuple[np.ndarray, ...]:
+        """(membership, triad pitch classes, sizes, masks) arrays of chord records, one row per chord"""
+        membership = np.zeros((len(records), 12))
+        triads = np.full((len(records), 3), NO_PITCH_CLASS, dtype=np.intp)
+        for row, chord in enumerate(records):
+            membership[row] = [chord.mask >> i & 1 for i in range(12)]
+            for slot, note in enumerate(chord.notes[:3]):
+                triads[row, slot] = PITCH_CLASSES.get(note, NO_PITCH_CLASS)
+        sizes = np.array([chord.size for chord in records], dtype=np.float64)
+        masks = np.array([chord.mask for chord in records], dtype=np.int64)
+        return membership, triads, sizes, masks
+
+    def vocabulary_matrix(self) -> Tuple[np.ndarray, ...]:
+        """Pitch-class matrix of the current vocabulary, rebuilt when the vocabulary changes"""
+        self.check_match_table()
+        if self._vocabulary_matrix is None or self._vocabulary_matrix[0] != self.vocabulary_version:
+            self._vocabulary_matrix = (self.vocabulary_version, self._pitch_class_matrix(self.chord_database))
+        return self._vocabulary_matrix[1]
+
+    def _score_weighted(self, salience: np.ndarray, unknown: np.ndarray,
+                        matrix: Tuple[np.ndarray, ...]) -> Tuple[np.ndarray, ...]:
+        """
+        Weighted version of _match for (sets, 12) saliences against every
+        chord at once, returns (matching notes, confidences, exact flags,
+        share of the input salience inside the chord) of shape (sets, chords).
+        Each input note counts by its salience: chord notes cover the chord by
+        their salience, the triad bonus is scaled by the weakest triad note and
+        extra notes cost 10 points times their salience. With equal weights
+        every score is exactly the unweighted one, so confidences stay on the
+        same heuristic 0-100 match percentage scale, not probabilities, and
+        the same thresholds apply.
+        """
+        membership, triads, sizes, masks = matrix
+        inside = salience @ membership.T
+        present = salience > 0
+        input_masks = present @ (1 << np.arange(12))
+        matching = POPCOUNT[input_masks[:, None] & masks]
+        
+        match_percentage = inside / sizes
+        match_percentage *= 100
+        # Bonus for extended chords with their whole triad, as strong as its weakest note
+        padded = np.concatenate((salience, np.zeros((len(salience), 1))), axis=1)
+        triad_salience = np.minimum(np.minimum(padded[:, triads[:, 0]], padded[:, triads[:, 1]]), padded[:, triads[:, 2]])
+        triad_salience *= 10
+        triad_salience[:, sizes <= 3] = 0
+        triad_salience[matching < 4] = 0
+        match_percentage += triad_salience
+        
+        total = (salience.sum(axis=1) + unknown)[:, None]
+        extra_penalty = total - inside
+        extra_penalty *= 10
+        np.maximum(extra_penalty, 0, out=extra_penalty)
+        final_percentage = match_percentage - extra_penalty
+        
+        # Exact when the notes heard are the chord's notes, scored by how strongly they were heard
+        exact = (input_masks[:, None] == masks) & (unknown[:, None] == 0)
+        np.copyto(final_percentage, match_percentage, where=exact)
+        np.clip(final_percentage, 0, 100, out=final_percentage)
+        explained = np.divide(inside, total, out=np.zeros_like(inside), where=total > 0)
+        explained *= 100
+        return matching, final_percentage.astype(np.int64), exact, explained
+
+    def recognize_weighted(self, salience: np.ndarray,
+                           unknown: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Ranked answers for (sets, 12) saliences with the (sets,) salience of
+        unknown notes, in the layout of recognize_masks. Thresholds are those
+        of score_chords. Sets whose notes all weigh the same are ranked like
+        rank_matches, so equal weights answer exactly like no weights. Other
+        sets are ranked by confidence first: a chord that also covers a faint
+        note should not beat one that fits the strong notes.
+        """
+        matrix = self.vocabulary_matrix()
+        chord_ids = np.full((len(salience), ANSWERS_PER_SET), -1, dtype=np.int32)
+        confidences = np.zeros((len(salience), ANSWERS_PER_SET), dtype=np.uint8)
+        exact = np.zeros((len(salience), ANSWERS_PER_SET), dtype=bool)
+        # Blocks of sets keep the (sets, chords) intermediates in cache
+        for start in range(0, len(salience), WEIGHTED_BLOCK_SIZE):
+            block = slice(start, start + WEIGHTED_BLOCK_SIZE)
+            chord_ids[block], confidences[block], exact[block] = self._rank_weighted(
+                salience[block], unknown[block], matrix
+            )
+        return chord_ids, confidences, exact
+
+    def _rank_weighted(self, salience: np.ndarray, unknown: np.ndarray,
+                       matrix: Tuple[np.ndarray, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        sizes = matrix[2]
+        matching, confidences, exact, explained = self._score_weighted(salience, unknown, matrix)
+        passed = (matching >= np.where(sizes >= 4, 3, 2)) & (confidences >= 50)
+        
+        # Equal weights leave every salience at 0 or 1, and unknown notes at a whole count
+        uniform = ((salience == 0) | (salience == 1)).all(axis=1) & (unknown == np.floor(unknown))
+        
+        # Only the few chords above the threshold are sorted, in one pass over every set.
+        # Uniform sets use the rank_matches key: exact matches by confidence, then the
+        # share of the input explained, then confidence. Weighted sets go by confidence,
+        # then exact matches, then the share explained. Smaller chords break ties and
+        # the stable sort keeps vocabulary order after that
+        rows, columns = np.nonzero(passed)
+        row_confidences = confidences[rows, columns].astype(np.float64)
+        row_exact = exact[rows, columns]
+        row_explained = explained[rows, columns]
+        row_uniform = uniform[rows]
+        first = np.where(row_uniform, ~row_exact, -row_confidences)
+        second = np.where(row_uniform, np.where(row_exact, -row_confidences, -row_explained), ~row_exact)
+        third = np.where(row_uniform, -row_confidences, -row_explained)
+        order = np.lexsort((sizes[columns], third, second, first, rows))
+        rows, columns = rows[order], columns[order]
+        row_confidences = confidences[rows, columns]
+        row_exact = row_exact[order]
+        
+        counts = np.bincount(rows, minlength=len(salience))
+        slots = np.arange(len(rows)) - (np.cumsum(counts) - counts)[rows]
+        kept = slots < ANSWERS_PER_SET
+        rows, slots = rows[kept], slots[kept]
+        
+        chord_ids = np.full((len(salience), ANSWERS_PER_SET), -1, dtype=np.int32)
+        ranked_confidences = np.zeros((len(salience), ANSWERS_PER_SET), dtype=np.uint8)
+        ranked_exact = np.zeros((len(salience), ANSWERS_PER_SET), dtype=bool)
+        chord_ids[rows, slots] = columns[kept]
+        ranked_confidences[rows, slots] = row_confidences[kept]
+        ranked_exact[rows, slots] = row_exact[kept]
+        return chord_ids, ranked_confidences, ranked_exact
+
+    def recognize_weighted_notes(self, input_notes: List[str], weights: List[float]) -> List[RecognizedChord]:
+        """Chord recognition with a weight per input note"""
+        salience, unknown = self.salience(input_notes, weights)
+        chord_ids, confidences, exact = self.recognize_weighted(salience[None], np.array([unknown]))
+        input_mask = int((salience > 0) @ (1 << np.arange(12)))
+        matches = []
+        for chord_id, confidence, is_exact_match in zip(chord_ids[0].tolist(), confidences[0].tolist(),
+                                                        exact[0].tolist()):
+            if chord_id < 0:
+                break
+            chord = self.chord_database[chord_id]
+            matches.append(ChordMatch(chord, confidence, is_exact_match, (input_mask & chord.mask).bit_count()))
+        return [self.to_recognized_chord(match) for match in matches]
+
+    def lookup_chords(self, unique_notes: List[str]) -> Optional[List[RecognizedChord]]:
+        """
+        Answer from the precomputed match table. Returns None when there is no
+        table or an input note is unknown, so the caller must score instead.
+        """
+        if self.match_table is None:
+            return None
+        if time.monotonic() >= self._next_match_table_check:
+            self._refresh_match_table()
+        
+        mask = 0
+        for note in unique_notes:
+            pitch_class = PITCH_CLASSES.get(note)
+            if pitch_class is None:
+                return None
+            mask |= 1 << pitch_class
+        
+        return [
+            self.to_recognized_chord(ChordMatch(chord, confidence, is_exact_match, (mask & chord.mask).bit_count()))
+            for chord, confidence, is_exact_match in self.match_table.lookup(mask)
+        ]
+
+    def recognize_chords(self, input_notes: List[str]) -> List[RecognizedChord]:
+        """Main chord recognition function"""
+        if not input_notes or len(input_notes) < 2:
+            return []
+        
+        unique_notes = self.normalize_notes(input_notes)
+        recognized_chords = self.lookup_chords(unique_notes)
+        if recognized_chords is not None:
+            return recognized_chords
+        matches = self.score_chords(unique_notes)
+        return self.rank_chords(matches, unique_notes)
@@ -0,0 +1,133 @@
+from typing import Dict, List, Optional, Tuple
+from chord_recognition import ChordRecognitionEngine, ChordRecord, POPCOUNT
+import numpy as np
+
+RELATION_SIMILAR = 0
+RELATION_TRITONE_SUBSTITUTION = 1
+RELATION_RELATIVE_MINOR = 2
+RELATION_RELATIVE_MAJOR = 3
+RELATION_NAMES = ('similar', 'tritone_substitution', 'relative_minor', 'relative_major')
+
+DOMINANT_TYPES = ('Dominant 7th', '9th')
+# Relative major/minor pairs by chord type, the minor root is 9 semitones above the major root
+RELATIVE_TYPES = {'Majör': 'Minör', 'Major 7th': 'Minor 7th', 'Major 6th': 'Minor 6th', 'Major 9th': 'Minor 9th'}
+
+SUBSTITUTION_SCORE = 95  # Functional substitutes rank above everything but near-identical chords
+
+class ChordSimilarityIndex:
+    """
+    Top-k similar chords for every chord in the vocabulary, computed once from
+    pitch-class masks. Only the neighbor lists are kept, as a uint16 id matrix
+    and uint8 score/relation matrices, so memory grows as chords x k and a
+    lookup is a row slice.
+    """
+
+    ROW_CHUNK = 1024  # Rows of the pairwise matrices computed at a time
+
+    def __init__(self, chord_engine: ChordRecognitionEngine, k: int = 16):
+        self.chord_engine = chord_engine
+        self.k = k
+        self.distance_to_pitch_class = self._initialize_circular_distances()
+        self._build(chord_engine.chord_database)
+
+    def _initialize_circular_distances(self) -> np.ndarray:
+        """(12, 12) semitone distance between pitch classes around the octave"""
+        steps = np.abs(np.arange(12)[:, None] - np.arange(12)[None, :])
+        return np.minimum(steps, 12 - steps)
+
+    def _build(self, chords: List[ChordRecord]) -> None:
+        self.chords = chords
+        count = len(chords)
+        k = min(self.k, max(0, count - 1))
+        masks = np.array([chord.mask for chord in chords], dtype=np.int64)
+        roots = np.array([chord.root for chord in chords], dtype=np.int64)
+        types = [chord.quality.type for chord in chords]
+        bits = ((masks[:, None] >> np.arange(12)) & 1).astype(np.float64)
+
+        # Distance from each pitch class to the nearest note of each chord, (chords, 12)
+        nearest = np.where(bits[:, None, :] > 0, self.distance_to_pitch_class[None, :, :], 12).min(axis=2)
+
+        dominant = np.array([t in DOMINANT_TYPES for t in types])
+        major_type_ids = {t: i for i, t in enumerate(RELATIVE_TYPES)}
+        minor_type_ids = {t: i for i, t in enumerate(RELATIVE_TYPES.values())}
+        major_pair = np.array([major_type_ids.get(t, -1) for t in types])
+        minor_pair = np.array([minor_type_ids.get(t, -2) for t in types])
+
+        self.neighbor_ids = np.zeros((count, k), dtype=np.uint16)
+        self.neighbor_scores = np.zeros((count, k), dtype=np.uint8)
+        self.neighbor_relations = np.zeros((count, k), dtype=np.uint8)
+        if k == 0:
+            return
+
+        for start in range(0, count, self.ROW_CHUNK):
+            rows = slice(start, min(count, start + self.ROW_CHUNK))
+
+            # Shared notes as a Jaccard index
+            shared = POPCOUNT[masks[rows, None] & masks[None, :]]
+            union = POPCOUNT[masks[rows, None] | masks[None, :]]
+            jaccard = shared / np.maximum(union, 1)
+
+            # Voice-leading distance: every note moves to the nearest note of
+            # the other chord, in both directions, normalized by note count
+            movement = bits[rows] @ nearest.T + (bits @ nearest[rows].T).T
+            voices = bits[rows].sum(axis=1)[:, None] + bits.sum(axis=1)[None, :]
+            smoothness = 1 - np.minimum(movement / np.maximum(voices, 1) / 3, 1)
+
+            scores = np.rint(100 * (0.6 * jaccard + 0.4 * smoothness))
+            relations = np.zeros(scores.shape, dtype=np.uint8)
+
+            interval = (roots[None, :] - roots[rows, None]) % 12
+            tritone = dominant[rows, None] & dominant[None, :] & (interval == 6)
+            relative_minor = (major_pair[rows, None] == minor_pair[None, :]) & (interval == 9)
+            relative_major = (minor_pair[rows, None] == major_pair[None, :]) & (interval == 3)
+            for relation, mask in ((RELATION_TRITONE_SUBSTITUTION, tritone),
+                                   (RELATION_RELATIVE_MINOR, relative_minor),
+                                   (RELATION_RELATIVE_MAJOR, relative_major)):
+                relations[mask] = relation
+                scores[mask] = np.maximum(scores[mask], SUBSTITUTION_SCORE)
+
+            # A chord is never its own neighbor
+            scores[np.arange(scores.shape[0]), np.arange(start, rows.stop)] = -1
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.lexsort((top, -top_scores), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+
+            self.neighbor_ids[rows] = top
+            self.neighbor_scores[rows] = np.take_along_axis(scores, top, axis=1)
+            self.neighbor_relations[rows] = np.take_along_axis(relations, top, axis=1)
+
+    def voice_leading_distance(self, a: ChordRecord, b: ChordRecord) -> int:
+        """Total semitones moved when every note goes to the nearest note of the other chord"""
+        a_classes = [pc for pc in range(12) if a.mask >> pc & 1]
+        b_classes = [pc for pc in range(12) if b.mask >> pc & 1]
+        distance = self.distance_to_pitch_class
+        return int(sum(min(distance[x][y] for y in b_classes) for x in a_classes)
+                   + sum(min(distance[y][x] for x in a_classes) for y in b_classes))
+
+    def similar_chords(self, name: str, limit: int = 10) -> Optional[Tuple[ChordRecord, List[Dict]]]:
+        """The chord and its most similar chords, or None when the name is unknown"""
+        # The vocabulary is swapped when a new match table is rolled out
+        if self.chord_engine.chord_database is not self.chords:
+            self._build(self.chord_engine.chord_database)
+
+        chord = self.chord_engine.find_chord(name)
+        if chord is None:
+            return None
+
+        similar = []
+        for neighbor_id, score, relation in zip(self.neighbor_ids[chord.id, :limit].tolist(),
+                                                self.neighbor_scores[chord.id, :limit].tolist(),
+                                                self.neighbor_relations[chord.id, :limit].tolist()):
+            neighbor = self.chords[neighbor_id]
+            similar.append({
+                'name': neighbor.name,
+                'type': neighbor.quality.type,
+                'notes': neighbor.notes,
+                'similarity': score,
+                'shared_notes': (chord.mask & neighbor.mask).bit_count(),
+                'voice_leading_distance': self.voice_leading_distance(chord, neighbor),
+                'relation': RELATION_NAMES[relation],
+            })
+        return chord, similar
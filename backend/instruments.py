@@ -0,0 +1,84 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from chord_recognition import NOTE_NAMES
+import numpy as np
+
+class InstrumentProfile(NamedTuple):
+    name: str
+    instrument: str
+    description: str
+    open_strings: Tuple[int, ...]  # MIDI note of each open string, in NotePosition.string order
+    frets: int
+
+DEFAULT_TUNING = 'standard'
+
+INSTRUMENT_PROFILES = {
+    profile.name: profile for profile in (
+        InstrumentProfile('standard', 'guitar', 'Standard (E A D G B E)', (40, 45, 50, 55, 59, 64), 24),
+        InstrumentProfile('drop_d', 'guitar', 'Drop D (D A D G B E)', (38, 45, 50, 55, 59, 64), 24),
+        InstrumentProfile('dadgad', 'guitar', 'DADGAD (D A D G A D)', (38, 45, 50, 55, 57, 62), 24),
+        InstrumentProfile('seven_string', 'guitar', '7-string (B E A D G B E)', (35, 40, 45, 50, 55, 59, 64), 24),
+        InstrumentProfile('bass', 'bass', '4-string bass (E A D G)', (28, 33, 38, 43), 24),
+        # Re-entrant tuning, the G string is tuned above the C string
+        InstrumentProfile('ukulele', 'ukulele', 'Ukulele (G C E A)', (67, 60, 64, 69), 15),
+    )
+}
+
+def midi_frequencies(midi: np.ndarray, reference_pitch: float = 440.0) -> np.ndarray:
+    """Equal temperament frequency of MIDI note numbers, with A4 (69) at the reference pitch"""
+    return reference_pitch * np.exp2((midi - 69) / 12)
+
+class FretboardTable:
+    """
+    Fret -> MIDI -> frequency tables of one instrument profile, as
+    (strings, frets + 1) arrays so every lookup is plain array indexing
+    """
+
+    def __init__(self, profile: InstrumentProfile, reference_pitch: float = 440.0):
+        self.profile = profile
+        self.reference_pitch = reference_pitch
+        self.open_strings = profile.open_strings
+        self.strings = len(profile.open_strings)
+        self.frets = profile.frets
+        self.midi = np.array(profile.open_strings, dtype=np.int64)[:, None] + np.arange(profile.frets + 1)
+        self.pitch_classes = self.midi % 12
+        self.frequencies = midi_frequencies(self.midi, reference_pitch)
+
+    def contains(self, string: int, fret: int) -> bool:
+        return 0 <= string < self.strings and 0 <= fret <= self.frets
+
+    def note(self, string: int, fret: int) -> str:
+        """Note name at a position, which must be on the fretboard"""
+        return NOTE_NAMES[self.pitch_classes[string, fret]]
+
+    def notes(self, positions: List[Tuple[int, int]]) -> Optional[List[str]]:
+        """Note names of (string, fret) positions, or None when any is off the fretboard"""
+        if not all(self.contains(string, fret) for string, fret in positions):
+            return None
+        return [NOTE_NAMES[pitch_class] for pitch_class in
+                self.pitch_classes[[string for string, _ in positions], [fret for _, fret in positions]].tolist()]
+
+class InstrumentRegistry:
+    """Instrument profiles and their fretboard tables, built on first use and cached"""
+
+    def __init__(self, reference_pitch: float = 440.0):
+        self.reference_pitch = reference_pitch
+        self.profiles: Dict[str, InstrumentProfile] = dict(INSTRUMENT_PROFILES)
+        self._tables: Dict[Tuple[str, float], FretboardTable] = {}
+
+    def profile(self, name: Optional[str] = None) -> Optional[InstrumentProfile]:
+        return self.profiles.get(name or DEFAULT_TUNING)
+
+    def table(self, name: Optional[str] = None, reference_pitch: Optional[float] = None) -> Optional[FretboardTable]:
+        """Fretboard table of a profile, or None when the profile is unknown"""
+        profile = self.profile(name)
+        if profile is None:
+            return None
+        key = (profile.name, reference_pitch or self.reference_pitch)
+        table = self._tables.get(key)
+        if table is None:
+            table = FretboardTable(profile, key[1])
+            self._tables[key] = table
+        return table
+
+    def cached_tables(self) -> int:
+        return len(self._tables)
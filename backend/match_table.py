@@ -0,0 +1,208 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# File layout, all little-endian:
+#   header      magic, format version, answers per set, vocabulary version,
+#               chord count, vocabulary length, answer table offset
+#   vocabulary  UTF-8 JSON list of chord definitions, in chord id order
+#   answers     for each of the 4096 pitch-class sets, ANSWERS_PER_SET
+#               entries of (chord id, confidence, flags), unused entries
+#               have chord id EMPTY_ENTRY
+MAGIC = b'CHRD'
+FORMAT_VERSION = 1
+PITCH_CLASS_SETS = 4096
+ANSWERS_PER_SET = 6
+EMPTY_ENTRY = 0xFFFF
+EXACT_MATCH_FLAG = 0x01
+
+HEADER = struct.Struct('<4sHHIIII')
+ENTRY = struct.Struct('<HBB')
+SET_SIZE = ENTRY.size * ANSWERS_PER_SET
+ENTRY_DTYPE = np.dtype([('chord_id', '<u2'), ('confidence', 'u1'), ('flags', 'u1')])
+
+def vocabulary_version(definitions: List[Dict]) -> int:
+    """CRC32 of the canonical vocabulary JSON, changes whenever any chord changes"""
+    return zlib.crc32(json.dumps(definitions, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+class MatchTable:
+    """Read-only, memory-mapped view of a precomputed chord match table file"""
+
+    def __init__(self, path: Path, engine):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        if len(self._buffer) < HEADER.size:
+            raise ValueError(f"{self.path} is too short to be a chord match table")
+        magic, format_version, answers_per_set, version, chord_count, vocabulary_length, answers_offset = \
+            HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION or answers_per_set != ANSWERS_PER_SET:
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} chord match table")
+        if len(self._buffer) != answers_offset + PITCH_CLASS_SETS * SET_SIZE:
+            raise ValueError(f"{self.path} is truncated")
+
+        definitions = json.loads(self._buffer[HEADER.size:HEADER.size + vocabulary_length].decode('utf-8'))
+        if len(definitions) != chord_count or vocabulary_version(definitions) != version:
+            raise ValueError(f"{self.path} has a corrupt vocabulary")
+
+        self.vocabulary_version = version
+        self.records = engine.compile_vocabulary(definitions)
+        self._answers_offset = answers_offset
+        # Zero-copy (sets, answers) view of the same mapping for batch lookups
+        self.answers = np.frombuffer(self._buffer, dtype=ENTRY_DTYPE, count=PITCH_CLASS_SETS * ANSWERS_PER_SET,
+                                     offset=answers_offset).reshape(PITCH_CLASS_SETS, ANSWERS_PER_SET)
+
+    def is_current(self) -> bool:
+        """Whether the file on disk is still the one this table was opened from"""
+        stat = os.stat(self.path)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._identity
+
+    def lookup(self, mask: int) -> List[Tuple[object, int, bool]]:
+        """Ranked (record, confidence, is_exact_match) answers for a pitch-class set"""
+        answers = []
+        offset = self._answers_offset + mask * SET_SIZE
+        for _ in range(ANSWERS_PER_SET):
+            chord_id, confidence, flags = ENTRY.unpack_from(self._buffer, offset)
+            if chord_id == EMPTY_ENTRY:
+                break
+            answers.append((self.records[chord_id], confidence, bool(flags & EXACT_MATCH_FLAG)))
+            offset += ENTRY.size
+        return answers
+
+def build_match_table(engine, path: Path, definitions: Optional[List[Dict]] = None) -> None:
+    """
+    Score every pitch-class set with the engine and write the table. The file
+    is written next to its destination and renamed over it, so readers only
+    ever see a complete table.
+    """
+    if definitions is None:
+        definitions = engine.vocabulary_definitions()
+    records = engine.compile_vocabulary(definitions)
+    if len(records) >= EMPTY_ENTRY:
+        raise ValueError(f"Vocabulary of {len(records)} chords does not fit in a match table")
+
+    vocabulary = json.dumps(definitions, ensure_ascii=False).encode('utf-8')
+    answers_offset = HEADER.size + len(vocabulary)
+    answers = bytearray(PITCH_CLASS_SETS * SET_SIZE)
+
+    for mask in range(PITCH_CLASS_SETS):
+        unique_notes = engine.notes_for_mask(mask)
+        if len(unique_notes) >= 2:
+            ranked = engine.rank_matches(engine.score_chords(unique_notes, records), unique_notes)
+        else:
+            ranked = []
+        offset = mask * SET_SIZE
+        for slot in range(ANSWERS_PER_SET):
+            if slot < len(ranked):
+                match = ranked[slot]
+                ENTRY.pack_into(answers, offset, match.record.id, match.confidence,
+                                EXACT_MATCH_FLAG if match.is_exact_match else 0)
+            else:
+                ENTRY.pack_into(answers, offset, EMPTY_ENTRY, 0, 0)
+            offset += ENTRY.size
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, ANSWERS_PER_SET, vocabulary_version(definitions),
+                         len(definitions), len(vocabulary), answers_offset)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # mkstemp creates owner-only files, but every worker must be able to map it
+            os.fchmod(f.fileno(), 0o644)
+            f.write(header)
+            f.write(vocabulary)
+            f.write(answers)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+def open_match_table(engine, path: Path, expected_version: Optional[int] = None) -> MatchTable:
+    """
+    Open the table at `path`, raises ValueError when it is invalid or, with
+    an expected version, holds a different vocabulary
+    """
+    table = MatchTable(path, engine)
+    if expected_version is not None and table.vocabulary_version != expected_version:
+        raise ValueError(f"{path} has vocabulary version {table.vocabulary_version:08x}, "
+                         f"expected {expected_version:08x}")
+    return table
+
+@contextmanager
+def build_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock next to the table, so workers starting together build it only once"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock = open(path.with_name(f".{path.name}.lock"), 'w')
+    except OSError as e:
+        logger.warning(f"Cannot create chord match table lock, building without it: {str(e)}")
+        yield
+        return
+    with lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def load_or_build_match_table(engine, path: Path, expected_version: Optional[int] = None) -> Optional[MatchTable]:
+    """
+    Open the table at `path`, building it from the engine's vocabulary first
+    if it is missing, invalid or, with an expected version, stale
+    """
+    path = Path(path)
+    try:
+        return open_match_table(engine, path, expected_version)
+    except FileNotFoundError:
+        logger.info(f"Building chord match table at {path}")
+    except ValueError as e:
+        logger.warning(f"Rebuilding chord match table: {str(e)}")
+    except OSError as e:
+        logger.warning(f"Cannot open chord match table: {str(e)}")
+        return None
+
+    try:
+        with build_lock(path):
+            # Another worker may have built it while this one waited for the lock
+            try:
+                return open_match_table(engine, path, expected_version)
+            except (OSError, ValueError):
+                pass
+            build_match_table(engine, path)
+        return MatchTable(path, engine)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cannot build chord match table, scoring in-process instead: {str(e)}")
+        return None
+
+if __name__ == "__main__":
+    from chord_recognition import ChordRecognitionEngine
+
+    parser = argparse.ArgumentParser(description="Build a chord match table file for rollout")
+    parser.add_argument("output", help="Destination path, replaced atomically")
+    parser.add_argument("--vocabulary", help="JSON list of chord definitions, defaults to the built-in vocabulary")
+    args = parser.parse_args()
+
+    engine = ChordRecognitionEngine()
+    definitions = json.loads(Path(args.vocabulary).read_text()) if args.vocabulary else None
+    build_match_table(engine, Path(args.output), definitions)
+    table = MatchTable(Path(args.output), engine)
+    print(f"Wrote {args.output}: {len(table.records)} chords, vocabulary version {table.vocabulary_version:08x}")
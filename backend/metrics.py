@@ -0,0 +1,170 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import math
+
+# Latency buckets in seconds, from 10µs up to 2.5s
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Bucket counters are allocated once, so observe()
+    is a bisect plus a few integer additions and never allocates.
+    """
+    __slots__ = ("labels", "buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 labels: Tuple[Tuple[str, str], ...] = ()):
+        self.labels = labels
+        self.buckets = buckets
+        # Last slot collects observations above the largest bucket (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            labels = self.labels + (("le", _format_value(bound)),)
+            lines.append(f"{name}_bucket{_format_labels(labels)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(self.labels)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(self.labels)} {self.count}")
+        return lines
+
+class Counter:
+    """Monotonic counter"""
+    __slots__ = ("labels", "value")
+
+    def __init__(self, labels: Tuple[Tuple[str, str], ...] = ()):
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def render(self, name: str) -> List[str]:
+        return [f"{name}{_format_labels(self.labels)} {_format_value(self.value)}"]
+
+class Gauge:
+    """Gauge that is either set directly or read from a callback at scrape time"""
+    __slots__ = ("labels", "value", "callback")
+
+    def __init__(self, labels: Tuple[Tuple[str, str], ...] = (),
+                 callback: Optional[Callable[[], float]] = None):
+        self.labels = labels
+        self.value = 0.0
+        self.callback = callback
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def render(self, name: str) -> List[str]:
+        value = self.callback() if self.callback else self.value
+        return [f"{name}{_format_labels(self.labels)} {_format_value(value)}"]
+
+class MetricFamily:
+    """
+    A named metric with a fixed set of label values. Children are created
+    up front so hot paths can hold a direct reference to their child.
+    """
+
+    def __init__(self, name: str, kind: str, help_text: str,
+                 children: Dict[Tuple[Tuple[str, str], ...], object]):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.children = children
+
+    def labels(self, **labels: str):
+        return self.children[tuple(sorted(labels.items()))]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for child in self.children.values():
+            lines.extend(child.render(self.name))
+        return lines
+
+class MetricsRegistry:
+    """Collects metric families and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+
+    def _register(self, name: str, kind: str, help_text: str, factory: Callable,
+                  label_name: Optional[str], label_values: Iterable[str]) -> MetricFamily:
+        if name in self.families:
+            raise ValueError(f"Metric {name} is already registered")
+        if label_name is None:
+            children = {(): factory(())}
+        else:
+            children = {}
+            for value in label_values:
+                labels = ((label_name, value),)
+                children[labels] = factory(labels)
+        family = MetricFamily(name, kind, help_text, children)
+        self.families[name] = family
+        return family
+
+    def histogram(self, name: str, help_text: str, label_name: Optional[str] = None,
+                  label_values: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> MetricFamily:
+        return self._register(name, "histogram", help_text,
+                              lambda labels: Histogram(buckets, labels),
+                              label_name, label_values)
+
+    def counter(self, name: str, help_text: str, label_name: Optional[str] = None,
+                label_values: Iterable[str] = ()) -> MetricFamily:
+        return self._register(name, "counter", help_text, Counter, label_name, label_values)
+
+    def gauge(self, name: str, help_text: str, label_name: Optional[str] = None,
+              label_values: Iterable[str] = ()) -> MetricFamily:
+        return self._register(name, "gauge", help_text, Gauge, label_name, label_values)
+
+    def gauge_callback(self, name: str, help_text: str,
+                       callback: Callable[[], float]) -> MetricFamily:
+        return self._register(name, "gauge", help_text,
+                              lambda labels: Gauge(labels, callback), None, ())
+
+    def render(self) -> str:
+        lines = []
+        for family in self.families.values():
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+async def monitor_event_loop_lag(histogram: Histogram, gauge: Gauge, interval: float = 0.5):
+    """
+    Measure how late the event loop wakes up from a fixed sleep. Any delay
+    beyond the requested interval is time the loop spent blocked.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        histogram.observe(lag)
+        gauge.set(lag)
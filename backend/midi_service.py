@@ -1,31 +1,35 @@
 from models import PlayNoteRequest, PlayNoteResponse
-from typing import Dict
+from instruments import midi_frequencies
+from chord_recognition import NOTE_NAMES
+from typing import Dict, Optional
 import asyncio
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+MIDI_NOTES = 128
+
 class MIDIService:
-    def __init__(self):
+    def __init__(self, reference_pitch: float = 440.0):
+        self.reference_pitch = reference_pitch
+        self.frequencies = midi_frequencies(np.arange(MIDI_NOTES), reference_pitch)
         self.note_frequencies = self._initialize_note_frequencies()
 
     def _initialize_note_frequencies(self) -> Dict[str, float]:
         """Initialize note frequencies for MIDI simulation"""
-        # A4 = 440Hz as reference
-        notes = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+        # Every MIDI note from C-1 (0) to G9 (127), A4 (69) is the reference pitch
         frequencies = {}
-        
-        # Calculate frequencies for different octaves
-        for octave in range(0, 8):
-            for i, note in enumerate(notes):
-                # Calculate frequency using equal temperament formula
-                # f = 440 * 2^((n-69)/12) where n is MIDI note number
-                midi_number = octave * 12 + i
-                frequency = 440.0 * (2 ** ((midi_number - 69) / 12))
-                frequencies[f"{note}{octave}"] = round(frequency, 2)
+        for midi_number, frequency in enumerate(self.frequencies.tolist()):
+            frequencies[self.midi_note_name(midi_number)] = round(frequency, 2)
         
         return frequencies
 
+    @staticmethod
+    def midi_note_name(midi_number: int) -> str:
+        """Scientific pitch name of a MIDI note number, 60 is C4"""
+        return f"{NOTE_NAMES[midi_number % 12]}{midi_number // 12 - 1}"
+
     async def play_note(self, request: PlayNoteRequest) -> PlayNoteResponse:
         """
         Simulate playing a MIDI note
@@ -46,7 +50,8 @@ class MIDIService:
         # Simulate note playing duration
         await asyncio.sleep(0.1)  # Simulate processing time
         
-        logger.info(f"Playing note: {note_key} at {frequency}Hz for {request.duration}ms")
+        # Debug level with lazy formatting keeps this off the hot path in production
+        logger.debug("Playing note: %s at %sHz for %sms", note_key, frequency, request.duration)
         
         return PlayNoteResponse(
             status="playing",
@@ -63,4 +68,36 @@ class MIDIService:
             "note": note_key,
             "frequency": frequency,
             "available": frequency is not None
-        }
\ No newline at end of file
+        }
+
+    def midi_numbers(self, pitch_classes: np.ndarray, octaves: np.ndarray) -> np.ndarray:
+        """MIDI note numbers of pitch classes in scientific pitch octaves"""
+        return (octaves + 1) * 12 + pitch_classes
+
+    def note_info_batch(self, midi: np.ndarray, cents: np.ndarray,
+                        reference_pitch: Optional[float] = None) -> Dict:
+        """
+        Names and frequencies of many MIDI notes at once, as parallel lists.
+        Notes in the MIDI range at the service reference pitch come straight
+        from the frequency array, anything else is computed the same way.
+        """
+        # Absurd inputs overflow to inf, which callers reject
+        with np.errstate(over='ignore'):
+            if reference_pitch is None or reference_pitch == self.reference_pitch:
+                in_range = (midi >= 0) & (midi < MIDI_NOTES)
+                frequencies = np.where(in_range, self.frequencies[np.clip(midi, 0, MIDI_NOTES - 1)],
+                                       midi_frequencies(midi, self.reference_pitch))
+                reference_pitch = self.reference_pitch
+            else:
+                frequencies = midi_frequencies(midi, reference_pitch)
+            frequencies = frequencies * np.exp2(cents / 1200)
+
+        names = np.array(NOTE_NAMES, dtype=object)[midi % 12]
+        octaves = (midi // 12 - 1).astype(str).astype(object)
+        return {
+            'notes': (names + octaves).tolist(),
+            'midi': midi.tolist(),
+            'frequencies': np.round(frequencies, 4).tolist(),
+            'cents': cents.tolist(),
+            'reference_pitch': reference_pitch,
+        }
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, conint
+from typing import List, Optional, Tuple, Union, Dict
 from datetime import datetime
 import uuid
 
@@ -9,15 +9,24 @@ class NotePosition(BaseModel):
     note: str
 
 class ChordRecognitionRequest(BaseModel):
-    notes: List[str]
+    notes: List[str] = []
     selected_positions: Optional[List[NotePosition]] = []
+    tuning: Optional[str] = None  # Instrument profile, when set the notes are read from the positions
+    # Compact alternatives to note names
+    mask: Optional[int] = Field(None, ge=0, lt=4096)  # Bit i set for pitch class i, C is 0
+    pitch_classes: Optional[List[int]] = None
+    # Optional salience of each note or pitch class, e.g. velocity, duration or detection confidence.
+    # Weights change how much each note counts towards the match percentage, they are not probabilities
+    weights: Optional[List[float]] = None
 
 class RecognizedChord(BaseModel):
     name: str
     type: str
     structure: str
+    # Heuristic 0-100 match percentage, not a calibrated probability, with or without weights.
+    # Exact matches score 100 unless weighted input heard some of their notes weakly
     confidence: int
-    notes: List[str]
+    notes: Tuple[str, ...]
     is_exact_match: bool
     category: str = ""
 
@@ -26,6 +35,88 @@ class ChordRecognitionResponse(BaseModel):
     unique_notes: List[str]
     total_notes: int
 
+class BatchRecognitionRequest(BaseModel):
+    # Exactly one of these, one entry per item
+    masks: Optional[List[int]] = Field(None, max_length=65536)
+    pitch_classes: Optional[List[List[int]]] = Field(None, max_length=65536)
+    notes: Optional[List[List[str]]] = Field(None, max_length=65536)
+    # Optional per-note weights of the pitch_classes or notes items
+    weights: Optional[List[List[float]]] = Field(None, max_length=65536)
+
+class ChordRow(BaseModel):
+    id: int
+    name: str
+    type: str
+    notes: Tuple[str, ...]
+
+class BatchRecognitionResponse(BaseModel):
+    vocabulary_version: int  # Chord ids refer to this version of the vocabulary
+    # (items, 6) ranked answers, chord id -1 marks an unused slot
+    chord_ids: List[List[int]]
+    confidences: List[List[int]]  # As RecognizedChord.confidence
+    exact: List[List[bool]]
+    chords: List[ChordRow]  # Every chord referenced by chord_ids
+
+class ScaleRecognitionRequest(BaseModel):
+    notes: List[str]
+    limit: int = Field(10, ge=1, le=50)
+
+class RecognizedScale(BaseModel):
+    name: str
+    root: str
+    scale_type: str
+    category: str
+    confidence: int
+    notes: List[str]
+    is_exact_match: bool
+    missing_notes: int
+
+class ScaleRecognitionResponse(BaseModel):
+    recognized_scales: List[RecognizedScale]
+    unique_notes: List[str]
+    total_notes: int
+
+class SimilarChord(BaseModel):
+    name: str
+    type: str
+    notes: Tuple[str, ...]
+    similarity: int  # 0-100
+    shared_notes: int
+    voice_leading_distance: int  # Semitones
+    relation: str  # similar, tritone_substitution, relative_minor or relative_major
+
+class SimilarChordsResponse(BaseModel):
+    name: str
+    notes: Tuple[str, ...]
+    similar_chords: List[SimilarChord]
+
+class VoiceLeadingRequest(BaseModel):
+    chords: List[str] = Field(min_length=1, max_length=512)
+    max_fret: int = Field(15, ge=4, le=24)
+    tuning: Optional[str] = None  # Instrument profile, standard guitar by default
+
+class VoicedChord(BaseModel):
+    chord: str
+    frets: List[Optional[int]]  # One per string from low to high, None when muted
+    positions: List[NotePosition]
+
+class VoiceLeadingResponse(BaseModel):
+    voicings: List[VoicedChord]
+    total_cost: float
+    tuning: str
+
+class TuningProfile(BaseModel):
+    name: str
+    instrument: str
+    description: str
+    strings: List[str]  # Open string notes with octave, in NotePosition.string order
+    frets: int
+
+class TuningsResponse(BaseModel):
+    tunings: List[TuningProfile]
+    default: str
+    reference_pitch: float
+
 class PlayNoteRequest(BaseModel):
     note: str
     octave: Optional[int] = 4
@@ -36,6 +127,52 @@ class PlayNoteResponse(BaseModel):
     note: str
     duration: int
 
+class NoteInfoBatchRequest(BaseModel):
+    # Either note names with octaves, or MIDI note numbers
+    notes: Optional[List[str]] = Field(None, max_length=4096)
+    # One per note, or a single octave for all, 4 by default
+    octaves: Optional[List[conint(ge=-1000, le=1000)]] = Field(None, max_length=4096)
+    midi: Optional[List[conint(ge=-10_000, le=10_000)]] = Field(None, max_length=4096)
+    cents: Optional[List[float]] = None  # One per note, or a single offset for all
+    reference_pitch: Optional[float] = Field(None, gt=0)
+
+class NoteInfoBatchResponse(BaseModel):
+    notes: List[str]
+    midi: List[int]
+    frequencies: List[float]
+    cents: List[float]
+    reference_pitch: float
+
+class ProgressionAnalysisRequest(BaseModel):
+    progression: List[Union[str, List[str]]] = Field(max_length=65536)  # Chord names or note lists
+    window: int = Field(8, ge=1)  # Chords per local key window
+
+class KeyCandidate(BaseModel):
+    key: str
+    correlation: float
+
+class ProgressionAnalysisResponse(BaseModel):
+    key: str
+    key_candidates: List[KeyCandidate]
+    pitch_class_histogram: Dict[str, int]
+    # Parallel lists with one entry per input chord
+    chords: List[Optional[str]]
+    roman_numerals: List[Optional[str]]
+    functions: List[Optional[str]]
+    local_keys: List[str]
+
+class ProfilingConfigRequest(BaseModel):
+    sample_rate: int = Field(ge=0)  # Profile 1 in N requests, 0 disables profiling
+    flush: Optional[bool] = False
+
+class ProfilingStatusResponse(BaseModel):
+    enabled: bool
+    sample_rate: int
+    output_dir: str
+    max_files: int
+    samples_taken: int
+    files_written: int
+
 class ChordModel(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -0,0 +1,192 @@
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Deque, Dict, Optional
+from starlette.routing import Match
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class SamplingProfiler:
+    """
+    Opt-in statistical profiler for live requests.
+
+    One in every `sample_rate` requests is tagged with the asyncio task that
+    serves it. A background thread periodically captures the event loop
+    thread's stack and, when the running task belongs to a tagged request,
+    counts that stack under the request's route. Stacks are written out as
+    collapsed flamegraph files named after the process, so workers can share
+    an output directory, and each process keeps at most `max_files` of its own.
+    """
+
+    def __init__(self, sample_rate: int = 0, output_dir: Path = Path("profiles"),
+                 max_files: int = 50, interval: float = 0.005, flush_interval: float = 60.0):
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir)
+        self.max_files = max_files
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.samples_taken = 0
+        self.files_written = 0
+        self._request_counter = itertools.count()
+        self._active: Dict[asyncio.Task, str] = {}
+        self._stacks: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._labels: Dict[object, str] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._control_lock = threading.Lock()
+        self._written: Deque[Path] = deque()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and next(self._request_counter) % self.sample_rate == 0
+
+    def begin(self, task: asyncio.Task, route: str) -> None:
+        self._active[task] = route
+
+    def end(self, task: asyncio.Task) -> None:
+        self._active.pop(task, None)
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start the sampler thread for the given event loop if profiling is enabled, call on the loop"""
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+        self._start_sampler()
+
+    def _start_sampler(self) -> None:
+        if not self.enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started (1 in {self.sample_rate} requests)")
+
+    def stop(self) -> None:
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def configure(self, sample_rate: int) -> None:
+        """
+        Change the sampling rate at runtime, starting or stopping the sampler.
+        Stopping joins the thread and flushes, so call it off the event loop.
+        """
+        with self._control_lock:
+            self.sample_rate = sample_rate
+            if self.enabled and self._loop is not None:
+                self._start_sampler()
+            elif not self.enabled:
+                self.stop()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _sample(self) -> None:
+        task = asyncio.current_task(self._loop)
+        route = self._active.get(task) if task is not None else None
+        if route is None:
+            return
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack = ";".join(reversed(labels))
+        with self._lock:
+            self._stacks[route][stack] += 1
+            self.samples_taken += 1
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+                if time.monotonic() >= next_flush:
+                    self.flush()
+                    next_flush = time.monotonic() + self.flush_interval
+            except Exception as e:
+                logger.error(f"Error in sampling profiler: {str(e)}")
+
+    def flush(self) -> int:
+        """Write aggregated stacks to collapsed flamegraph files, one per route"""
+        with self._lock:
+            stacks = self._stacks
+            self._stacks = defaultdict(lambda: defaultdict(int))
+        if not stacks:
+            return 0
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        pid = os.getpid()
+        written = 0
+        for route, counts in stacks.items():
+            slug = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+            path = self.output_dir / f"{slug}-{timestamp}-{pid}-{self.files_written}.collapsed"
+            with open(path, "w") as f:
+                for stack, count in counts.items():
+                    f.write(f"{stack} {count}\n")
+            self._written.append(path)
+            self.files_written += 1
+            written += 1
+        self._rotate()
+        return written
+
+    def _rotate(self) -> None:
+        # Only this process's files, other workers rotate their own
+        while len(self._written) > self.max_files:
+            self._written.popleft().unlink(missing_ok=True)
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "output_dir": str(self.output_dir),
+            "max_files": self.max_files,
+            "samples_taken": self.samples_taken,
+            "files_written": self.files_written,
+        }
+
+class ProfilingMiddleware:
+    """ASGI middleware that tags sampled requests for the SamplingProfiler"""
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    def _route_path(self, scope) -> str:
+        for route in scope["app"].routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", scope["path"])
+        return scope["path"]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_sample():
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        self.profiler.begin(task, self._route_path(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.end(task)
@@ -0,0 +1,181 @@
+from typing import Dict, List, Optional, Tuple, Union
+from chord_recognition import ChordRecognitionEngine, ChordRecord, NOTE_NAMES, PITCH_CLASSES
+from match_table import PITCH_CLASS_SETS
+import numpy as np
+
+# Krumhansl-Kessler key profiles, starting from the tonic
+MAJOR_PROFILE = (6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88)
+MINOR_PROFILE = (6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17)
+
+# Roman numeral of each chromatic scale degree, relative to the tonic
+MAJOR_DEGREES = ('I', 'bII', 'II', 'bIII', 'III', 'IV', '#IV', 'V', 'bVI', 'VI', 'bVII', 'VII')
+MINOR_DEGREES = ('I', 'bII', 'II', 'III', '#III', 'IV', '#IV', 'V', 'VI', '#VI', 'VII', '#VII')
+
+# Harmonic function of each chromatic scale degree
+MAJOR_FUNCTIONS = ('tonic', None, 'subdominant', None, 'tonic', 'subdominant', None,
+                   'dominant', None, 'tonic', None, 'dominant')
+MINOR_FUNCTIONS = ('tonic', None, 'subdominant', 'tonic', None, 'subdominant', None,
+                   'dominant', 'tonic', None, 'dominant', 'dominant')
+
+# Chord type -> (lowercase numeral, suffix)
+NUMERAL_STYLES = {
+    'Majör': (False, ''),
+    'Minör': (True, ''),
+    'Dominant 7th': (False, '7'),
+    'Major 7th': (False, 'maj7'),
+    'Minor 7th': (True, '7'),
+    'Suspended 2nd': (False, 'sus2'),
+    'Suspended 4th': (False, 'sus4'),
+    'Add 9th': (False, 'add9'),
+    'Diminished': (True, '°'),
+    'Augmented': (False, '+'),
+    'Major 6th': (False, '6'),
+    'Minor 6th': (True, '6'),
+    '9th': (False, '9'),
+    'Major 9th': (False, 'maj9'),
+    'Minor 9th': (True, '9'),
+}
+
+class ProgressionAnalyzer:
+    """
+    Key and harmonic-function analysis of chord progressions. Every chord is
+    reduced to a 12-bit pitch-class mask, so a whole progression becomes one
+    histogram matrix that is correlated against all 24 key profiles at once.
+    """
+
+    def __init__(self, chord_engine: ChordRecognitionEngine):
+        self.chord_engine = chord_engine
+        self.key_names, self.key_profiles = self._initialize_key_profiles()
+        self.key_labels = np.array([f"{NOTE_NAMES[tonic]} {mode}" for tonic, mode in self.key_names], dtype=object)
+        self._bits = np.arange(12, dtype=np.int64)
+
+    def _initialize_key_profiles(self) -> Tuple[List[Tuple[int, str]], np.ndarray]:
+        """24 z-normalized key profiles, rows are C..B major then C..B minor"""
+        keys = []
+        profiles = []
+        for mode, profile in (('major', MAJOR_PROFILE), ('minor', MINOR_PROFILE)):
+            for tonic in range(12):
+                keys.append((tonic, mode))
+                profiles.append(np.roll(profile, tonic))
+        profiles = np.array(profiles, dtype=np.float64)
+        profiles -= profiles.mean(axis=1, keepdims=True)
+        profiles /= profiles.std(axis=1, keepdims=True)
+        return keys, profiles
+
+    def parse_progression(self, progression: List[Union[str, List[str]]]
+                          ) -> Tuple[np.ndarray, List[Optional[ChordRecord]], List[str]]:
+        """
+        Convert chord names and note lists into pitch-class masks. Returns the
+        masks, the chord record of each named chord (None for note lists) and
+        a list of error messages for items that could not be parsed.
+        """
+        masks = []
+        chords: List[Optional[ChordRecord]] = []
+        errors = []
+        # Progressions repeat a handful of chord names, so resolve each name once
+        names: Dict[str, Optional[ChordRecord]] = {}
+        for index, item in enumerate(progression):
+            mask = 0
+            chord = None
+            if isinstance(item, str):
+                if item in names:
+                    chord = names[item]
+                else:
+                    chord = names[item] = self.chord_engine.find_chord(item)
+                if chord is None:
+                    errors.append(f"#{index}: unknown chord '{item}'")
+                else:
+                    mask = chord.mask
+            else:
+                for note in item:
+                    pitch_class = PITCH_CLASSES.get(self.chord_engine.normalize_note(note))
+                    if pitch_class is None:
+                        errors.append(f"#{index}: unknown note '{note}'")
+                        break
+                    mask |= 1 << pitch_class
+            masks.append(mask)
+            chords.append(chord)
+        return np.array(masks, dtype=np.int64), chords, errors
+
+    def correlate(self, histograms: np.ndarray) -> np.ndarray:
+        """Pearson correlation of each histogram row with every key profile, shape (rows, 24)"""
+        centered = histograms - histograms.mean(axis=1, keepdims=True)
+        norms = np.sqrt((centered * centered).sum(axis=1, keepdims=True))
+        # Rows with no notes, or all notes equally weighted, correlate with nothing
+        norms[norms == 0] = np.inf
+        return (centered / norms) @ self.key_profiles.T / np.sqrt(12)
+
+    def key_name(self, key_index: int) -> str:
+        return str(self.key_labels[key_index])
+
+    def roman_numeral(self, chord, key_index: int) -> Tuple[Optional[str], Optional[str]]:
+        """Roman numeral and harmonic function of a chord record in a key"""
+        tonic, mode = self.key_names[key_index]
+        if chord.root < 0:
+            return None, None
+        degree = (chord.root - tonic) % 12
+        numerals, functions = (MAJOR_DEGREES, MAJOR_FUNCTIONS) if mode == 'major' else \
+            (MINOR_DEGREES, MINOR_FUNCTIONS)
+        lowercase, suffix = NUMERAL_STYLES.get(
+            chord.quality.type, (chord.quality.category in ('minor', 'diminished'), '')
+        )
+        numeral = numerals[degree]
+        if lowercase:
+            # Keep accidentals as they are, lowercase only the numeral
+            numeral = numeral[0] + numeral[1:].lower() if numeral[0] in 'b#' else numeral.lower()
+        return numeral + suffix, functions[degree]
+
+    def analyze(self, masks: np.ndarray, chords: Optional[List[Optional[ChordRecord]]] = None,
+                window: int = 8, candidates: int = 5) -> Dict:
+        """
+        Global key, plus per-chord name, Roman numeral, function and local key
+        as parallel lists, which stay cheap to build and serialize for long
+        progressions. Named chords keep the chord record parse_progression
+        resolved, only note lists are recognized from their pitch classes.
+        """
+        # (chords, 12) matrix of pitch-class membership
+        pitch_classes = ((masks[:, None] >> self._bits) & 1).astype(np.float64)
+        histogram = pitch_classes.sum(axis=0)
+
+        global_scores = self.correlate(histogram[None, :])[0]
+        ranking = np.argsort(-global_scores, kind='stable')
+        key_index = int(ranking[0])
+
+        # Local keys from a centered sliding window of chords, via cumulative sums
+        cumulative = np.vstack([np.zeros((1, 12)), np.cumsum(pitch_classes, axis=0)])
+        positions = np.arange(len(masks))
+        start = np.clip(positions - window // 2, 0, len(masks))
+        end = np.clip(positions + (window + 1) // 2, 0, len(masks))
+        local_keys = np.argmax(self.correlate(cumulative[end] - cumulative[start]), axis=1)
+
+        # Label each distinct chord once, then expand. Named chords are keyed by chord id
+        # past the pitch-class sets, so a C6 stays a C6 even though it shares Am7's notes
+        keys = masks.copy()
+        named: Dict[int, ChordRecord] = {}
+        for index, chord in enumerate(chords or ()):
+            if chord is not None:
+                keys[index] = PITCH_CLASS_SETS + chord.id
+                named[PITCH_CLASS_SETS + chord.id] = chord
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        unique_labels = np.empty((len(unique_keys), 3), dtype=object)
+        for row, key in enumerate(unique_keys.tolist()):
+            chord = named.get(key)
+            if chord is None:
+                match = self.chord_engine.best_match_for_mask(key)
+                chord = match.record if match is not None else None
+            if chord is not None:
+                unique_labels[row] = (chord.name, *self.roman_numeral(chord, key_index))
+        labels = unique_labels[inverse].T
+
+        return {
+            'key': self.key_name(key_index),
+            'key_candidates': [
+                {'key': self.key_name(int(i)), 'correlation': round(float(global_scores[i]), 4)}
+                for i in ranking[:candidates]
+            ],
+            'pitch_class_histogram': {NOTE_NAMES[i]: int(histogram[i]) for i in range(12)},
+            'chords': labels[0].tolist(),
+            'roman_numerals': labels[1].tolist(),
+            'functions': labels[2].tolist(),
+            'local_keys': self.key_labels[local_keys].tolist(),
+        }
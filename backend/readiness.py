@@ -0,0 +1,133 @@
+from time import perf_counter, time
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, TypeVar
+import asyncio
+import json
+import logging
+import threading
+
+from anyio import to_thread
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+MAX_ERROR_LENGTH = 200
+
+class LazyComponent(Generic[T]):
+    """
+    A service component built on first use, exactly once even when a request
+    and the background warm-up race for it, with its build time recorded
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self.build_seconds: Optional[float] = None
+        # Why the last build failed, cleared once a build succeeds
+        self.build_error: Optional[str] = None
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    def get(self) -> T:
+        value = self._value
+        if value is not None:
+            return value
+        with self._lock:
+            if self._value is None:
+                started = perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    self.build_error = (str(e) or type(e).__name__)[:MAX_ERROR_LENGTH]
+                    raise
+                self.build_seconds = perf_counter() - started
+                self.build_error = None
+                logger.info(f"Built {self.name} in {self.build_seconds * 1000:.1f}ms")
+            return self._value
+
+    async def get_async(self) -> T:
+        """get() for the event loop, waits for a build on a worker thread instead of blocking the loop"""
+        value = self._value
+        if value is not None:
+            return value
+        return await to_thread.run_sync(self.get)
+
+class ReadinessMonitor:
+    """
+    Readiness of the service, refreshed in the background. The database is
+    pinged every interval and the outcome is cached together with the state
+    of the lazy components, so probes only return pre-encoded bytes.
+    """
+
+    def __init__(self, ping: Callable[[], Awaitable], components: List[LazyComponent],
+                 interval: float = 10.0, timeout: float = 2.0, require_components: bool = True):
+        self.ping = ping
+        self.components = components
+        # Without a warm-up, components are only built by the requests that need them
+        self.require_components = require_components
+        self.interval = interval
+        self.timeout = timeout
+        self.database_ok = False
+        self.database_error: Optional[str] = None
+        self.ping_seconds: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.startup_seconds: Optional[float] = None
+        self.ready = False
+        self.body = b''
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-encode the cached state, call whenever an input to it changes"""
+        self.ready = self.database_ok and (
+            not self.require_components or all(component.ready for component in self.components)
+        )
+        # Liveness keeps the old health check's keys and "healthy" status, readiness has its own key
+        state: Dict[str, object] = {"status": "healthy", "ready": self.ready}
+        for component in self.components:
+            if component.ready:
+                state[component.name] = "initialized"
+            elif component.build_error:
+                state[component.name] = "failed"
+                state[f"{component.name}_error"] = component.build_error
+            else:
+                state[component.name] = "pending"
+        state["database"] = "connected" if self.database_ok else "disconnected"
+        state["database_checked_at"] = self.checked_at
+        if self.ping_seconds is not None:
+            state["database_ping_ms"] = round(self.ping_seconds * 1000, 3)
+        if self.database_error:
+            state["database_error"] = self.database_error
+        state["startup_seconds"] = self.startup_seconds
+        self.body = json.dumps(state, separators=(',', ':')).encode()
+
+    async def check(self) -> None:
+        started = perf_counter()
+        try:
+            await asyncio.wait_for(self.ping(), timeout=self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Server selection errors describe the whole topology, keep the start
+            error = (str(e) or type(e).__name__)[:MAX_ERROR_LENGTH]
+            if self.database_ok or self.checked_at is None:
+                logger.warning(f"Database ping failed: {error}")
+            self.database_ok = False
+            self.database_error = error
+            self.ping_seconds = None
+        else:
+            if not self.database_ok and self.checked_at is not None:
+                logger.info("Database reachable again")
+            self.database_ok = True
+            self.database_error = None
+            self.ping_seconds = perf_counter() - started
+        self.checked_at = time()
+        self.refresh()
+
+    async def run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,113 @@
+from typing import List, NamedTuple, Tuple
+from chord_recognition import ChordRecognitionEngine, NOTE_NAMES, PITCH_CLASSES, POPCOUNT
+from models import RecognizedScale
+import numpy as np
+
+class ScaleTemplate(NamedTuple):
+    name: str
+    category: str
+    intervals: Tuple[int, ...]  # Semitones above the root
+
+# Ordered from most to least common, the order breaks ranking ties
+SCALE_TEMPLATES = (
+    ScaleTemplate('Major (Ionian)', 'major_mode', (0, 2, 4, 5, 7, 9, 11)),
+    ScaleTemplate('Natural Minor (Aeolian)', 'major_mode', (0, 2, 3, 5, 7, 8, 10)),
+    ScaleTemplate('Major Pentatonic', 'pentatonic', (0, 2, 4, 7, 9)),
+    ScaleTemplate('Minor Pentatonic', 'pentatonic', (0, 3, 5, 7, 10)),
+    ScaleTemplate('Blues', 'blues', (0, 3, 5, 6, 7, 10)),
+    ScaleTemplate('Major Blues', 'blues', (0, 2, 3, 4, 7, 9)),
+    ScaleTemplate('Dorian', 'major_mode', (0, 2, 3, 5, 7, 9, 10)),
+    ScaleTemplate('Mixolydian', 'major_mode', (0, 2, 4, 5, 7, 9, 10)),
+    ScaleTemplate('Harmonic Minor', 'minor', (0, 2, 3, 5, 7, 8, 11)),
+    ScaleTemplate('Melodic Minor', 'minor', (0, 2, 3, 5, 7, 9, 11)),
+    ScaleTemplate('Phrygian', 'major_mode', (0, 1, 3, 5, 7, 8, 10)),
+    ScaleTemplate('Lydian', 'major_mode', (0, 2, 4, 6, 7, 9, 11)),
+    ScaleTemplate('Locrian', 'major_mode', (0, 1, 3, 5, 6, 8, 10)),
+    ScaleTemplate('Whole Tone', 'symmetric', (0, 2, 4, 6, 8, 10)),
+    ScaleTemplate('Diminished (Half-Whole)', 'symmetric', (0, 1, 3, 4, 6, 7, 9, 10)),
+    ScaleTemplate('Diminished (Whole-Half)', 'symmetric', (0, 2, 3, 5, 6, 8, 9, 11)),
+    ScaleTemplate('Augmented', 'symmetric', (0, 3, 4, 7, 8, 11)),
+)
+
+class ScaleRecognitionEngine:
+    """
+    Recognize scales and modes from a set of notes. Every rotation of every
+    template is precomputed as a 12-bit pitch-class mask, so recognition is
+    a handful of vectorized AND/popcount operations over those masks.
+    """
+
+    MAX_OUTSIDE_NOTES = 1  # Input notes allowed outside a candidate scale
+    OUTSIDE_NOTE_PENALTY = 15
+    ROOT_HINT_BONUS = 5  # When the first input note is the scale root
+
+    def __init__(self, chord_engine: ChordRecognitionEngine):
+        self.chord_engine = chord_engine
+        self.templates = SCALE_TEMPLATES
+        self.masks, self.roots, self.template_ids = self._initialize_rotations()
+        self.sizes = np.array([len(self.templates[t].intervals) for t in self.template_ids], dtype=np.int64)
+
+    def _initialize_rotations(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        masks, roots, template_ids = [], [], []
+        for template_id, template in enumerate(self.templates):
+            for root in range(12):
+                masks.append(sum(1 << ((root + interval) % 12) for interval in template.intervals))
+                roots.append(root)
+                template_ids.append(template_id)
+        return (np.array(masks, dtype=np.int64), np.array(roots, dtype=np.int64),
+                np.array(template_ids, dtype=np.int64))
+
+    def recognize_scales(self, input_notes: List[str], limit: int = 10) -> List[RecognizedScale]:
+        """Main scale recognition function"""
+        unique_notes = self.chord_engine.normalize_notes(input_notes)
+        if len(unique_notes) < 3:
+            return []
+
+        # Unknown note names can never be in a scale, so they count as outside notes
+        input_mask = self.chord_engine.pitch_class_mask(unique_notes)
+        input_size = len(unique_notes)
+        root_hint = PITCH_CLASSES.get(unique_notes[0], -1)
+
+        matching = POPCOUNT[input_mask & self.masks]
+        outside = input_size - matching
+        candidates = np.flatnonzero(outside <= self.MAX_OUTSIDE_NOTES)
+        if len(candidates) == 0:
+            return []
+
+        sizes = self.sizes[candidates]
+        confidence = matching[candidates] * 100 // sizes - outside[candidates] * self.OUTSIDE_NOTE_PENALTY
+        has_root_hint = self.roots[candidates] == root_hint
+        score = confidence + has_root_hint * self.ROOT_HINT_BONUS
+
+        # Scales containing every input note first, then the highest score,
+        # then the more common template, then the lowest root
+        order = candidates[np.lexsort((self.roots[candidates], self.template_ids[candidates], -score,
+                                       outside[candidates]))]
+
+        results = []
+        seen = set()
+        for index in order.tolist():
+            mask = int(self.masks[index])
+            template_id = int(self.template_ids[index])
+            # Symmetric scales repeat under rotation, report each distinct set once
+            if (template_id, mask) in seen:
+                continue
+            seen.add((template_id, mask))
+
+            template = self.templates[template_id]
+            root = int(self.roots[index])
+            matched = int(matching[index])
+            results.append(RecognizedScale(
+                name=f"{NOTE_NAMES[root]} {template.name}",
+                root=NOTE_NAMES[root],
+                scale_type=template.name,
+                category=template.category,
+                confidence=max(0, min(100, int(matched * 100 // len(template.intervals)
+                                               - (input_size - matched) * self.OUTSIDE_NOTE_PENALTY))),
+                notes=[NOTE_NAMES[(root + interval) % 12] for interval in template.intervals],
+                is_exact_match=mask == input_mask and matched == input_size,
+                missing_notes=len(template.intervals) - matched
+            ))
+            if len(results) >= limit:
+                break
+
+        return results
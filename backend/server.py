@@ -1,28 +1,207 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+# Startup is timed from the first import, framework imports included
+from time import perf_counter
+IMPORT_STARTED = perf_counter()
+
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Header, Query
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
+import codecs
+import json
 import logging
 from pathlib import Path
+from typing import List, Optional
+from anyio import to_thread
+from pydantic import BaseModel, ValidationError
 from models import (
     ChordRecognitionRequest, ChordRecognitionResponse, 
-    PlayNoteRequest, PlayNoteResponse
+    BatchRecognitionRequest, BatchRecognitionResponse, ChordRow,
+    PlayNoteRequest, PlayNoteResponse,
+    NoteInfoBatchRequest, NoteInfoBatchResponse,
+    ProgressionAnalysisRequest, ProgressionAnalysisResponse,
+    ScaleRecognitionRequest, ScaleRecognitionResponse,
+    SimilarChordsResponse,
+    VoiceLeadingRequest, VoiceLeadingResponse,
+    TuningsResponse,
+    ProfilingConfigRequest, ProfilingStatusResponse
 )
-from chord_recognition import ChordRecognitionEngine
+from chord_recognition import ChordRecognitionEngine, NOTE_NAMES, PITCH_CLASSES
 from midi_service import MIDIService
+from progression_analysis import ProgressionAnalyzer
+from scale_recognition import ScaleRecognitionEngine
+from chord_similarity import ChordSimilarityIndex
+from voice_leading import VoiceLeadingPlanner, MUTED
+from instruments import InstrumentRegistry, FretboardTable, DEFAULT_TUNING
+from tab_analysis import TabAnalyzer
+from profiling import SamplingProfiler, ProfilingMiddleware
+from admission import AdmissionController, AdmissionMiddleware, parse_limit
+from readiness import LazyComponent, ReadinessMonitor
+import metrics
+import msgpack
+import numpy as np
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection, the client connects in the background and pings are bounded by the probe timeout
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+mongo_ping_timeout = float(os.environ.get('MONGO_PING_TIMEOUT_SECONDS', '2'))
+client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=int(mongo_ping_timeout * 1000))
 db = client[os.environ['DB_NAME']]
 
-# Initialize services
-chord_engine = ChordRecognitionEngine()
-midi_service = MIDIService()
+def build_chord_engine() -> ChordRecognitionEngine:
+    engine = ChordRecognitionEngine()
+    # Workers share one memory-mapped copy of the precomputed match table
+    engine.use_match_table(
+        Path(os.environ.get('CHORD_TABLE_PATH', ROOT_DIR / 'chord_table.bin')),
+        check_interval=float(os.environ.get('CHORD_TABLE_CHECK_SECONDS', '5')),
+        # "file" serves a table built from another vocabulary instead of rebuilding it
+        trust_file_vocabulary=os.environ.get('CHORD_TABLE_VOCABULARY', 'builtin') == 'file',
+    )
+    return engine
+
+# Services are built on first use, or by the warm-up task right after startup
+# Concert pitch of A4, shared by the MIDI frequency table and every fretboard table
+reference_pitch = float(os.environ.get('REFERENCE_PITCH', '440'))
+instruments = InstrumentRegistry(reference_pitch)
+chord_engine = LazyComponent("chord_engine", build_chord_engine)
+midi_service = LazyComponent("midi_service", lambda: MIDIService(reference_pitch))
+progression_analyzer = LazyComponent("progression_analyzer", lambda: ProgressionAnalyzer(chord_engine.get()))
+scale_engine = LazyComponent("scale_engine", lambda: ScaleRecognitionEngine(chord_engine.get()))
+similarity_index = LazyComponent("similarity_index", lambda: ChordSimilarityIndex(chord_engine.get()))
+voice_leading_planner = LazyComponent("voice_leading_planner", lambda: VoiceLeadingPlanner(chord_engine.get()))
+tab_analyzer = LazyComponent("tab_analyzer", lambda: TabAnalyzer(chord_engine.get()))
+# Warm-up order, the chord engine first since everything else is built on it
+components = [chord_engine, midi_service, tab_analyzer, voice_leading_planner,
+              scale_engine, progression_analyzer, similarity_index]
+
+# Build every component in the background right after startup, 0 leaves them to first use
+warm_up_enabled = os.environ.get('WARM_UP', '1') != '0'
+readiness = ReadinessMonitor(
+    lambda: client.admin.command('ping'),
+    components,
+    interval=float(os.environ.get('MONGO_PING_SECONDS', '10')),
+    timeout=mongo_ping_timeout,
+    require_components=warm_up_enabled,
+)
+# Log a warning when import to first request takes longer than this
+startup_budget = float(os.environ.get('STARTUP_BUDGET_SECONDS', '2'))
+
+# Opt-in sampling profiler, off unless PROFILE_SAMPLE_RATE > 0
+profiler = SamplingProfiler(
+    sample_rate=int(os.environ.get('PROFILE_SAMPLE_RATE', '0')),
+    output_dir=Path(os.environ.get('PROFILE_DIR', ROOT_DIR / 'profiles')),
+    max_files=int(os.environ.get('PROFILE_MAX_FILES', '50')),
+    interval=float(os.environ.get('PROFILE_INTERVAL_MS', '5')) / 1000,
+    flush_interval=float(os.environ.get('PROFILE_FLUSH_SECONDS', '60')),
+)
+admin_token = os.environ.get('ADMIN_TOKEN')
+
+# Metrics
+metrics_registry = metrics.MetricsRegistry()
+recognition_stage_seconds = metrics_registry.histogram(
+    "chord_recognition_stage_seconds",
+    "Time spent in each stage of /api/recognize-chord",
+    label_name="stage",
+    label_values=("validation", "normalization", "table_lookup", "scoring", "sorting", "serialization"),
+)
+# Hold direct references so the hot path never looks up labels
+VALIDATION_SECONDS = recognition_stage_seconds.labels(stage="validation")
+NORMALIZATION_SECONDS = recognition_stage_seconds.labels(stage="normalization")
+TABLE_LOOKUP_SECONDS = recognition_stage_seconds.labels(stage="table_lookup")
+SCORING_SECONDS = recognition_stage_seconds.labels(stage="scoring")
+SORTING_SECONDS = recognition_stage_seconds.labels(stage="sorting")
+SERIALIZATION_SECONDS = recognition_stage_seconds.labels(stage="serialization")
+PLAY_NOTE_SECONDS = metrics_registry.histogram(
+    "play_note_seconds", "Time spent serving /api/play-note"
+).labels()
+EVENT_LOOP_LAG_SECONDS = metrics_registry.histogram(
+    "event_loop_lag_seconds", "Delay between scheduled and actual event loop wake-ups"
+).labels()
+EVENT_LOOP_LAG_LAST = metrics_registry.gauge(
+    "event_loop_lag_last_seconds", "Most recently measured event loop lag"
+).labels()
+# Scrapes report components that are not built yet as 0 instead of building them
+metrics_registry.gauge_callback(
+    "chord_database_size", "Number of chords in the recognition database",
+    lambda: len(chord_engine.get().chord_database) if chord_engine.ready else 0,
+)
+metrics_registry.gauge_callback(
+    "note_frequency_table_size", "Number of entries in the MIDI frequency table",
+    lambda: len(midi_service.get().note_frequencies) if midi_service.ready else 0,
+)
+metrics_registry.gauge_callback(
+    "tab_chord_cache_hits", "Tab slices answered from the per pitch-class set chord cache",
+    lambda: tab_analyzer.get().cache_hits if tab_analyzer.ready else 0,
+)
+metrics_registry.gauge_callback(
+    "tab_chord_cache_misses", "Tab slices whose pitch-class set had to be recognized",
+    lambda: tab_analyzer.get().cache_misses if tab_analyzer.ready else 0,
+)
+metrics_registry.gauge_callback(
+    "tab_chord_cache_size", "Pitch-class sets in the tab chord cache",
+    lambda: tab_analyzer.get().cache_size() if tab_analyzer.ready else 0,
+)
+STARTUP_SECONDS = metrics_registry.gauge(
+    "startup_seconds", "Time from importing the server to serving, framework imports included"
+).labels()
+component_build_seconds = metrics_registry.gauge(
+    "component_build_seconds", "Time spent building each lazily initialized component",
+    label_name="component", label_values=tuple(component.name for component in components),
+)
+for component in components:
+    component_build_seconds.labels(component=component.name).callback = \
+        lambda component=component: component.build_seconds or 0
+metrics_registry.gauge_callback(
+    "database_up", "1 when the last database ping succeeded",
+    lambda: int(readiness.database_ok),
+)
+metrics_registry.gauge_callback(
+    "database_ping_seconds", "Round trip of the last successful database ping",
+    lambda: readiness.ping_seconds or 0,
+)
+metrics_registry.gauge_callback(
+    "fretboard_tables_cached", "Number of instrument fretboard tables built so far",
+    instruments.cached_tables,
+)
+metrics_registry.gauge_callback(
+    "executor_threads_total", "Worker thread limit of the default thread pool executor",
+    lambda: to_thread.current_default_thread_limiter().total_tokens,
+)
+metrics_registry.gauge_callback(
+    "executor_threads_busy", "Worker threads currently borrowed from the default executor",
+    lambda: to_thread.current_default_thread_limiter().borrowed_tokens,
+)
+metrics_registry.gauge_callback(
+    "executor_tasks_waiting", "Tasks waiting for a worker thread of the default executor",
+    lambda: to_thread.current_default_thread_limiter().statistics().tasks_waiting,
+)
+
+# Admission control: "concurrency:queue_size:max_wait_ms" per route, overridable
+# with ADMISSION_<ROUTE>, e.g. ADMISSION_RECOGNIZE_CHORD=32:256:200. A route's
+# limit also covers the paths below it, /api/note-info covers /api/note-info/A4
+ADMISSION_DEFAULTS = {
+    "/api/recognize-chord": "32:256:200",
+    "/api/recognize-chords": "4:16:1000",
+    "/api/recognize-scale": "32:128:250",
+    "/api/note-info": "16:64:500",
+    "/api/play-note": "128:256:500",
+    "/api/voice-leading": "8:32:1000",
+    "/api/analyze-progression": "8:32:1000",
+    "/api/analyze-tab": "4:8:2000",
+}
+admission = AdmissionController(
+    {
+        route: parse_limit(os.environ.get(f"ADMISSION_{route[len('/api/'):].upper().replace('-', '_')}", spec))
+        for route, spec in ADMISSION_DEFAULTS.items()
+    } if os.environ.get('ADMISSION_ENABLED', '1') != '0' else {},
+    metrics_registry,
+)
 
 # Create the main app without a prefix
 app = FastAPI(title="Guitar Fretboard Chord Recognition API")
@@ -30,43 +209,394 @@ app = FastAPI(title="Guitar Fretboard Chord Recognition API")
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+def model_fields(obj):
+    # Pack models straight from their field values instead of copying them with model_dump
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+def render(model: BaseModel, accept: Optional[str]) -> Response:
+    """Serialize a response model as MessagePack when the client accepts it, JSON otherwise"""
+    if accept and any(media_type in accept for media_type in MSGPACK_TYPES):
+        return Response(content=msgpack.packb(model, default=model_fields), media_type="application/msgpack")
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+def pitch_class_mask(pitch_classes: List[int]) -> int:
+    mask = 0
+    for pitch_class in pitch_classes:
+        if not 0 <= pitch_class < 12:
+            raise HTTPException(status_code=400, detail=f"Pitch classes must be 0-11, got {pitch_class}")
+        mask |= 1 << pitch_class
+    return mask
+
+def check_weights(weights: List[float], count: int) -> None:
+    if len(weights) != count:
+        raise HTTPException(status_code=400, detail=f"Expected {count} weights, got {len(weights)}")
+    if not all(0 <= weight < float('inf') for weight in weights):
+        raise HTTPException(status_code=400, detail="Weights must be finite and non-negative")
+
+# Encoded client index and its ETag, rebuilt when the vocabulary version changes
+chord_index_cache = {'version': None, 'etag': None, 'body': None}
+CHORD_INDEX_CACHE_CONTROL = "public, max-age=86400, stale-while-revalidate=604800"
+
+def fretboard_table(tuning: Optional[str]) -> FretboardTable:
+    table = instruments.table(tuning)
+    if table is None:
+        raise HTTPException(status_code=400, detail=f"Unknown tuning: {tuning}")
+    return table
+
 # Health check endpoint
 @api_router.get("/")
 async def root():
     return {"message": "Guitar Fretboard Chord Recognition API is running"}
 
-@api_router.post("/recognize-chord", response_model=ChordRecognitionResponse)
-async def recognize_chord(request: ChordRecognitionRequest):
+# The body is parsed in the handler so the validation stage can time it, so its schema is
+# declared by hand. NotePosition is already a component through VoicedChord
+CHORD_RECOGNITION_REQUEST_SCHEMA = {
+    key: value for key, value in
+    ChordRecognitionRequest.model_json_schema(ref_template="#/components/schemas/{model}").items()
+    if key != "$defs"
+}
+
+@api_router.post("/recognize-chord", response_model=ChordRecognitionResponse, openapi_extra={
+    "requestBody": {"content": {"application/json": {"schema": CHORD_RECOGNITION_REQUEST_SCHEMA}}, "required": True},
+})
+async def recognize_chord(http_request: Request, accept: Optional[str] = Header(None)):
     """
     Recognize chords from the given notes
     """
+    engine = await chord_engine.get_async()
+    body = await http_request.body()
+    
+    # Validation covers parsing the body and resolving masks, pitch classes and positions to notes
+    started = perf_counter()
+    try:
+        request = ChordRecognitionRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, 'loc': ('body', *error['loc'])} for error in e.errors(include_url=False)],
+                                     body=body)
+    # Like the batch endpoint, one input form per request. Positions without a tuning only annotate the notes
+    forms = (request.mask is not None, request.pitch_classes is not None, request.tuning is not None, bool(request.notes))
+    if sum(forms) > 1:
+        raise HTTPException(status_code=400,
+                            detail="Provide exactly one of mask, pitch_classes, tuning with selected_positions or notes")
+    if request.mask is not None:
+        request.notes = engine.notes_for_mask(request.mask)
+    elif request.pitch_classes is not None:
+        pitch_class_mask(request.pitch_classes)
+        request.notes = [NOTE_NAMES[pitch_class] for pitch_class in request.pitch_classes]
+    elif request.tuning is not None:
+        # The fretboard table is the source of truth for what the positions sound
+        table = fretboard_table(request.tuning)
+        notes = table.notes([(position.string, position.fret) for position in request.selected_positions or []])
+        if notes is None:
+            raise HTTPException(status_code=400, detail=f"Positions outside the {table.profile.name} fretboard")
+        request.notes = notes
+    if request.weights is not None:
+        if request.mask is not None:
+            raise HTTPException(status_code=400, detail="Weights need notes, pitch classes or positions, not a mask")
+        check_weights(request.weights, len(request.notes))
+    if not request.notes or len(request.notes) < 2:
+        raise HTTPException(status_code=400, detail="At least 2 notes are required for chord recognition")
+    
     try:
-        if not request.notes or len(request.notes) < 2:
-            raise HTTPException(status_code=400, detail="At least 2 notes are required for chord recognition")
-        
         # Get unique notes
         unique_notes = list(dict.fromkeys(request.notes))
+        validated = perf_counter()
+        VALIDATION_SECONDS.observe(validated - started)
         
-        # Recognize chords using the chord engine
-        recognized_chords = chord_engine.recognize_chords(request.notes)
+        # Recognize chords using the chord engine, timing each stage
+        normalized_notes = engine.normalize_notes(request.notes)
+        normalized = perf_counter()
+        NORMALIZATION_SECONDS.observe(normalized - validated)
         
-        return ChordRecognitionResponse(
+        # Weighted scores depend on more than the pitch-class set, so there is no table to look up
+        weighted = request.weights is not None
+        recognized_chords = None if weighted else engine.lookup_chords(normalized_notes)
+        ranked = perf_counter()
+        if recognized_chords is not None:
+            TABLE_LOOKUP_SECONDS.observe(ranked - normalized)
+        elif weighted:
+            recognized_chords = engine.recognize_weighted_notes(request.notes, request.weights)
+            ranked = perf_counter()
+            SCORING_SECONDS.observe(ranked - normalized)
+        else:
+            # No match table, or a note the table cannot represent
+            matches = engine.score_chords(normalized_notes)
+            scored = perf_counter()
+            SCORING_SECONDS.observe(scored - normalized)
+            
+            recognized_chords = engine.rank_chords(matches, normalized_notes)
+            ranked = perf_counter()
+            SORTING_SECONDS.observe(ranked - scored)
+        
+        response = ChordRecognitionResponse(
             recognized_chords=recognized_chords,
             unique_notes=unique_notes,
             total_notes=len(request.notes)
         )
+        encoded = render(response, accept)
+        SERIALIZATION_SECONDS.observe(perf_counter() - ranked)
+        
+        return encoded
         
     except Exception as e:
         logging.error(f"Error in chord recognition: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@api_router.post("/recognize-chords", response_model=BatchRecognitionResponse)
+async def recognize_chords_batch(request: BatchRecognitionRequest, accept: Optional[str] = Header(None)):
+    """
+    Recognize chords for many note sets at once, answers reference chords by id
+    """
+    engine = await chord_engine.get_async()
+    inputs = [items for items in (request.masks, request.pitch_classes, request.notes) if items is not None]
+    if len(inputs) != 1:
+        raise HTTPException(status_code=400, detail="Provide exactly one of masks, pitch_classes or notes")
+    
+    # Items with unknown note names cannot be reduced to a mask and are scored on their own
+    unresolved = {}
+    if request.weights is not None:
+        items = request.notes if request.notes is not None else request.pitch_classes
+        if items is None:
+            raise HTTPException(status_code=400, detail="Weights need notes or pitch_classes items, not masks")
+        if len(request.weights) != len(items):
+            raise HTTPException(status_code=400, detail=f"Expected {len(items)} weight lists, got {len(request.weights)}")
+        for item, weights in zip(items, request.weights):
+            check_weights(weights, len(item))
+        if request.pitch_classes is not None:
+            for item in items:
+                pitch_class_mask(item)
+            items = [[NOTE_NAMES[pitch_class] for pitch_class in item] for item in items]
+        salience, unknown = engine.salience_matrix(items, request.weights)
+    elif request.masks is not None:
+        masks = np.array(request.masks, dtype=np.int64)
+        if ((masks < 0) | (masks >= 4096)).any():
+            raise HTTPException(status_code=400, detail="Masks must be 12-bit pitch-class sets (0-4095)")
+    elif request.pitch_classes is not None:
+        masks = np.array([pitch_class_mask(item) for item in request.pitch_classes], dtype=np.int64)
+    else:
+        masks = np.zeros(len(request.notes), dtype=np.int64)
+        for index, item in enumerate(request.notes):
+            unique_notes = engine.normalize_notes(item)
+            if all(note in PITCH_CLASSES for note in unique_notes):
+                masks[index] = engine.pitch_class_mask(unique_notes)
+            elif len(item) >= 2:
+                unresolved[index] = engine.rank_matches(engine.score_chords(unique_notes), unique_notes)
+    
+    try:
+        if request.weights is not None:
+            chord_ids, confidences, exact = engine.recognize_weighted(salience, unknown)
+        else:
+            chord_ids, confidences, exact = engine.recognize_masks(masks)
+        for index, matches in unresolved.items():
+            chord_ids[index] = -1
+            confidences[index] = 0
+            exact[index] = False
+            for slot, match in enumerate(matches):
+                chord_ids[index, slot] = match.record.id
+                confidences[index, slot] = match.confidence
+                exact[index, slot] = match.is_exact_match
+        
+        chords = engine.chord_database
+        response = BatchRecognitionResponse.model_construct(
+            vocabulary_version=engine.vocabulary_version,
+            chord_ids=chord_ids.tolist(),
+            confidences=confidences.tolist(),
+            exact=exact.tolist(),
+            chords=[
+                ChordRow(id=chord_id, name=chords[chord_id].name, type=chords[chord_id].quality.type,
+                         notes=chords[chord_id].notes)
+                for chord_id in np.unique(chord_ids[chord_ids >= 0]).tolist()
+            ]
+        )
+        return render(response, accept)
+        
+    except Exception as e:
+        logging.error(f"Error in batch chord recognition: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@api_router.get("/chord-index")
+async def get_chord_index(if_none_match: Optional[str] = Header(None)):
+    """
+    Compiled chord vocabulary for recognizing chords on the client
+    """
+    engine = await chord_engine.get_async()
+    engine.check_match_table()
+    if chord_index_cache['version'] != engine.vocabulary_version:
+        index = engine.client_index()
+        chord_index_cache['body'] = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        chord_index_cache['etag'] = f'"{index["version"]}-{index["format"]}"'
+        chord_index_cache['version'] = engine.vocabulary_version
+    
+    headers = {'ETag': chord_index_cache['etag'], 'Cache-Control': CHORD_INDEX_CACHE_CONTROL}
+    if if_none_match and chord_index_cache['etag'] in (tag.strip() for tag in if_none_match.split(',')):
+        return Response(status_code=304, headers=headers)
+    return Response(content=chord_index_cache['body'], media_type="application/json", headers=headers)
+
+@api_router.post("/recognize-scale", response_model=ScaleRecognitionResponse)
+async def recognize_scale(request: ScaleRecognitionRequest):
+    """
+    Recognize scales and modes from the given notes
+    """
+    engine = await scale_engine.get_async()
+    if not request.notes or len(request.notes) < 3:
+        raise HTTPException(status_code=400, detail="At least 3 notes are required for scale recognition")
+    
+    try:
+        recognized_scales = engine.recognize_scales(request.notes, limit=request.limit)
+        
+        return ScaleRecognitionResponse(
+            recognized_scales=recognized_scales,
+            unique_notes=list(dict.fromkeys(request.notes)),
+            total_notes=len(request.notes)
+        )
+        
+    except Exception as e:
+        logging.error(f"Error in scale recognition: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error recognizing scale: {str(e)}")
+
+@api_router.get("/chords/{name}/similar", response_model=SimilarChordsResponse)
+async def get_similar_chords(name: str, limit: int = Query(10, ge=1, le=16)):
+    """
+    Suggest similar chords and functional substitutions for a chord
+    """
+    index = await similarity_index.get_async()
+    try:
+        result = index.similar_chords(name, limit=limit)
+        if result is None:
+            raise HTTPException(status_code=404, detail=f"Chord {name} not found")
+        chord, similar = result
+        return SimilarChordsResponse(name=chord.name, notes=chord.notes, similar_chords=similar)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error finding similar chords: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error finding similar chords: {str(e)}")
+
+@api_router.post("/voice-leading", response_model=VoiceLeadingResponse)
+async def plan_voice_leading(request: VoiceLeadingRequest):
+    """
+    Suggest a fingering for each chord that minimizes hand movement through the progression
+    """
+    engine = await chord_engine.get_async()
+    planner = await voice_leading_planner.get_async()
+    table = fretboard_table(request.tuning)
+    max_fret = min(request.max_fret, table.frets)
+    chords = [engine.find_chord(name) for name in request.chords]
+    unknown = [name for name, chord in zip(request.chords, chords) if chord is None]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown chords: {', '.join(unknown[:10])}")
+    
+    try:
+        # Voicings of a chord not seen before on a tuning take seconds to enumerate, keep them off the loop
+        unplayable = await to_thread.run_sync(planner.unplayable, chords, table.open_strings, max_fret, table.frets)
+        if unplayable:
+            raise HTTPException(status_code=400, detail=f"No playable voicing for: {', '.join(unplayable[:10])}")
+        
+        voicings, total_cost = await to_thread.run_sync(planner.plan, chords, table.open_strings, max_fret,
+                                                        table.frets)
+        return VoiceLeadingResponse(
+            voicings=[
+                {
+                    'chord': chord.name,
+                    'frets': [None if fret == MUTED else int(fret) for fret in frets],
+                    'positions': planner.positions(frets, table.open_strings),
+                }
+                for chord, frets in zip(chords, voicings)
+            ],
+            total_cost=round(total_cost, 2),
+            tuning=table.profile.name
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error planning voice leading: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error planning voice leading: {str(e)}")
+
+# Longer lines cannot be tab staves, they are cut so a body without newlines stays bounded
+MAX_TAB_LINE_LENGTH = 65536
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response whose body is produced while the request body is
+    still being read. StreamingResponse listens for disconnects by calling
+    receive concurrently, which would steal request body messages, so here
+    the reader alone receives and a disconnect surfaces as ClientDisconnect.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except ClientDisconnect:
+            return
+        if self.background is not None:
+            await self.background()
+
+@api_router.post("/analyze-tab")
+async def analyze_tab(request: Request, tuning: Optional[str] = Query(None)):
+    """
+    Chord timeline of ASCII tablature sent as the request body, streamed back
+    as NDJSON while the body is still being read
+    """
+    analyzer = await tab_analyzer.get_async()
+    session = analyzer.session(fretboard_table(tuning))
+    
+    async def timeline():
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ''
+        async for chunk in request.stream():
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split('\n')
+            if len(pending) > MAX_TAB_LINE_LENGTH:
+                lines.append(pending)
+                pending = ''
+            records = [record for line in lines for record in session.feed(line)]
+            if records:
+                yield '\n'.join(records) + '\n'
+        
+        pending += decoder.decode(b'', final=True)
+        records = session.feed(pending) + session.finish()
+        yield '\n'.join(records) + '\n'
+    
+    return DuplexStreamingResponse(timeline(), media_type="application/x-ndjson")
+
+@api_router.post("/analyze-progression", response_model=ProgressionAnalysisResponse)
+async def analyze_progression(request: ProgressionAnalysisRequest):
+    """
+    Detect the key of a chord progression and label each chord with its Roman numeral
+    """
+    analyzer = await progression_analyzer.get_async()
+    if not request.progression:
+        raise HTTPException(status_code=400, detail="At least 1 chord is required for progression analysis")
+    
+    masks, chords, errors = analyzer.parse_progression(request.progression)
+    if errors:
+        raise HTTPException(status_code=400, detail=f"Invalid progression: {'; '.join(errors[:10])}")
+    
+    try:
+        analysis = analyzer.analyze(masks, chords, window=request.window)
+        body = ProgressionAnalysisResponse(**analysis).model_dump_json()
+        return Response(content=body, media_type="application/json")
+        
+    except Exception as e:
+        logging.error(f"Error in progression analysis: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error analyzing progression: {str(e)}")
+
 @api_router.post("/play-note", response_model=PlayNoteResponse)
 async def play_note(request: PlayNoteRequest):
     """
     Play a MIDI note (simulation)
     """
+    service = await midi_service.get_async()
     try:
-        response = await midi_service.play_note(request)
+        started = perf_counter()
+        response = await service.play_note(request)
+        PLAY_NOTE_SECONDS.observe(perf_counter() - started)
         return response
         
     except Exception as e:
@@ -78,8 +608,9 @@ async def get_note_info(note: str, octave: int = 4):
     """
     Get information about a specific note
     """
+    service = await midi_service.get_async()
     try:
-        info = midi_service.get_note_info(note, octave)
+        info = service.get_note_info(note, octave)
         if not info['available']:
             raise HTTPException(status_code=404, detail=f"Note {note}{octave} not found")
         return info
@@ -90,19 +621,113 @@ async def get_note_info(note: str, octave: int = 4):
         logging.error(f"Error getting note info: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting note info: {str(e)}")
 
+def broadcast(values: Optional[list], count: int, default, name: str) -> np.ndarray:
+    """One value per note from a full list, a single value, or nothing"""
+    if not values:
+        return np.full(count, default)
+    if len(values) == 1:
+        return np.full(count, values[0])
+    if len(values) != count:
+        raise HTTPException(status_code=400, detail=f"Expected 1 or {count} {name}, got {len(values)}")
+    return np.array(values)
+
+@api_router.post("/note-info", response_model=NoteInfoBatchResponse)
+async def get_note_info_batch(request: NoteInfoBatchRequest):
+    """
+    Get information about many notes at once, by name and octave or by MIDI number
+    """
+    engine = await chord_engine.get_async()
+    service = await midi_service.get_async()
+    if (request.notes is None) == (request.midi is None):
+        raise HTTPException(status_code=400, detail="Provide either notes or midi")
+    
+    if request.midi is not None:
+        midi = np.array(request.midi, dtype=np.int64)
+    else:
+        pitch_classes = [PITCH_CLASSES.get(engine.normalize_note(note), -1) for note in request.notes]
+        unknown = [note for note, pitch_class in zip(request.notes, pitch_classes) if pitch_class < 0]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown notes: {', '.join(unknown[:10])}")
+        octaves = broadcast(request.octaves, len(pitch_classes), 4, "octaves").astype(np.int64)
+        midi = service.midi_numbers(np.array(pitch_classes, dtype=np.int64), octaves)
+    cents = broadcast(request.cents, len(midi), 0.0, "cents").astype(np.float64)
+    
+    try:
+        info = service.note_info_batch(midi, cents, request.reference_pitch)
+        if not np.isfinite(info['frequencies']).all():
+            raise HTTPException(status_code=400, detail="Notes out of the representable frequency range")
+        return Response(content=NoteInfoBatchResponse(**info).model_dump_json(), media_type="application/json")
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error getting note info: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting note info: {str(e)}")
+
+@api_router.get("/tunings", response_model=TuningsResponse)
+async def get_tunings():
+    """
+    List the supported instrument and tuning profiles
+    """
+    return TuningsResponse(
+        tunings=[
+            {
+                'name': profile.name,
+                'instrument': profile.instrument,
+                'description': profile.description,
+                'strings': [MIDIService.midi_note_name(midi) for midi in profile.open_strings],
+                'frets': profile.frets,
+            }
+            for profile in instruments.profiles.values()
+        ],
+        default=DEFAULT_TUNING,
+        reference_pitch=instruments.reference_pitch
+    )
+
 @api_router.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "chord_engine": "initialized",
-        "midi_service": "initialized",
-        "database": "connected" if client else "disconnected"
-    }
+    """Liveness probe, reports the cached readiness state without checking anything"""
+    return Response(content=readiness.body, media_type="application/json")
+
+@api_router.get("/ready")
+async def readiness_check():
+    """Readiness probe, 503 until the components are built and the last database ping succeeded"""
+    return Response(content=readiness.body, media_type="application/json",
+                    status_code=200 if readiness.ready else 503)
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Expose service metrics in the Prometheus text format"""
+    return Response(content=metrics_registry.render(), media_type=metrics.CONTENT_TYPE)
+
+def require_admin(token: Optional[str]):
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if token != admin_token:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@api_router.get("/admin/profiling", response_model=ProfilingStatusResponse)
+async def get_profiling_status(x_admin_token: Optional[str] = Header(None)):
+    """Get the sampling profiler state"""
+    require_admin(x_admin_token)
+    return profiler.status()
+
+@api_router.post("/admin/profiling", response_model=ProfilingStatusResponse)
+async def configure_profiling(request: ProfilingConfigRequest, x_admin_token: Optional[str] = Header(None)):
+    """Enable, disable or flush the sampling profiler without a redeploy"""
+    require_admin(x_admin_token)
+    # Disabling joins the sampler thread and flushes to disk
+    await to_thread.run_sync(profiler.configure, request.sample_rate)
+    if request.flush:
+        await to_thread.run_sync(profiler.flush)
+    return profiler.status()
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Inside CORS, so shed requests still carry CORS headers
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -111,6 +736,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it wraps every other middleware, including CORS
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -118,12 +746,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+background_tasks = []
+
+async def warm_up():
+    """Build every lazy component off the event loop, so requests rarely pay for it"""
+    for component in components:
+        try:
+            await to_thread.run_sync(component.get)
+        except Exception as e:
+            logger.error(f"Failed to build {component.name}: {str(e)}")
+        readiness.refresh()
+    if chord_engine.ready:
+        logger.info(f"Chord database loaded with {len(chord_engine.get().chord_database)} chords")
+
 @app.on_event("startup")
 async def startup_event():
-    logger.info("Guitar Fretboard Chord Recognition API started")
-    logger.info(f"Chord database loaded with {len(chord_engine.chord_database)} chords")
+    background_tasks.append(asyncio.create_task(
+        metrics.monitor_event_loop_lag(EVENT_LOOP_LAG_SECONDS, EVENT_LOOP_LAG_LAST)
+    ))
+    background_tasks.append(asyncio.create_task(readiness.run()))
+    if warm_up_enabled:
+        background_tasks.append(asyncio.create_task(warm_up()))
+    profiler.start(asyncio.get_running_loop())
+    
+    startup_seconds = perf_counter() - IMPORT_STARTED
+    readiness.startup_seconds = round(startup_seconds, 4)
+    readiness.refresh()
+    STARTUP_SECONDS.set(startup_seconds)
+    logger.info(f"Guitar Fretboard Chord Recognition API started in {startup_seconds * 1000:.0f}ms")
+    if startup_seconds > startup_budget:
+        logger.warning(f"Startup took {startup_seconds:.2f}s, over the {startup_budget:.2f}s budget")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    profiler.stop()
     client.close()
     logger.info("Database connection closed")
\ No newline at end of file
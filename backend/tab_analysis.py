@@ -0,0 +1,157 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+from chord_recognition import ChordRecognitionEngine
+from instruments import FretboardTable
+import json
+import re
+
+# Optional string label such as "e", "D#" or "B3", then an optional bar, then the staff body
+TAB_LINE = re.compile(r'^\s*(?:[A-Ga-g][#b]?\d?)?\s*[|:]?(?P<body>[-0-9|:hpbrsvtx/\\~()<>^.*=]+?)\s*$')
+FRET = re.compile(r'\d+')
+BAR_LINES = '|:'
+
+def tab_line_body(line: str) -> Optional[str]:
+    """The staff body of a tab line, or None for text, chord names and blank lines"""
+    match = TAB_LINE.match(line)
+    if match is None or match.group('body').count('-') < 2:
+        return None
+    return match.group('body')
+
+def staff_slices(bodies: List[str]) -> Iterator[Tuple[int, int, List[Tuple[int, int]]]]:
+    """
+    Vertical slices of one staff as (column, measure, [(line, fret)]), lines
+    counted from the top. Frets whose columns overlap, like a "12" over a
+    "3", are played together.
+    """
+    frets = []
+    for line, body in enumerate(bodies):
+        for match in FRET.finditer(body):
+            frets.append((match.start(), match.end(), line, int(match.group())))
+    frets.sort()
+
+    # A measure ends where every line has a bar
+    width = min(len(body) for body in bodies)
+    bars = [column for column in range(width) if all(body[column] in BAR_LINES for body in bodies)]
+
+    measure = 0
+    next_bar = 0
+    index = 0
+    while index < len(frets):
+        start, end, line, fret = frets[index]
+        column = start
+        played = {line: fret}
+        index += 1
+        while index < len(frets) and frets[index][0] < end:
+            end = max(end, frets[index][1])
+            played.setdefault(frets[index][2], frets[index][3])
+            index += 1
+        while next_bar < len(bars) and bars[next_bar] < column:
+            # Adjacent bar columns, as in "||", end a single measure
+            if next_bar == 0 or bars[next_bar] != bars[next_bar - 1] + 1:
+                measure += 1
+            next_bar += 1
+        yield column, measure, sorted(played.items())
+
+class TabAnalyzer:
+    """
+    Chord timelines of ASCII tablature. Each chord answer is encoded once per
+    pitch-class set, and repeated shapes only cost a dict lookup.
+    """
+
+    def __init__(self, chord_engine: ChordRecognitionEngine):
+        self.chord_engine = chord_engine
+        self._chords: Dict[int, str] = {}
+        self._vocabulary_version = chord_engine.vocabulary_version
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def cache_size(self) -> int:
+        return len(self._chords)
+
+    def encoded_chord(self, mask: int) -> str:
+        """JSON of the best chord for a pitch-class set, null when nothing matches"""
+        # Answers from an older vocabulary must not outlive a match table reload
+        if self.chord_engine.vocabulary_version != self._vocabulary_version:
+            self._chords.clear()
+            self._vocabulary_version = self.chord_engine.vocabulary_version
+        encoded = self._chords.get(mask)
+        if encoded is not None:
+            self.cache_hits += 1
+            return encoded
+        self.cache_misses += 1
+        match = self.chord_engine.best_match_for_mask(mask)
+        if match is None:
+            encoded = 'null'
+        else:
+            encoded = json.dumps({'name': match.record.name, 'type': match.record.quality.type,
+                                  'confidence': match.confidence, 'is_exact_match': match.is_exact_match},
+                                 ensure_ascii=False, separators=(',', ':'))
+        self._chords[mask] = encoded
+        return encoded
+
+    def session(self, table: FretboardTable) -> 'TabSession':
+        return TabSession(self, table)
+
+class TabSession:
+    """
+    Incremental parse of one tab document. Lines are fed one at a time and
+    each staff is analyzed as soon as it ends, so only one staff is held.
+    """
+
+    def __init__(self, analyzer: TabAnalyzer, table: FretboardTable):
+        self.analyzer = analyzer
+        self.table = table
+        self.staff: List[str] = []
+        self.staves = 0
+        self.slices = 0
+        self.chords = 0
+
+    def feed(self, line: str) -> List[str]:
+        """NDJSON records completed by this line"""
+        body = tab_line_body(line)
+        if body is None:
+            return self._finish_staff()
+        self.staff.append(body)
+        # Staves printed without a blank line between them end at one line per string
+        if len(self.staff) == self.table.strings:
+            return self._finish_staff()
+        return []
+
+    def finish(self) -> List[str]:
+        records = self._finish_staff()
+        records.append(json.dumps({'done': True, 'tuning': self.table.profile.name, 'staves': self.staves,
+                                   'slices': self.slices, 'chords': self.chords}, separators=(',', ':')))
+        return records
+
+    def _finish_staff(self) -> List[str]:
+        bodies, self.staff = self.staff, []
+        if not bodies:
+            return []
+        staff = self.staves
+        self.staves += 1
+        if len(bodies) != self.table.strings:
+            return [json.dumps({'staff': staff, 'error': f"Staff has {len(bodies)} lines, "
+                                f"{self.table.profile.name} has {self.table.strings} strings"}, separators=(',', ':'))]
+
+        records = []
+        pitch_classes = self.table.pitch_classes
+        for column, measure, played in staff_slices(bodies):
+            # The top tab line is the highest string, NotePosition.string counts from the lowest
+            positions = [(self.table.strings - 1 - line, fret) for line, fret in played
+                         if fret <= self.table.frets]
+            if not positions:
+                continue
+            positions.sort()
+            mask = 0
+            for string, fret in positions:
+                mask |= 1 << int(pitch_classes[string, fret])
+            chord = self.analyzer.encoded_chord(mask) if len(positions) >= 2 else 'null'
+            self.slices += 1
+            if chord != 'null':
+                self.chords += 1
+            encoded_positions = json.dumps(
+                [{'string': string, 'fret': fret, 'note': self.table.note(string, fret)} for string, fret in positions],
+                separators=(',', ':')
+            )
+            records.append(f'{{"staff":{staff},"measure":{measure},"column":{column},'
+                           f'"positions":{encoded_positions},"chord":{chord}}}')
+        return records
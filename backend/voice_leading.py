@@ -0,0 +1,169 @@
+from typing import Dict, List, Optional, Tuple
+from chord_recognition import ChordRecognitionEngine, ChordRecord, NOTE_NAMES
+from instruments import INSTRUMENT_PROFILES, DEFAULT_TUNING
+import itertools
+import numpy as np
+
+# MIDI note of each open string, from low E to high E like NotePosition.string
+STANDARD_TUNING = INSTRUMENT_PROFILES[DEFAULT_TUNING].open_strings
+
+MUTED = -1
+
+class VoicingIndex:
+    """
+    Playable voicings of chords on one tuning, enumerated over the whole
+    fretboard on first use and cached per chord. A voicing is a row of
+    frets, one per string, with MUTED for strings that are not played.
+    """
+
+    def __init__(self, open_strings: Tuple[int, ...], frets: int = 24, span: int = 4, max_candidates: int = 24):
+        self.open_strings = open_strings
+        self.tuning = tuple(midi % 12 for midi in open_strings)
+        self.frets = frets
+        self.span = span
+        self.max_candidates = max_candidates
+        self._voicings: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def voicings(self, chord: ChordRecord, max_fret: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(voicings, difficulty) for a chord up to max_fret, easiest first, at most max_candidates"""
+        # Keyed by pitch content rather than chord id, so it survives vocabulary reloads
+        key = (chord.mask, chord.root)
+        cached = self._voicings.get(key)
+        if cached is None:
+            cached = self._enumerate(chord)
+            self._voicings[key] = cached
+        voicings, difficulty = cached
+        # Every voicing within max_fret fits one of its windows, so filtering
+        # gives what enumerating up to max_fret would
+        if max_fret is not None and max_fret < self.frets:
+            within = voicings.max(axis=1) <= max_fret
+            voicings, difficulty = voicings[within], difficulty[within]
+        return voicings[:self.max_candidates], difficulty[:self.max_candidates]
+
+    def _enumerate(self, chord: ChordRecord) -> Tuple[np.ndarray, np.ndarray]:
+        required = chord.mask
+        if chord.size >= 4 and chord.root >= 0:
+            # The fifth is commonly left out of larger chords
+            required &= ~(1 << ((chord.root + 7) % 12))
+        min_strings = min(len(self.tuning), max(3, chord.size))
+
+        found = set()
+        # Each window is the open strings plus `span` consecutive frets
+        for base in range(1, self.frets - self.span + 2):
+            window = [0] + list(range(base, base + self.span))
+            options = [
+                [MUTED] + [fret for fret in window if chord.mask >> ((open_pc + fret) % 12) & 1]
+                for open_pc in self.tuning
+            ]
+            for frets in itertools.product(*options):
+                sounding = [string for string, fret in enumerate(frets) if fret != MUTED]
+                if len(sounding) < min_strings:
+                    continue
+                # No muted strings between sounding ones
+                if sounding[-1] - sounding[0] + 1 != len(sounding):
+                    continue
+                pitch_classes = [(self.tuning[string] + frets[string]) % 12 for string in sounding]
+                # Root in the bass, which is not always the first string on re-entrant tunings
+                bass = min(range(len(sounding)), key=lambda i: self.open_strings[sounding[i]] + frets[sounding[i]])
+                if pitch_classes[bass] != chord.root:
+                    continue
+                mask = 0
+                for pitch_class in pitch_classes:
+                    mask |= 1 << pitch_class
+                if mask & required != required:
+                    continue
+                found.add(frets)
+
+        if not found:
+            return np.zeros((0, len(self.tuning)), dtype=np.int64), np.zeros(0)
+
+        voicings = np.array(sorted(found), dtype=np.int64)
+        difficulty = self.difficulty(voicings)
+        # All of them are kept, the easiest ones within a smaller max_fret may be far down
+        order = np.argsort(difficulty, kind='stable')
+        return voicings[order], difficulty[order]
+
+    def difficulty(self, voicings: np.ndarray) -> np.ndarray:
+        """Static cost of holding each voicing: stretch, fretted fingers, position, fullness"""
+        fretted = voicings > 0
+        high = np.where(fretted, voicings, 0).max(axis=1)
+        low = np.where(fretted, voicings, self.frets + 1).min(axis=1)
+        low = np.where(fretted.any(axis=1), low, 0)
+        sounding = (voicings != MUTED).sum(axis=1)
+        return (high - low) + 0.5 * fretted.sum(axis=1) + 0.1 * low - 0.3 * sounding
+
+    @staticmethod
+    def hand_position(voicings: np.ndarray) -> np.ndarray:
+        """Lowest fretted fret of each voicing, 0 for fully open voicings"""
+        fretted = voicings > 0
+        low = np.where(fretted, voicings, np.iinfo(np.int64).max).min(axis=1)
+        return np.where(fretted.any(axis=1), low, 0)
+
+    def transition_costs(self, previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+        """(previous, current) cost of moving between voicings: hand shift plus changed strings"""
+        shift = np.abs(self.hand_position(previous)[:, None] - self.hand_position(current)[None, :])
+        changed = (previous[:, None, :] != current[None, :, :]).sum(axis=2)
+        return shift + 0.5 * changed
+
+class VoiceLeadingPlanner:
+    """
+    Find the sequence of voicings that minimizes hand movement through a
+    progression, by dynamic programming over each chord's candidate voicings
+    with beam pruning of the states kept at every step.
+    """
+
+    def __init__(self, chord_engine: ChordRecognitionEngine, beam_width: int = 16):
+        self.chord_engine = chord_engine
+        self.beam_width = beam_width
+        self._indexes: Dict[Tuple, VoicingIndex] = {}
+
+    def voicing_index(self, open_strings: Tuple[int, ...] = STANDARD_TUNING, frets: int = 24) -> VoicingIndex:
+        """Index of a tuning over its whole fretboard, max_fret is applied per query"""
+        key = (open_strings, frets)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes.setdefault(key, VoicingIndex(open_strings, frets=frets))
+        return index
+
+    def plan(self, chords: List[ChordRecord], open_strings: Tuple[int, ...] = STANDARD_TUNING,
+             max_fret: int = 15, frets: int = 24) -> Tuple[List[np.ndarray], float]:
+        """Best voicing per chord and the path's total cost"""
+        index = self.voicing_index(open_strings, frets)
+        candidates = [index.voicings(chord, max_fret) for chord in chords]
+
+        voicings, difficulty = candidates[0]
+        cost = difficulty.astype(np.float64)
+        backpointers = []
+        for step in range(1, len(chords)):
+            previous = voicings
+            voicings, difficulty = candidates[step]
+            total = cost[:, None] + index.transition_costs(previous, voicings) + difficulty[None, :]
+            best_previous = np.argmin(total, axis=0)
+            cost = total[best_previous, np.arange(len(voicings))]
+            # Beam pruning: only the cheapest states may be extended
+            if len(cost) > self.beam_width:
+                cutoff = np.partition(cost, self.beam_width - 1)[self.beam_width - 1]
+                cost = np.where(cost <= cutoff, cost, np.inf)
+            backpointers.append(best_previous)
+
+        state = int(np.argmin(cost))
+        total_cost = float(cost[state])
+        path = [state]
+        for best_previous in reversed(backpointers):
+            state = int(best_previous[state])
+            path.append(state)
+        path.reverse()
+
+        return [candidates[step][0][state] for step, state in enumerate(path)], total_cost
+
+    def unplayable(self, chords: List[ChordRecord], open_strings: Tuple[int, ...] = STANDARD_TUNING,
+                   max_fret: int = 15, frets: int = 24) -> List[str]:
+        """Names of chords that have no playable voicing"""
+        index = self.voicing_index(open_strings, frets)
+        return [chord.name for chord in chords if len(index.voicings(chord, max_fret)[0]) == 0]
+
+    def positions(self, frets: np.ndarray, open_strings: Tuple[int, ...] = STANDARD_TUNING) -> List[Dict]:
+        return [
+            {'string': string, 'fret': int(fret), 'note': NOTE_NAMES[(open_strings[string] + int(fret)) % 12]}
+            for string, fret in enumerate(frets) if fret != MUTED
+        ]
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+In-process Load Benchmark for Guitar Fretboard Chord Recognition
+Drives the FastAPI app over ASGI under concurrent load and reports
+throughput and latency percentiles as JSON
+
+Usage:
+    python backend_benchmark.py --profile smoke --output results.json
+    python backend_benchmark.py --baseline baseline.json --update-baseline
+    python backend_benchmark.py --baseline baseline.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Any
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# The Motor client connects lazily and no benchmarked route touches the
+# database, so a local URL is enough to import the app without MongoDB
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark_database")
+
+import httpx  # noqa: E402
+from server import app  # noqa: E402
+
+# Per-request client logging would dominate the measured latencies
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Concurrency levels and requests per route for each profile
+PROFILES = {
+    "smoke": {"concurrency": [1, 8], "requests": 50},
+    "steady": {"concurrency": [1, 16, 64], "requests": 500},
+    "burst": {"concurrency": [256], "requests": 2000},
+}
+
+CHORD_PAYLOADS = [
+    {"notes": ["C", "E", "G"]},
+    {"notes": ["A", "C", "E", "G"]},
+    {"notes": ["G", "B", "D", "F"]},
+    {"notes": ["D", "F#", "A", "C#", "E"]},
+    {"notes": ["E", "G#", "B", "D", "F#", "C"]},
+    {"notes": ["Bb", "D", "F"]},
+]
+
+PLAY_NOTE_PAYLOADS = [
+    {"note": note, "octave": octave, "duration": 500}
+    for note, octave in itertools.product(["C", "E", "G", "A#"], [2, 3, 4])
+]
+
+NOTE_INFO_PATHS = [
+    f"/api/note-info/{note}?octave={octave}"
+    for note, octave in itertools.product(["C", "C#", "F", "A"], [2, 4, 6])
+]
+
+ROUTES = {
+    "recognize-chord": lambda i: ("POST", "/api/recognize-chord", CHORD_PAYLOADS[i % len(CHORD_PAYLOADS)]),
+    "play-note": lambda i: ("POST", "/api/play-note", PLAY_NOTE_PAYLOADS[i % len(PLAY_NOTE_PAYLOADS)]),
+    "note-info": lambda i: ("GET", NOTE_INFO_PATHS[i % len(NOTE_INFO_PATHS)], None),
+}
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class BackendBenchmark:
+    def __init__(self, profile: Dict[str, Any], routes: List[str]):
+        self.profile = profile
+        self.routes = routes
+        self.results = []
+
+    async def run_route(self, client: httpx.AsyncClient, route: str, concurrency: int) -> Dict[str, Any]:
+        """Send the profile's requests to one route from `concurrency` workers"""
+        total = self.profile["requests"]
+        request_ids = iter(range(total))
+        latencies = []
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            for i in request_ids:
+                method, path, payload = ROUTES[route](i)
+                started = time.perf_counter()
+                response = await client.request(method, path, json=payload)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "route": route,
+            "concurrency": concurrency,
+            "requests": total,
+            "errors": errors,
+            "throughput_rps": round(total / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        }
+
+    async def run(self) -> List[Dict[str, Any]]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for route in self.routes:
+                # Warm up so import-time and first-call costs are not measured
+                method, path, payload = ROUTES[route](0)
+                await client.request(method, path, json=payload)
+                for concurrency in self.profile["concurrency"]:
+                    result = await self.run_route(client, route, concurrency)
+                    self.results.append(result)
+                    print(f"{route:16} c={concurrency:<4} {result['throughput_rps']:>10} req/s  "
+                          f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms",
+                          file=sys.stderr)
+        return self.results
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                          tolerance: float) -> List[str]:
+    """Return a description of every result that regressed beyond the tolerance"""
+    baseline_by_key = {(b["route"], b["concurrency"]): b for b in baseline}
+    regressions = []
+    for result in results:
+        base = baseline_by_key.get((result["route"], result["concurrency"]))
+        if not base:
+            continue
+        key = f"{result['route']} c={result['concurrency']}"
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {result['throughput_rps']} < baseline {base['throughput_rps']}")
+        if result["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p99 {result['p99_ms']}ms > baseline {base['p99_ms']}ms")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{key}: {result['errors']} errors > baseline {base['errors']}")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="smoke")
+    parser.add_argument("--concurrency", type=int, nargs="+", help="Override the profile's concurrency levels")
+    parser.add_argument("--requests", type=int, help="Override the profile's requests per route")
+    parser.add_argument("--routes", nargs="+", choices=sorted(ROUTES), default=sorted(ROUTES))
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="Baseline JSON file to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    args = parser.parse_args()
+
+    profile = dict(PROFILES[args.profile])
+    if args.concurrency:
+        profile["concurrency"] = args.concurrency
+    if args.requests:
+        profile["requests"] = args.requests
+
+    results = asyncio.run(BackendBenchmark(profile, args.routes).run())
+    report = {"profile": args.profile, "results": results}
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        baseline_path = Path(args.baseline)
+        if args.update_baseline or not baseline_path.exists():
+            baseline_path.write_text(output + "\n")
+            print(f"Baseline written to {baseline_path}", file=sys.stderr)
+            return 0
+        regressions = compare_with_baseline(results, json.loads(baseline_path.read_text())["results"],
+                                            args.tolerance)
+        if regressions:
+            print("REGRESSIONS:", file=sys.stderr)
+            for regression in regressions:
+                print(f"  {regression}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
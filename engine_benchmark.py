@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for ChordRecognitionEngine
+Runs recognize_chords over every pitch-class set, common guitar shapes and
+noisy shapes, reports ns/op and memory per corpus, and checks that the
+engine still returns exactly what the reference implementation returns
+
+Usage:
+    python engine_benchmark.py
+    python engine_benchmark.py --repeat 5 --output engine.json
+    python engine_benchmark.py --check-only
+    python engine_benchmark.py --match-table /tmp/chord_table.bin
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Any
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from chord_recognition import ChordRecognitionEngine  # noqa: E402
+from models import RecognizedChord  # noqa: E402
+
+NOTE_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+FLAT_NAMES = {'C#': 'Db', 'D#': 'Eb', 'F#': 'Gb', 'G#': 'Ab', 'A#': 'Bb'}
+
+# Standard tuning from low E to high E, as pitch classes
+STANDARD_TUNING = [4, 9, 2, 7, 11, 4]
+
+# Frets from low E to high E, None for a muted string
+GUITAR_SHAPES = {
+    'C open': [None, 3, 2, 0, 1, 0],
+    'A open': [None, 0, 2, 2, 2, 0],
+    'G open': [3, 2, 0, 0, 0, 3],
+    'E open': [0, 2, 2, 1, 0, 0],
+    'D open': [None, None, 0, 2, 3, 2],
+    'Am open': [None, 0, 2, 2, 1, 0],
+    'Em open': [0, 2, 2, 0, 0, 0],
+    'Dm open': [None, None, 0, 2, 3, 1],
+    'C7 open': [None, 3, 2, 3, 1, 0],
+    'G7 open': [3, 2, 0, 0, 0, 1],
+    'D7 open': [None, None, 0, 2, 1, 2],
+    'E7 open': [0, 2, 0, 1, 0, 0],
+    'A7 open': [None, 0, 2, 0, 2, 0],
+    'Cmaj7 open': [None, 3, 2, 0, 0, 0],
+    'Fmaj7 open': [None, None, 3, 2, 1, 0],
+    'Am7 open': [None, 0, 2, 0, 1, 0],
+    'Em7 open': [0, 2, 0, 0, 0, 0],
+    'Dsus2 open': [None, None, 0, 2, 3, 0],
+    'Dsus4 open': [None, None, 0, 2, 3, 3],
+    'Asus2 open': [None, 0, 2, 2, 0, 0],
+    'Asus4 open': [None, 0, 2, 2, 3, 0],
+    'Cadd9 open': [None, 3, 2, 0, 3, 0],
+    'F barre': [1, 3, 3, 2, 1, 1],
+    'Bm barre': [None, 2, 4, 4, 3, 2],
+    'F#m barre': [2, 4, 4, 2, 2, 2],
+    'Bb barre': [None, 1, 3, 3, 3, 1],
+    'C# barre': [None, 4, 6, 6, 6, 4],
+    'Gm barre': [3, 5, 5, 3, 3, 3],
+    'Bdim': [None, 2, 3, 4, 3, None],
+    'Caug': [None, 3, 2, 1, 1, 0],
+    'C6': [None, 3, 2, 2, 1, 0],
+    'Am6': [None, 0, 2, 2, 1, 2],
+    'E9': [0, 2, 0, 1, 0, 2],
+    'Cmaj9': [None, 3, 2, 4, 3, 0],
+    'Dm9': [None, 5, 3, 5, 5, None],
+}
+
+def shape_notes(frets: List) -> List[str]:
+    """Notes played by a shape, in string order and with repeats, like the frontend sends them"""
+    return [NOTE_NAMES[(STANDARD_TUNING[string] + fret) % 12]
+            for string, fret in enumerate(frets) if fret is not None]
+
+def build_corpora(seed: int) -> Dict[str, List[List[str]]]:
+    rng = random.Random(seed)
+
+    # Every subset of the 12 pitch classes, including the empty and single-note sets
+    pitch_class_sets = [[NOTE_NAMES[i] for i in range(12) if mask >> i & 1] for mask in range(4096)]
+
+    shapes = [shape_notes(frets) for frets in GUITAR_SHAPES.values()]
+    # Also spell shapes with flats, which the engine normalizes
+    shapes += [[FLAT_NAMES.get(note, note) for note in notes] for notes in shapes]
+
+    # Shapes with one to three foreign notes, as from sympathetic strings or misplaced fingers
+    noisy = []
+    for _ in range(10):
+        for notes in shapes:
+            extra = rng.sample([n for n in NOTE_NAMES if n not in notes], rng.randint(1, 3))
+            noisy.append(notes + extra)
+
+    return {"pitch_class_sets": pitch_class_sets, "guitar_shapes": shapes, "noisy_shapes": noisy}
+
+def reference_recognize_chords(engine: ChordRecognitionEngine, input_notes: List[str]) -> List[RecognizedChord]:
+    """
+    Frozen copy of the original recognize_chords/calculate_chord_match
+    algorithm. Optimized engines must return exactly the same chords, in the
+    same order, with the same confidences.
+    """
+    note_map = {'Db': 'C#', 'Eb': 'D#', 'Gb': 'F#', 'Ab': 'G#', 'Bb': 'A#'}
+
+    def normalize(note):
+        return note_map.get(note, note)
+
+    def match(unique_input, chord_notes):
+        unique_chord = list(dict.fromkeys([normalize(note) for note in chord_notes]))
+        matching_notes = [note for note in unique_input if note in unique_chord]
+        if len(unique_input) == len(unique_chord) and len(matching_notes) == len(unique_chord):
+            return len(matching_notes), 100, True
+        basic_triad_notes = unique_chord[:3] if len(unique_chord) >= 3 else unique_chord
+        triad_matches = [note for note in unique_input if note in basic_triad_notes]
+        percentage = len(matching_notes) / len(unique_chord) * 100 if unique_chord else 0
+        if len(unique_chord) > 3:
+            if len(triad_matches) == len(basic_triad_notes) and len(matching_notes) >= 4:
+                percentage += 10
+        extra_notes = len(unique_input) - len(matching_notes)
+        final_percentage = max(0, percentage - max(0, extra_notes * 10))
+        return len(matching_notes), min(100, int(final_percentage)), False
+
+    if not input_notes or len(input_notes) < 2:
+        return []
+
+    unique_notes = list(dict.fromkeys([normalize(note) for note in input_notes]))
+    matches = []
+    for chord in engine.chord_database:
+        matching, percentage, exact = match(unique_notes, list(chord.notes))
+        min_matching_notes = 3 if len(chord.notes) >= 4 else 2
+        if matching >= min_matching_notes and percentage >= 50:
+            matches.append(RecognizedChord(
+                name=chord.name, type=chord.quality.type, structure=chord.quality.structure,
+                confidence=percentage, notes=list(chord.notes), is_exact_match=exact,
+                category=chord.quality.category
+            ))
+
+    def sort_key(chord):
+        if chord.is_exact_match:
+            return (0, -chord.confidence, len(chord.notes))
+        common_notes = len(set(unique_notes) & set(normalize(note) for note in chord.notes))
+        return (1, -(common_notes / len(unique_notes) * 100), -chord.confidence, len(chord.notes))
+
+    matches.sort(key=sort_key)
+    return matches[:6]
+
+def check_equivalence(engine: ChordRecognitionEngine, corpora: Dict[str, List[List[str]]]) -> List[str]:
+    """Return a description of every input where the engine disagrees with the reference"""
+    mismatches = []
+    for corpus_name, corpus in corpora.items():
+        for notes in corpus:
+            expected = [c.model_dump() for c in reference_recognize_chords(engine, notes)]
+            actual = [c.model_dump() for c in engine.recognize_chords(notes)]
+            if actual != expected:
+                mismatches.append(f"{corpus_name} {notes}: expected {[c['name'] for c in expected]}, "
+                                  f"got {[c['name'] for c in actual]}")
+    return mismatches
+
+# Leave out the blocks tracemalloc allocates for its own snapshots
+SNAPSHOT_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+def benchmark_corpus(recognize, corpus: List[List[str]], repeat: int, memory_sample: int) -> Dict[str, Any]:
+    """Time a corpus, then measure memory on an evenly spaced sample of it in a separate traced pass"""
+    best_ns = None
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for notes in corpus:
+            recognize(notes)
+        elapsed = time.perf_counter_ns() - started
+        best_ns = elapsed if best_ns is None else min(best_ns, elapsed)
+
+    # tracemalloc slows everything down, so it never overlaps the timed runs
+    sample = corpus[::max(1, len(corpus) // memory_sample)]
+    tracemalloc.start()
+    transient_bytes = 0
+    try:
+        for notes in sample:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            recognize(notes)
+            _, peak = tracemalloc.get_traced_memory()
+            transient_bytes += peak - before
+        tracemalloc.reset_peak()
+        for notes in sample:
+            recognize(notes)
+        _, corpus_peak = tracemalloc.get_traced_memory()
+        # Snapshots only see live blocks, so count those still held by each result, after the
+        # peak pass so the snapshots themselves don't inflate it
+        result_blocks = 0
+        for notes in sample:
+            before = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+            result = recognize(notes)
+            after = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+            result_blocks += sum(max(0, stat.count_diff) for stat in after.compare_to(before, "lineno"))
+            del result
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "inputs": len(corpus),
+        "ns_per_op": round(best_ns / len(corpus)),
+        "transient_bytes_per_op": round(transient_bytes / len(sample)),
+        "result_blocks_per_op": round(result_blocks / len(sample), 1),
+        "peak_kib": round(corpus_peak / 1024, 1),
+    }
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per corpus, best is reported")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the noisy corpus")
+    parser.add_argument("--memory-sample", type=int, default=256, help="Inputs per corpus traced for memory")
+    parser.add_argument("--reference", action="store_true", help="Also benchmark the reference implementation")
+    parser.add_argument("--match-table", help="Answer from this match table file, building it if missing")
+    parser.add_argument("--check-only", action="store_true", help="Only run the equivalence check")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    engine = ChordRecognitionEngine()
+    if args.match_table:
+        engine.use_match_table(Path(args.match_table))
+    corpora = build_corpora(args.seed)
+
+    mismatches = check_equivalence(engine, corpora)
+    for mismatch in mismatches[:20]:
+        print(f"MISMATCH {mismatch}", file=sys.stderr)
+    print(f"Equivalence check: {len(mismatches)} mismatches", file=sys.stderr)
+
+    report = {"equivalent": not mismatches, "mismatches": len(mismatches), "engine": {}}
+    if not args.check_only:
+        for corpus_name, corpus in corpora.items():
+            report["engine"][corpus_name] = benchmark_corpus(engine.recognize_chords, corpus, args.repeat,
+                                                                args.memory_sample)
+        if args.reference:
+            report["reference"] = {
+                corpus_name: benchmark_corpus(lambda notes: reference_recognize_chords(engine, notes),
+                                              corpus, args.repeat, args.memory_sample)
+                for corpus_name, corpus in corpora.items()
+            }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    return 0 if not mismatches else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@ import { Volume2, VolumeX } from 'lucide-react';
 import { Button } from './ui/button';
 import { Card } from './ui/card';
 import { toast } from '../hooks/use-toast';
+import { loadChordIndex, recognizeChords as recognizeChordsLocally } from '../lib/chordIndex';
 import axios from 'axios';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
@@ -12,6 +13,14 @@ const Fretboard = () => {
   const [selectedNotes, setSelectedNotes] = useState([]);
   const [soundEnabled, setSoundEnabled] = useState(true);
   const [recognizedChords, setRecognizedChords] = useState([]);
+  const [chordIndex, setChordIndex] = useState(null);
+
+  // Recognize chords on the device once the chord index is loaded, the API stays the fallback
+  useEffect(() => {
+    loadChordIndex(API)
+      .then(setChordIndex)
+      .catch(error => console.error('Error loading chord index:', error));
+  }, []);
 
   // Guitar strings in standard tuning (from low E to high E)
   const strings = [
@@ -72,8 +81,14 @@ const Fretboard = () => {
   useEffect(() => {
     const recognizeChords = async () => {
       if (selectedNotes.length >= 2) {
+        const notesList = selectedNotes.map(n => n.note);
+        const localChords = chordIndex ? recognizeChordsLocally(chordIndex, notesList) : null;
+        if (localChords) {
+          setRecognizedChords(localChords);
+          return;
+        }
+
         try {
-          const notesList = selectedNotes.map(n => n.note);
           const response = await axios.post(`${API}/recognize-chord`, {
             notes: notesList,
             selected_positions: selectedNotes
@@ -94,7 +109,7 @@ const Fretboard = () => {
     };
 
     recognizeChords();
-  }, [selectedNotes]);
+  }, [selectedNotes, chordIndex]);
 
   const getFretMarkers = (fret) => {
     const markerFrets = [3, 5, 7, 9, 15, 17, 19, 21];
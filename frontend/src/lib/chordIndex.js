@@ -0,0 +1,123 @@
+import axios from 'axios';
+
+// Layout and scoring rules this module implements, must match the server's CLIENT_INDEX_FORMAT
+export const CHORD_INDEX_FORMAT = 1;
+
+const popcount = (mask) => {
+  let count = 0;
+  while (mask) {
+    mask &= mask - 1;
+    count += 1;
+  }
+  return count;
+};
+
+const maskOf = (pitchClasses) => pitchClasses.reduce((mask, pc) => (pc >= 0 ? mask | (1 << pc) : mask), 0);
+
+// Expand the compact /api/chord-index blob into chord records
+export function decodeChordIndex(blob) {
+  if (blob.format !== CHORD_INDEX_FORMAT) {
+    throw new Error(`Unsupported chord index format ${blob.format}`);
+  }
+  const qualities = blob.qualities.map(([type, structure, category]) => ({ type, structure, category }));
+  const chords = blob.chords.map(([name, qualityIndex, pitchClasses], id) => {
+    const triad = pitchClasses.slice(0, 3);
+    return {
+      id,
+      name,
+      quality: qualities[qualityIndex],
+      notes: pitchClasses.map(pc => blob.note_names[pc]),
+      mask: maskOf(pitchClasses),
+      triadMask: maskOf(triad),
+      size: pitchClasses.length,
+      triadSize: triad.length,
+    };
+  });
+  const pitchClasses = {};
+  blob.note_names.forEach((name, pc) => { pitchClasses[name] = pc; });
+  return { version: blob.version, flats: blob.flats, pitchClasses, chords };
+}
+
+// Port of ChordRecognitionEngine._match, returns [matching notes, percentage, exact]
+function matchChord(inputMask, inputSize, chord) {
+  const matchingNotes = popcount(inputMask & chord.mask);
+  if (inputSize === chord.size && matchingNotes === chord.size) {
+    return [matchingNotes, 100, true];
+  }
+
+  let matchPercentage = matchingNotes / chord.size * 100;
+  if (chord.size > 3) {
+    const triadMatches = popcount(inputMask & chord.triadMask);
+    if (triadMatches === chord.triadSize && matchingNotes >= 4) {
+      matchPercentage += 10;
+    }
+  }
+
+  const extraNotes = inputSize - matchingNotes;
+  const finalPercentage = Math.max(0, matchPercentage - Math.max(0, extraNotes * 10));
+  return [matchingNotes, Math.min(100, Math.trunc(finalPercentage)), false];
+}
+
+const compareKeys = (a, b) => {
+  for (let i = 0; i < Math.min(a.length, b.length); i += 1) {
+    if (a[i] !== b[i]) return a[i] - b[i];
+  }
+  return a.length - b.length;
+};
+
+/**
+ * Recognize chords locally, giving the same answers as /api/recognize-chord.
+ * Returns null when a note is not in the index, so the caller can ask the server.
+ */
+export function recognizeChords(index, notes) {
+  if (!notes || notes.length < 2) return [];
+
+  const uniqueNotes = [...new Set(notes.map(note => index.flats[note] || note))];
+  let inputMask = 0;
+  for (const note of uniqueNotes) {
+    const pc = index.pitchClasses[note];
+    if (pc === undefined) return null;
+    inputMask |= 1 << pc;
+  }
+  const inputSize = uniqueNotes.length;
+
+  const matches = [];
+  for (const chord of index.chords) {
+    const [matchingNotes, confidence, isExactMatch] = matchChord(inputMask, inputSize, chord);
+    const minMatchingNotes = chord.size >= 4 ? 3 : 2;
+    if (matchingNotes >= minMatchingNotes && confidence >= 50) {
+      const key = isExactMatch
+        ? [0, -confidence, chord.size]
+        : [1, -(matchingNotes / inputSize * 100), -confidence, chord.size];
+      matches.push({ chord, confidence, isExactMatch, key });
+    }
+  }
+
+  // Array.prototype.sort is stable, so ties keep vocabulary order like the server
+  matches.sort((a, b) => compareKeys(a.key, b.key));
+
+  return matches.slice(0, 6).map(({ chord, confidence, isExactMatch }) => ({
+    name: chord.name,
+    type: chord.quality.type,
+    structure: chord.quality.structure,
+    confidence,
+    notes: chord.notes,
+    is_exact_match: isExactMatch,
+    category: chord.quality.category,
+  }));
+}
+
+let indexRequest = null;
+
+// Fetch and decode the chord index once per page load, the browser revalidates it by ETag
+export function loadChordIndex(api) {
+  if (!indexRequest) {
+    indexRequest = axios.get(`${api}/chord-index`)
+      .then(response => decodeChordIndex(response.data))
+      .catch(error => {
+        indexRequest = null;
+        throw error;
+      });
+  }
+  return indexRequest;
+}
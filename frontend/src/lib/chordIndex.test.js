@@ -0,0 +1,47 @@
+import fixture from '../../../tests/fixtures/chord_index_parity.json';
+import { CHORD_INDEX_FORMAT, decodeChordIndex, recognizeChords } from './chordIndex';
+
+// Only loadChordIndex uses axios, keep its ES module build out of Jest
+jest.mock('axios', () => ({ get: jest.fn() }));
+
+// Server answers exported by tests/test_chord_index_parity.py, regenerate them there when the scoring changes
+const index = decodeChordIndex(fixture.index);
+
+test('fixture uses the index format of this module', () => {
+  expect(fixture.index.format).toBe(CHORD_INDEX_FORMAT);
+  expect(index.chords).toHaveLength(fixture.index.chords.length);
+});
+
+test.each(fixture.cases.map(({ notes, chords }) => [notes.join(' '), notes, chords]))(
+  'recognizes %s like the server',
+  (_, notes, chords) => {
+    const local = recognizeChords(index, notes);
+    expect(local.map(chord => [chord.name, chord.confidence, chord.is_exact_match])).toEqual(chords);
+  },
+);
+
+test('decoded chords keep the server notes and qualities', () => {
+  const [name, qualityIndex, pitchClasses] = fixture.index.chords[0];
+  const [type, structure, category] = fixture.index.qualities[qualityIndex];
+  const [chord] = recognizeChords(index, pitchClasses.map(pc => fixture.index.note_names[pc]));
+  expect(chord).toEqual({
+    name,
+    type,
+    structure,
+    confidence: 100,
+    notes: pitchClasses.map(pc => fixture.index.note_names[pc]),
+    is_exact_match: true,
+    category,
+  });
+});
+
+test('notes missing from the index are left to the server', () => {
+  expect(recognizeChords(index, ['C', 'E', 'H'])).toBeNull();
+  expect(recognizeChords(index, ['C'])).toEqual([]);
+});
+
+test('an unknown index format is rejected', () => {
+  expect(() => decodeChordIndex({ ...fixture.index, format: CHORD_INDEX_FORMAT + 1 })).toThrow(
+    `Unsupported chord index format ${CHORD_INDEX_FORMAT + 1}`,
+  );
+});
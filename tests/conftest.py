@@ -0,0 +1,5 @@
+from pathlib import Path
+import sys
+
+# Backend modules import each other by their flat names, as when the server runs from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
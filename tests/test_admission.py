@@ -0,0 +1,211 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from admission import AdmissionController, AdmissionLimit, AdmissionMiddleware, Overloaded, parse_limit
+from metrics import MetricsRegistry
+import server
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+async def settle():
+    # Let every runnable task reach its next await
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_parse_limit():
+    limit = parse_limit('4:16:250')
+    assert (limit.concurrency, limit.queue_size, limit.max_wait) == (4, 16, 0.25)
+
+def test_free_slot_is_admitted_without_waiting():
+    async def scenario():
+        limit = AdmissionLimit(2, 1, 1.0)
+        assert await limit.acquire() == 0.0
+        assert await limit.acquire() == 0.0
+        assert limit.active == 2
+        limit.release()
+        limit.release()
+        assert limit.active == 0
+
+    run(scenario())
+
+def test_full_queue_is_shed():
+    async def scenario():
+        limit = AdmissionLimit(1, 1, 1.0)
+        await limit.acquire()
+        waiter = asyncio.ensure_future(limit.acquire())
+        await settle()
+        assert limit.queued == 1
+
+        with pytest.raises(Overloaded) as shed:
+            await limit.acquire()
+        assert shed.value.reason == 'queue_full'
+
+        limit.release()
+        await waiter
+        assert (limit.active, limit.queued) == (1, 0)
+
+    run(scenario())
+
+def test_expected_wait_past_deadline_is_shed_on_arrival():
+    async def scenario():
+        limit = AdmissionLimit(1, 10, 0.1)
+        limit.service_time = 1.0
+        await limit.acquire()
+        with pytest.raises(Overloaded) as shed:
+            await limit.acquire()
+        assert shed.value.reason == 'deadline'
+        assert shed.value.retry_after == pytest.approx(1.0)
+        assert limit.queued == 0
+
+    run(scenario())
+
+def test_waiter_times_out():
+    async def scenario():
+        limit = AdmissionLimit(1, 1, 0.02)
+        await limit.acquire()
+        with pytest.raises(Overloaded) as shed:
+            await limit.acquire()
+        assert shed.value.reason == 'timeout'
+        assert (limit.active, limit.queued) == (1, 0)
+
+        # The timed out waiter must not take the next slot
+        limit.release()
+        assert limit.active == 0
+
+    run(scenario())
+
+def test_slots_go_to_waiters_in_order():
+    async def scenario():
+        limit = AdmissionLimit(1, 3, 1.0)
+        await limit.acquire()
+        admitted = []
+
+        async def request(name):
+            await limit.acquire()
+            admitted.append(name)
+
+        tasks = [asyncio.ensure_future(request(name)) for name in ('first', 'second')]
+        await settle()
+        limit.release()
+        await settle()
+        assert admitted == ['first']
+        limit.release()
+        await asyncio.gather(*tasks)
+        assert admitted == ['first', 'second']
+        assert limit.active == 1
+
+    run(scenario())
+
+def test_cancelled_waiter_is_skipped():
+    async def scenario():
+        limit = AdmissionLimit(1, 2, 1.0)
+        await limit.acquire()
+        cancelled = asyncio.ensure_future(limit.acquire())
+        waiting = asyncio.ensure_future(limit.acquire())
+        await settle()
+
+        cancelled.cancel()
+        await settle()
+        assert limit.queued == 1
+
+        limit.release()
+        await waiting
+        assert (limit.active, limit.queued) == (1, 0)
+
+    run(scenario())
+
+def test_slot_handed_to_a_cancelled_waiter_is_passed_on():
+    async def scenario():
+        limit = AdmissionLimit(1, 2, 1.0)
+        await limit.acquire()
+        cancelled = asyncio.ensure_future(limit.acquire())
+        waiting = asyncio.ensure_future(limit.acquire())
+        await settle()
+
+        # The slot is handed over before the cancelled waiter gets to run again
+        limit.release()
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        await waiting
+        assert (limit.active, limit.queued) == (1, 0)
+
+        limit.release()
+        assert limit.active == 0
+
+    run(scenario())
+
+def note_info_app(limits):
+    app = FastAPI()
+
+    @app.get('/api/note-info/{note}')
+    async def note_info(note: str):
+        return {'note': note}
+
+    @app.get('/api/note-infos')
+    async def note_infos():
+        return {}
+
+    registry = MetricsRegistry()
+    controller = AdmissionController(limits, registry)
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    return app, registry
+
+def get(app, path):
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test')
+    return client.get(path)
+
+def test_limits_cover_paths_below_their_route():
+    controller = AdmissionController({'/api/note-info': parse_limit('1:1:100'),
+                                      '/api/recognize-chord': parse_limit('1:1:100')}, MetricsRegistry())
+    assert controller.match('/api/note-info') == '/api/note-info'
+    assert controller.match('/api/note-info/A4') == '/api/note-info'
+    assert controller.match('/api/note-info/') == '/api/note-info'
+    assert controller.match('/api/recognize-chords') is None
+    assert controller.match('/api/note-infos') is None
+    assert controller.match('/') is None
+
+def test_parameterized_route_is_queued():
+    async def scenario():
+        limit = AdmissionLimit(1, 1, 1.0)
+        app, _ = note_info_app({'/api/note-info': limit})
+        await limit.acquire()
+        request = asyncio.ensure_future(get(app, '/api/note-info/A4'))
+        await settle()
+        assert limit.queued == 1
+
+        limit.release()
+        response = await request
+        assert response.status_code == 200
+        assert response.json() == {'note': 'A4'}
+        assert (limit.active, limit.queued) == (0, 0)
+
+    run(scenario())
+
+def test_parameterized_route_is_shed():
+    async def scenario():
+        limit = AdmissionLimit(1, 0, 1.0)
+        app, registry = note_info_app({'/api/note-info': limit})
+        await limit.acquire()
+        response = await get(app, '/api/note-info/A4')
+        assert response.status_code == 503
+        assert response.headers['retry-after'] == '1'
+        assert response.json() == {'detail': 'Server overloaded (queue_full), retry later'}
+        assert 'admission_rejected_total{route="/api/note-info"} 1' in registry.render()
+
+        # Paths that only share a prefix with the route are not limited
+        assert (await get(app, '/api/note-infos')).status_code == 200
+
+    run(scenario())
+
+def test_server_limits_note_info_lookups(monkeypatch):
+    limit = AdmissionLimit(1, 0, 1.0)
+    limit.active = 1
+    monkeypatch.setitem(server.admission.limits, '/api/note-info', limit)
+    response = TestClient(server.app).get('/api/note-info/A4')
+    assert response.status_code == 503
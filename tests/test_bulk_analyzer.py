@@ -0,0 +1,114 @@
+from pathlib import Path
+import json
+import re
+import subprocess
+import sys
+
+import pytest
+
+import bulk_analyzer
+from chord_recognition import ChordRecognitionEngine
+
+BULK_ANALYZER = Path(bulk_analyzer.__file__)
+SUMMARY = re.compile(r'^(\d+) lines in .*, (\d+) repeated pitch-class sets, (\d+) errors$')
+
+LINES = [
+    '["C","E","G"]',
+    '{"id":"a","notes":["A","C","E"]}',
+    '',
+    '{"notes":"C E G"}',
+    'not json',
+    '["C"]',
+    '["C",1]',
+    '{"id":7}',
+    '["G","E","C"]',
+    '["C","E","G","H"]',
+    '{"id":3,"notes":["C","E","G"]}',
+]
+
+@pytest.fixture(scope='module')
+def engine():
+    return ChordRecognitionEngine()
+
+def expected_chords(engine, notes):
+    return [{'name': chord.name, 'type': chord.type, 'confidence': chord.confidence,
+             'is_exact_match': chord.is_exact_match} for chord in engine.recognize_chords(notes)]
+
+def run(*args, stdin=None):
+    """Output records and (lines, repeated sets, errors) of a bulk analyzer run"""
+    result = subprocess.run([sys.executable, str(BULK_ANALYZER), *map(str, args)], input=stdin,
+                            capture_output=True, text=True, encoding='utf-8', check=True)
+    summary = SUMMARY.match(result.stderr.strip().splitlines()[-1])
+    return [json.loads(line) for line in result.stdout.splitlines()], tuple(map(int, summary.groups()))
+
+@pytest.fixture
+def jsonl(tmp_path):
+    path = tmp_path / 'notes.jsonl'
+    path.write_text('\n'.join(LINES) + '\n', encoding='utf-8')
+    return path
+
+def test_jsonl_results_and_errors(engine, jsonl):
+    records, summary = run('--workers', 1, jsonl)
+    c_major = expected_chords(engine, ['C', 'E', 'G'])
+    assert records == [
+        {'line': 1, 'chords': c_major},
+        {'line': 2, 'id': 'a', 'chords': expected_chords(engine, ['A', 'C', 'E'])},
+        {'line': 3, 'error': 'notes must be a list'},
+        {'line': 4, 'error': 'Expecting value: line 1 column 1 (char 0)'},
+        {'line': 5, 'chords': []},
+        {'line': 6, 'error': 'notes must be strings'},
+        {'line': 7, 'error': "'notes'"},
+        {'line': 8, 'chords': c_major},
+        {'line': 9, 'chords': expected_chords(engine, ['C', 'E', 'G', 'H'])},
+        {'line': 10, 'id': 3, 'chords': c_major},
+    ]
+    # Blank lines are not counted, C E G is scored once and looked up twice
+    assert summary == (10, 2, 4)
+
+def test_workers_keep_input_order(jsonl):
+    single, single_summary = run('--workers', 1, jsonl)
+    pooled, pooled_summary = run('--workers', 2, '--chunk-size', 2, jsonl)
+    assert pooled == single
+    # Each worker has its own cache, only the line and error counts must agree
+    assert pooled_summary[::2] == single_summary[::2]
+
+def test_line_numbers_run_across_inputs(jsonl, tmp_path):
+    second = tmp_path / 'more.jsonl'
+    second.write_text('["D","F#","A"]\n', encoding='utf-8')
+    output = tmp_path / 'chords.jsonl'
+    subprocess.run([sys.executable, str(BULK_ANALYZER), '--workers', '1', '--output', str(output), str(jsonl),
+                    str(second)], capture_output=True, check=True)
+    records = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert [record['line'] for record in records] == list(range(1, 12))
+    assert records[-1]['chords'][0]['name'] == 'D'
+
+def test_csv_from_stdin(engine):
+    records, summary = run('--workers', 1, '--format', 'csv', '-', stdin='id,notes\nx,C E G\ny,\nz,A C E\n')
+    assert records == [
+        {'line': 1, 'id': 'x', 'chords': expected_chords(engine, ['C', 'E', 'G'])},
+        {'line': 2, 'id': 'y', 'chords': []},
+        {'line': 3, 'id': 'z', 'chords': expected_chords(engine, ['A', 'C', 'E'])},
+    ]
+    assert summary == (3, 0, 0)
+
+def test_csv_without_notes_column(tmp_path):
+    path = tmp_path / 'notes.csv'
+    path.write_text('id,pitches\nx,C E G\n', encoding='utf-8')
+    result = subprocess.run([sys.executable, str(BULK_ANALYZER), '--workers', '1', path], capture_output=True,
+                            text=True)
+    assert result.returncode == 1
+    assert result.stderr.strip() == "CSV input has no 'notes' column"
+
+def test_chunk_counts_hits_and_errors():
+    bulk_analyzer.initialize_worker(None)
+    bulk_analyzer.results_cache.clear()
+    chunk = ['["C","E","G"]', '["E","G","C","C"]', '{}', '["C","E","G","H"]', '[1]']
+    text, hits, errors = bulk_analyzer.analyze_chunk(5, chunk, None)
+    assert text.endswith('\n')
+    assert [json.loads(line)['line'] for line in text.splitlines()] == [5, 6, 7, 8, 9]
+    # Repeated notes share the entry of their set, an unknown note adds to the note count and does not
+    assert (hits, errors) == (1, 2)
+    assert len(bulk_analyzer.results_cache) == 2
+    # Hits are counted per chunk, the cache lives as long as the worker
+    _, hits, errors = bulk_analyzer.analyze_chunk(1, ['["G","C","E"]'], None)
+    assert (hits, errors) == (1, 0)
@@ -0,0 +1,61 @@
+"""
+Server answers for the frontend chord index parity test,
+frontend/src/lib/chordIndex.test.js. After changing the scoring or the
+vocabulary, regenerate the fixture with: python tests/test_chord_index_parity.py
+"""
+from pathlib import Path
+import json
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+import server
+from chord_recognition import NOTE_NAMES
+
+FIXTURE = Path(__file__).resolve().parent / 'fixtures' / 'chord_index_parity.json'
+MASK_STRIDE = 11  # Every 11th pitch-class set of 2 to 7 notes
+
+def corpus(engine):
+    """Note lists covering the vocabulary, a spread of pitch-class sets, flats and repeated notes"""
+    cases = [list(chord.notes) for chord in engine.chord_database]
+    masks = [mask for mask in range(4096) if 2 <= mask.bit_count() <= 7]
+    cases += [[NOTE_NAMES[pc] for pc in range(12) if mask >> pc & 1] for mask in masks[::MASK_STRIDE]]
+    cases += [['Bb', 'D', 'F'], ['Db', 'F', 'Ab', 'C'], ['E', 'G', 'B', 'E', 'G'], ['G', 'E', 'C'], ['C', 'C']]
+    return cases
+
+def export(client):
+    """The chord index blob and, for every corpus entry, the server's [name, confidence, exact] answers"""
+    index = client.get('/api/chord-index').json()
+    cases = []
+    for notes in corpus(server.chord_engine.get()):
+        response = client.post('/api/recognize-chord', json={'notes': notes})
+        assert response.status_code == 200, notes
+        cases.append({'notes': notes, 'chords': [[chord['name'], chord['confidence'], chord['is_exact_match']]
+                                                 for chord in response.json()['recognized_chords']]})
+    return {'index': index, 'cases': cases}
+
+def dumps(fixture):
+    # One case per line keeps fixture diffs readable
+    def compact(value):
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+    cases = ',\n'.join(f'    {compact(case)}' for case in fixture['cases'])
+    return f'{{\n  "index": {compact(fixture["index"])},\n  "cases": [\n{cases}\n  ]\n}}\n'
+
+def test_fixture_matches_server():
+    expected = dumps(export(TestClient(server.app)))
+    assert FIXTURE.read_text(encoding='utf-8') == expected, 'Server answers changed, regenerate the fixture'
+
+def test_fixture_covers_every_chord():
+    fixture = json.loads(FIXTURE.read_text(encoding='utf-8'))
+    named = {case['chords'][0][0] for case in fixture['cases'] if case['chords'] and case['chords'][0][2]}
+    # Chords sharing their notes with an earlier chord are always ranked after it
+    first_of_each_set = {}
+    for name, _, pitch_classes in fixture['index']['chords']:
+        first_of_each_set.setdefault(frozenset(pitch_classes), name)
+    assert set(first_of_each_set.values()) <= named
+
+if __name__ == '__main__':
+    FIXTURE.parent.mkdir(exist_ok=True)
+    FIXTURE.write_text(dumps(export(TestClient(server.app))), encoding='utf-8')
@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from chord_recognition import ChordRecognitionEngine
+from chord_similarity import ChordSimilarityIndex
+
+@pytest.fixture
+def engine():
+    return ChordRecognitionEngine()
+
+@pytest.fixture
+def index(engine):
+    return ChordSimilarityIndex(engine)
+
+def expected_score(index, a, b):
+    """Similarity of two chords computed pair by pair, ignoring substitutions"""
+    shared = (a.mask & b.mask).bit_count()
+    union = (a.mask | b.mask).bit_count()
+    voices = a.mask.bit_count() + b.mask.bit_count()
+    smoothness = 1 - min(index.voice_leading_distance(a, b) / voices / 3, 1)
+    return round(100 * (0.6 * shared / union + 0.4 * smoothness))
+
+def test_query_chord_is_never_its_own_neighbor(engine, index):
+    for chord in engine.chord_database:
+        _, similar = index.similar_chords(chord.name, limit=index.k)
+        assert chord.name not in [neighbor['name'] for neighbor in similar]
+
+def test_same_notes_under_another_name_rank_first(index):
+    # C6 and Am7 share every note
+    _, similar = index.similar_chords('C6')
+    assert similar[0]['name'] == 'Am7'
+    assert similar[0]['similarity'] == 100
+    assert similar[0]['voice_leading_distance'] == 0
+
+def test_neighbors_are_the_most_similar_chords(engine, index):
+    chord, similar = index.similar_chords('G7', limit=index.k)
+    scores = [neighbor['similarity'] for neighbor in similar]
+    assert scores == sorted(scores, reverse=True)
+    assert all(neighbor['relation'] == 'similar' for neighbor in similar)
+
+    others = [other for other in engine.chord_database if other is not chord]
+    expected = sorted(others, key=lambda other: (-expected_score(index, chord, other), other.id))[:index.k]
+    assert [neighbor['name'] for neighbor in similar] == [other.name for other in expected]
+    assert scores == [expected_score(index, chord, other) for other in expected]
+
+def test_relative_chords_rank_as_substitutes(index):
+    _, similar = index.similar_chords('C')
+    assert (similar[0]['name'], similar[0]['relation'], similar[0]['similarity']) == ('Am', 'relative_minor', 95)
+    _, similar = index.similar_chords('Am')
+    assert (similar[0]['name'], similar[0]['relation']) == ('C', 'relative_major')
+
+def test_tritone_substitution_after_vocabulary_swap(engine, index):
+    definitions = engine.vocabulary_definitions()
+    c7 = next(definition for definition in definitions if definition['name'] == 'C7')
+    definitions.append(dict(c7, name='F#7', notes=['F#', 'A#', 'C#', 'E']))
+    engine.chord_database = engine.compile_vocabulary(definitions)
+    engine.chords_by_name = engine._index_chord_names(engine.chord_database)
+
+    _, similar = index.similar_chords('C7')
+    assert (similar[0]['name'], similar[0]['relation']) == ('F#7', 'tritone_substitution')
+    assert similar[0]['shared_notes'] == 2
+
+def test_limit_and_unknown_chord(index):
+    assert len(index.similar_chords('C', limit=3)[1]) == 3
+    assert index.similar_chords('Xyz') is None
+
+def test_endpoint():
+    client = TestClient(server.app)
+    response = client.get('/api/chords/Am7/similar', params={'limit': 4})
+    assert response.status_code == 200
+    body = response.json()
+    assert body['name'] == 'Am7'
+    assert len(body['similar_chords']) == 4
+    assert 'Am7' not in [chord['name'] for chord in body['similar_chords']]
+    assert client.get('/api/chords/Xyz/similar').status_code == 404
+    assert client.get('/api/chords/C/similar', params={'limit': 17}).status_code == 422
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from instruments import InstrumentRegistry
+
+@pytest.fixture
+def registry():
+    return InstrumentRegistry()
+
+@pytest.mark.parametrize('tuning, open_notes, frets', [
+    ('standard', ['E', 'A', 'D', 'G', 'B', 'E'], 24),
+    ('seven_string', ['B', 'E', 'A', 'D', 'G', 'B', 'E'], 24),
+    ('bass', ['E', 'A', 'D', 'G'], 24),
+    ('ukulele', ['G', 'C', 'E', 'A'], 15),
+])
+def test_open_strings(registry, tuning, open_notes, frets):
+    table = registry.table(tuning)
+    assert table.midi.shape == (len(open_notes), frets + 1)
+    assert [table.note(string, 0) for string in range(table.strings)] == open_notes
+    assert table.notes([(string, 12) for string in range(table.strings)]) == open_notes
+
+def test_ukulele_is_re_entrant(registry):
+    table = registry.table('ukulele')
+    # The G string sounds above the C and E strings
+    assert table.midi[:, 0].tolist() == [67, 60, 64, 69]
+    assert table.frequencies[3, 0] == pytest.approx(440.0)
+    assert table.notes([(1, 0), (2, 0), (0, 0)]) == ['C', 'E', 'G']
+    assert table.notes([(0, 16)]) is None
+
+def test_bass_sounds_an_octave_below_guitar(registry):
+    bass, guitar = registry.table('bass'), registry.table('standard')
+    np.testing.assert_allclose(bass.frequencies, guitar.frequencies[:4] / 2)
+    assert bass.frequencies[0, 0] == pytest.approx(41.2, abs=0.01)
+
+def test_seven_string_adds_a_low_b(registry):
+    seven, six = registry.table('seven_string'), registry.table('standard')
+    np.testing.assert_array_equal(seven.midi[1:], six.midi)
+    assert seven.midi[0, 0] == 35
+    assert seven.notes([(0, 1), (6, 24)]) == ['C', 'E']
+    assert not seven.contains(7, 0)
+
+def test_unknown_tuning(registry):
+    assert registry.profile('banjo') is None
+    assert registry.table('banjo') is None
+    assert registry.cached_tables() == 0
+
+def test_tables_are_cached_per_reference_pitch(registry):
+    assert registry.table() is registry.table('standard')
+    table = registry.table('standard', reference_pitch=432.0)
+    assert table.frequencies[5, 5] == pytest.approx(432.0)
+    assert registry.cached_tables() == 2
+
+@pytest.fixture(scope='module')
+def client():
+    return TestClient(server.app)
+
+def test_tunings_endpoint(client):
+    tunings = {tuning['name']: tuning for tuning in client.get('/api/tunings').json()['tunings']}
+    assert {'standard', 'seven_string', 'bass', 'ukulele'} <= set(tunings)
+    assert tunings['ukulele']['strings'] == ['G4', 'C4', 'E4', 'A4']
+    assert tunings['ukulele']['frets'] == 15
+    assert tunings['bass']['strings'] == ['E1', 'A1', 'D2', 'G2']
+    assert tunings['seven_string']['strings'] == ['B1', 'E2', 'A2', 'D3', 'G3', 'B3', 'E4']
+
+def test_unknown_tuning_is_rejected(client):
+    positions = [{'string': 0, 'fret': 0, 'note': ''}] * 3
+    response = client.post('/api/recognize-chord', json={'tuning': 'banjo', 'selected_positions': positions})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Unknown tuning: banjo'
+    assert client.post('/api/analyze-tab', params={'tuning': 'banjo'}, content=b'e|--0--|\n').status_code == 400
@@ -0,0 +1,134 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from chord_recognition import ChordRecognitionEngine
+from match_table import (
+    HEADER, MatchTable, build_match_table, load_or_build_match_table, open_match_table, vocabulary_version,
+)
+
+@pytest.fixture
+def engine():
+    return ChordRecognitionEngine()
+
+def smaller_vocabulary(engine):
+    """The built-in vocabulary without its last chord"""
+    return engine.vocabulary_definitions()[:-1]
+
+@pytest.fixture(scope='module')
+def built_tables(tmp_path_factory):
+    """Tables of the built-in and a smaller vocabulary, built once and copied by the tests"""
+    engine = ChordRecognitionEngine()
+    directory = tmp_path_factory.mktemp('tables')
+    build_match_table(engine, directory / 'builtin.bin')
+    build_match_table(engine, directory / 'smaller.bin', smaller_vocabulary(engine))
+    return directory
+
+@pytest.fixture
+def table_path(tmp_path):
+    return tmp_path / 'chord_table.bin'
+
+@pytest.fixture
+def install(built_tables, table_path):
+    """Atomically replace the table under test with a prebuilt one"""
+    def install(name):
+        staged = table_path.with_name(f'.{name}')
+        shutil.copyfile(built_tables / name, staged)
+        staged.replace(table_path)
+    return install
+
+def assert_answers_like_engine(table, engine):
+    for mask in (0b10010001, 0b10010010001, 0b100010110001, 0b10110101):
+        unique_notes = engine.notes_for_mask(mask)
+        expected = [(match.record.name, match.confidence, match.is_exact_match) for match in
+                    engine.rank_matches(engine.score_chords(unique_notes), unique_notes)]
+        assert [(record.name, confidence, exact) for record, confidence, exact in table.lookup(mask)] == expected
+
+def test_missing_table_is_built(engine, table_path):
+    table = load_or_build_match_table(engine, table_path, engine.builtin_vocabulary_version)
+    assert table.vocabulary_version == engine.builtin_vocabulary_version
+    assert_answers_like_engine(table, engine)
+    # Only the lock file is left next to the table
+    assert sorted(path.name for path in table_path.parent.iterdir()) == ['.chord_table.bin.lock', 'chord_table.bin']
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: data[:len(data) // 2],
+    lambda data: b'XXXX' + data[4:],
+    lambda data: data[:HEADER.size] + data[HEADER.size:HEADER.size + 8].replace(b'"', b"'") + data[HEADER.size + 8:],
+    lambda data: b'',
+])
+def test_corrupt_table_is_rebuilt(engine, table_path, install, corrupt):
+    install('builtin.bin')
+    table_path.write_bytes(corrupt(table_path.read_bytes()))
+    with pytest.raises(ValueError):
+        MatchTable(table_path, engine)
+
+    table = load_or_build_match_table(engine, table_path, engine.builtin_vocabulary_version)
+    assert table is not None
+    assert_answers_like_engine(table, engine)
+
+def test_other_vocabulary_is_rebuilt_unless_trusted(engine, table_path, install):
+    definitions = smaller_vocabulary(engine)
+    install('smaller.bin')
+
+    trusted = load_or_build_match_table(engine, table_path)
+    assert trusted.vocabulary_version == vocabulary_version(definitions)
+
+    with pytest.raises(ValueError):
+        open_match_table(engine, table_path, engine.builtin_vocabulary_version)
+    rebuilt = load_or_build_match_table(engine, table_path, engine.builtin_vocabulary_version)
+    assert rebuilt.vocabulary_version == engine.builtin_vocabulary_version
+    assert len(rebuilt.records) == len(definitions) + 1
+
+def test_batch_answers_match_the_engine(engine, table_path, install):
+    masks = np.arange(4096)
+    expected = engine.recognize_masks(masks)
+    install('builtin.bin')
+    engine.use_match_table(table_path)
+    for actual_answers, expected_answers in zip(engine.recognize_masks(masks), expected):
+        np.testing.assert_array_equal(actual_answers, expected_answers)
+
+def test_atomic_swap_is_reloaded(engine, table_path, install):
+    install('builtin.bin')
+    assert engine.use_match_table(table_path, check_interval=0, trust_file_vocabulary=True)
+    original = engine.match_table
+
+    definitions = smaller_vocabulary(engine)
+    removed = engine.chord_database[-1].name
+    install('smaller.bin')
+    engine.check_match_table()
+
+    assert engine.match_table is not original
+    assert engine.vocabulary_version == vocabulary_version(definitions)
+    assert len(engine.chord_database) == len(definitions)
+    assert engine.find_chord(removed) is None
+
+def test_unchanged_table_is_kept(engine, table_path, install):
+    install('builtin.bin')
+    engine.use_match_table(table_path, check_interval=0)
+    original = engine.match_table
+    engine.check_match_table()
+    assert engine.match_table is original
+
+def test_swap_to_other_vocabulary_is_refused_unless_trusted(engine, table_path, install):
+    install('builtin.bin')
+    engine.use_match_table(table_path, check_interval=0)
+    original = engine.match_table
+
+    install('smaller.bin')
+    engine.check_match_table()
+    assert engine.match_table is original
+    assert engine.vocabulary_version == engine.builtin_vocabulary_version
+
+def test_corrupt_swap_keeps_current_table(engine, table_path, install):
+    install('builtin.bin')
+    engine.use_match_table(table_path, check_interval=0)
+    original = engine.match_table
+
+    replacement = table_path.with_name('replacement.bin')
+    replacement.write_bytes(b'not a table')
+    replacement.replace(table_path)
+    engine.check_match_table()
+    assert engine.match_table is original
+    assert engine.recognize_chords(['C', 'E', 'G'])[0].name == 'C'
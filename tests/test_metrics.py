@@ -0,0 +1,135 @@
+import math
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+import metrics
+import server
+from metrics import Histogram, MetricsRegistry
+
+SAMPLE = re.compile(r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(?P<labels>[^}]*)\})? (?P<value>\S+)$')
+LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+def parse(text):
+    """{family: (kind, [(sample name, labels, value)])} of a Prometheus text exposition, checking its syntax"""
+    assert text.endswith('\n')
+    families = {}
+    current = None
+    for line in text.rstrip('\n').split('\n'):
+        if line.startswith('# HELP '):
+            current = line.split(' ')[2]
+            assert current not in families
+        elif line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            assert name == current and kind in ('counter', 'gauge', 'histogram')
+            families[name] = (kind, [])
+        else:
+            match = SAMPLE.match(line)
+            assert match, line
+            assert match.group('name').startswith(current)
+            labels = dict(LABEL.findall(match.group('labels') or ''))
+            families[current][1].append((match.group('name'), labels, float(match.group('value'))))
+    return families
+
+def histogram_series(name, samples):
+    """{labels without le: (buckets [(le, count)], sum, count)} of a histogram family"""
+    series = {}
+    for sample_name, labels, value in samples:
+        labels = dict(labels)
+        le = labels.pop('le', None)
+        buckets, total, count = series.setdefault(tuple(sorted(labels.items())), ([], [None], [None]))
+        if sample_name == f'{name}_bucket':
+            buckets.append((math.inf if le == '+Inf' else float(le), value))
+        elif sample_name == f'{name}_sum':
+            total[0] = value
+        else:
+            assert sample_name == f'{name}_count'
+            count[0] = value
+    return {labels: (buckets, total[0], count[0]) for labels, (buckets, total, count) in series.items()}
+
+def check_histograms(families):
+    for name, (kind, samples) in families.items():
+        if kind != 'histogram':
+            continue
+        for buckets, total, count in histogram_series(name, samples).values():
+            bounds = [bound for bound, _ in buckets]
+            counts = [value for _, value in buckets]
+            assert bounds == sorted(bounds) and bounds[-1] == math.inf, name
+            assert counts == sorted(counts), f'{name} buckets are not cumulative'
+            assert counts[-1] == count, f'{name} +Inf bucket differs from _count'
+            assert total is not None and total >= 0, name
+
+def stage_counts(client):
+    _, samples = parse(client.get('/api/metrics').text)['chord_recognition_stage_seconds']
+    return {labels['stage']: value for sample_name, labels, value in samples
+            if sample_name == 'chord_recognition_stage_seconds_count'}
+
+def test_histogram_buckets_are_upper_bounds():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 1.0, 5.0):
+        histogram.observe(value)
+    assert histogram.render('latency') == [
+        'latency_bucket{le="0.1"} 2',
+        'latency_bucket{le="1"} 4',
+        'latency_bucket{le="+Inf"} 5',
+        'latency_sum 6.65',
+        'latency_count 5',
+    ]
+
+def test_registry_renders_every_kind():
+    registry = MetricsRegistry()
+    stages = registry.histogram('stage_seconds', 'Stage time', label_name='stage', label_values=('a', 'b'),
+                                buckets=(0.5,))
+    stages.labels(stage='a').observe(0.25)
+    registry.counter('requests_total', 'Requests').labels().inc(3)
+    registry.gauge_callback('queued', 'Queued requests', lambda: 7)
+
+    text = registry.render()
+    families = parse(text)
+    check_histograms(families)
+    assert families['requests_total'] == ('counter', [('requests_total', {}, 3.0)])
+    assert families['queued'] == ('gauge', [('queued', {}, 7.0)])
+    series = histogram_series('stage_seconds', families['stage_seconds'][1])
+    assert series[(('stage', 'a'),)] == ([(0.5, 1.0), (math.inf, 1.0)], 0.25, 1.0)
+    assert series[(('stage', 'b'),)] == ([(0.5, 0.0), (math.inf, 0.0)], 0.0, 0.0)
+
+def test_metric_names_are_unique():
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Requests')
+    with pytest.raises(ValueError):
+        registry.gauge('requests_total', 'Requests')
+
+@pytest.fixture(scope='module')
+def client():
+    return TestClient(server.app)
+
+def test_metrics_endpoint_is_valid(client):
+    client.post('/api/recognize-chord', json={'notes': ['C', 'E', 'G']})
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == metrics.CONTENT_TYPE
+    families = parse(response.text)
+    check_histograms(families)
+    assert families['chord_recognition_stage_seconds'][0] == 'histogram'
+
+@pytest.mark.parametrize('body, stages', [
+    # Answered from the match table
+    ({'notes': ['C', 'E', 'G']}, {'validation', 'normalization', 'table_lookup', 'serialization'}),
+    # Unknown notes cannot be looked up, so they are scored and sorted
+    ({'notes': ['C', 'E', 'G', 'H']}, {'validation', 'normalization', 'scoring', 'sorting', 'serialization'}),
+    # Weighted scoring ranks as it scores
+    ({'notes': ['C', 'E', 'G'], 'weights': [1, 1, 0.5]}, {'validation', 'normalization', 'scoring', 'serialization'}),
+])
+def test_each_stage_records_observations(client, body, stages):
+    assert server.chord_engine.get().match_table is not None
+    before = stage_counts(client)
+    assert client.post('/api/recognize-chord', json=body).status_code == 200
+    after = stage_counts(client)
+    assert {stage for stage in after if after[stage] != before[stage]} == stages
+    assert all(after[stage] == before[stage] + 1 for stage in stages)
+
+def test_rejected_requests_are_not_timed(client):
+    before = stage_counts(client)
+    assert client.post('/api/recognize-chord', json={'notes': ['C']}).status_code == 400
+    assert stage_counts(client) == before
@@ -0,0 +1,101 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from midi_service import MIDI_NOTES, MIDIService
+from models import PlayNoteRequest
+
+@pytest.fixture(scope='module')
+def service():
+    return MIDIService()
+
+def test_table_holds_every_midi_note(service):
+    assert len(service.frequencies) == MIDI_NOTES == 128
+    assert len(service.note_frequencies) == 128
+    names = list(service.note_frequencies)
+    assert names[0] == 'C-1' and names[60] == 'C4' and names[69] == 'A4' and names[127] == 'G9'
+    assert np.all(np.diff(service.frequencies) > 0)
+    # A semitone apart everywhere, an octave doubles the frequency
+    np.testing.assert_allclose(service.frequencies[1:] / service.frequencies[:-1], 2 ** (1 / 12))
+    np.testing.assert_allclose(service.frequencies[12:], 2 * service.frequencies[:-12])
+
+def test_a4_is_the_reference_pitch(service):
+    # Scientific pitch notation, the original table was an octave low and put A4 at 220 Hz
+    assert service.note_frequencies['A4'] == 440.0
+    assert service.note_frequencies['A3'] == 220.0
+    assert service.note_frequencies['C4'] == 261.63
+    assert service.note_frequencies['C-1'] == 8.18
+    assert service.note_frequencies['G9'] == 12543.85
+    assert MIDIService(432.0).note_frequencies['A4'] == 432.0
+
+def test_note_info(service):
+    assert service.get_note_info('A') == {'note': 'A4', 'frequency': 440.0, 'available': True}
+    assert service.get_note_info('G#', 9) == {'note': 'G#9', 'frequency': None, 'available': False}
+    assert not service.get_note_info('B', -2)['available']
+
+def test_play_note(service):
+    response = asyncio.run(service.play_note(PlayNoteRequest(note='A', octave=4, duration=250)))
+    assert (response.status, response.note, response.duration) == ('playing', 'A4', 250)
+    assert asyncio.run(service.play_note(PlayNoteRequest(note='H'))).status == 'error'
+
+def test_batch_matches_the_table(service):
+    midi = np.arange(-24, MIDI_NOTES + 24)
+    info = service.note_info_batch(midi, np.zeros(len(midi)))
+    assert info['notes'][24:24 + MIDI_NOTES] == list(service.note_frequencies)
+    # Outside the table the frequencies follow the same curve
+    np.testing.assert_allclose(info['frequencies'], np.round(440 * np.exp2((midi - 69) / 12), 4))
+    assert info['notes'][:2] == ['C-3', 'C#-3']
+
+def test_batch_cents_and_reference_pitch(service):
+    info = service.note_info_batch(np.array([69, 69]), np.array([0.0, 1200.0]), reference_pitch=432.0)
+    assert info['frequencies'] == [432.0, 864.0]
+    assert info['reference_pitch'] == 432.0
+
+@pytest.fixture(scope='module')
+def client():
+    return TestClient(server.app)
+
+def test_endpoint_by_midi_and_by_name(client):
+    by_midi = client.post('/api/note-info', json={'midi': [0, 69, 127]}).json()
+    assert by_midi['notes'] == ['C-1', 'A4', 'G9']
+    assert by_midi['frequencies'] == [8.1758, 440.0, 12543.854]
+    by_name = client.post('/api/note-info', json={'notes': ['C', 'A', 'G'], 'octaves': [-1, 4, 9]}).json()
+    assert by_name == by_midi
+    assert client.post('/api/note-info', json={'notes': ['A', 'Bb'], 'octaves': [3]}).json()['midi'] == [57, 58]
+
+@pytest.mark.parametrize('body', [
+    {'midi': [10001]},
+    {'midi': [-10001]},
+    {'midi': [10 ** 19]},
+    {'notes': ['A'], 'octaves': [1001]},
+    {'notes': ['A'], 'octaves': [-1001]},
+    {'midi': [0] * 4097},
+])
+def test_endpoint_bounds(client, body):
+    assert client.post('/api/note-info', json=body).status_code == 422
+
+def test_endpoint_extremes_stay_finite(client):
+    response = client.post('/api/note-info', json={'midi': [-10000, 10000]})
+    assert response.status_code == 200
+    assert response.json()['notes'] == ['G#-835', 'E832']
+    assert client.post('/api/note-info', json={'notes': ['A'], 'octaves': [1000]}).status_code == 200
+    response = client.post('/api/note-info', json={'midi': [10000], 'cents': [1e6]})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize('body, detail', [
+    ({}, 'Provide either notes or midi'),
+    ({'notes': ['A'], 'midi': [69]}, 'Provide either notes or midi'),
+    ({'notes': ['H']}, 'Unknown notes: H'),
+    ({'notes': ['A', 'B'], 'octaves': [1, 2, 3]}, 'Expected 1 or 2 octaves, got 3'),
+])
+def test_endpoint_rejects(client, body, detail):
+    response = client.post('/api/note-info', json=body)
+    assert response.status_code == 400
+    assert response.json()['detail'] == detail
+
+def test_single_note_lookup(client):
+    assert client.get('/api/note-info/A').json()['frequency'] == 440.0
+    assert client.get('/api/note-info/A', params={'octave': 9}).status_code == 404
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from profiling import ProfilingMiddleware, SamplingProfiler
+
+def busy_handler(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+def read_profile(path):
+    counts = {}
+    for line in path.read_text().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        counts[stack] = int(count)
+    return counts
+
+def add_stacks(profiler, route, stacks):
+    with profiler._lock:
+        for stack, count in stacks.items():
+            profiler._stacks[route][stack] += count
+
+def test_one_in_sample_rate_requests_is_sampled():
+    profiler = SamplingProfiler(sample_rate=3)
+    assert [profiler.should_sample() for _ in range(7)] == [True, False, False, True, False, False, True]
+    assert not any(SamplingProfiler(sample_rate=0).should_sample() for _ in range(3))
+
+def test_sampled_request_stacks_are_written(tmp_path):
+    profiler = SamplingProfiler(sample_rate=1, output_dir=tmp_path, interval=0.001)
+
+    async def scenario():
+        profiler.start(asyncio.get_running_loop())
+        task = asyncio.current_task()
+        profiler.begin(task, '/api/busy')
+        busy_handler(0.3)
+        profiler.end(task)
+        # Not tagged, never counted
+        busy_handler(0.1)
+
+    asyncio.run(scenario())
+    profiler.stop()
+
+    assert profiler.samples_taken > 0
+    files = list(tmp_path.glob('*.collapsed'))
+    assert len(files) == 1
+    assert files[0].name.startswith('api_busy-')
+    counts = read_profile(files[0])
+    assert sum(counts.values()) == profiler.samples_taken
+    # A sample may land just before or after the handler, but nearly all are inside it
+    in_handler = sum(count for stack, count in counts.items() if stack.split(';')[-1].startswith('busy_handler'))
+    assert in_handler >= 0.8 * profiler.samples_taken
+
+def test_flush_writes_one_file_per_route(tmp_path):
+    profiler = SamplingProfiler(output_dir=tmp_path)
+    add_stacks(profiler, '/api/chords/{name}/similar', {'main;handler': 3, 'main;handler;lookup': 1})
+    add_stacks(profiler, '/', {'main;root': 2})
+
+    assert profiler.flush() == 2
+    names = sorted(path.name for path in tmp_path.iterdir())
+    assert [name.split('-')[0] for name in names] == ['api_chords_name_similar', 'root']
+    for name in names:
+        slug, day, second, pid, number = name[:-len('.collapsed')].split('-')
+        assert int(pid) == os.getpid()
+    assert read_profile(tmp_path / names[0]) == {'main;handler': 3, 'main;handler;lookup': 1}
+    assert read_profile(tmp_path / names[1]) == {'main;root': 2}
+
+    # Flushed stacks are not written again
+    assert profiler.flush() == 0
+    assert profiler.files_written == 2
+
+def test_rotation_keeps_only_this_process_files(tmp_path):
+    other_worker = tmp_path / 'api_x-20260101-000000-1-0.collapsed'
+    other_worker.write_text('main 1\n')
+    profiler = SamplingProfiler(output_dir=tmp_path, max_files=3)
+    for flush in range(5):
+        add_stacks(profiler, '/api/x', {'main': flush + 1})
+        profiler.flush()
+
+    own = sorted(tmp_path.glob(f'*-{os.getpid()}-*.collapsed'), key=lambda path: int(path.stem.rsplit('-', 1)[1]))
+    assert [read_profile(path) for path in own] == [{'main': 3}, {'main': 4}, {'main': 5}]
+    assert other_worker.exists()
+
+def test_configure_from_another_thread(tmp_path):
+    profiler = SamplingProfiler(output_dir=tmp_path, interval=0.001)
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        profiler.start(asyncio.get_running_loop())
+        assert profiler._thread is None
+
+        await asyncio.to_thread(profiler.configure, 1)
+        assert profiler._thread.is_alive()
+        # The sampler still watches the event loop thread, not the one that enabled it
+        assert profiler._loop_thread_id == loop_thread
+
+        add_stacks(profiler, '/api/x', {'main': 1})
+        await asyncio.to_thread(profiler.configure, 0)
+        assert profiler._thread is None
+
+    asyncio.run(scenario())
+    assert len(list(tmp_path.glob('*.collapsed'))) == 1
+
+def test_middleware_tags_requests_by_route_template():
+    profiler = SamplingProfiler(sample_rate=1)
+    routes = []
+    app = FastAPI()
+
+    @app.get('/api/note-info/{note}')
+    async def note_info(note: str):
+        routes.append(profiler._active.get(asyncio.current_task()))
+        return {'note': note}
+
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    response = TestClient(app).get('/api/note-info/A4')
+    assert response.status_code == 200
+    assert routes == ['/api/note-info/{note}']
+    assert profiler._active == {}
+
+def test_admin_endpoint_configures_off_the_event_loop(monkeypatch, tmp_path):
+    import server
+
+    configured_on_loop = []
+    profiler = SamplingProfiler(output_dir=tmp_path)
+    configure = profiler.configure
+
+    def recording_configure(sample_rate):
+        try:
+            asyncio.get_running_loop()
+            configured_on_loop.append(True)
+        except RuntimeError:
+            configured_on_loop.append(False)
+        configure(sample_rate)
+
+    monkeypatch.setattr(profiler, 'configure', recording_configure)
+    monkeypatch.setattr(server, 'profiler', profiler)
+    monkeypatch.setattr(server, 'admin_token', 'secret')
+    client = TestClient(server.app)
+
+    assert client.post('/api/admin/profiling', json={'sample_rate': 0}).status_code == 401
+    response = client.post('/api/admin/profiling', json={'sample_rate': 0, 'flush': True},
+                           headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.json()['enabled'] is False
+    assert configured_on_loop == [False]
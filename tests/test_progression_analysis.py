@@ -0,0 +1,57 @@
+import pytest
+from pydantic import ValidationError
+
+from chord_recognition import ChordRecognitionEngine
+from models import ProgressionAnalysisRequest
+from progression_analysis import ProgressionAnalyzer
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return ProgressionAnalyzer(ChordRecognitionEngine())
+
+def analyze(analyzer, progression, **options):
+    masks, chords, errors = analyzer.parse_progression(progression)
+    assert errors == []
+    return analyzer.analyze(masks, chords, **options)
+
+def test_named_chords_keep_their_names(analyzer):
+    # C6 has the notes of Am7 and F6 those of Dm7, the names sent must win
+    analysis = analyze(analyzer, ['C', 'C6', 'F', 'G7', 'Dm6', 'Cadd9', 'Am7', 'F6', 'E9'])
+    assert analysis['key'] == 'C major'
+    assert analysis['chords'] == ['C', 'C6', 'F', 'G7', 'Dm6', 'Cadd9', 'Am7', 'F6', 'E9']
+    assert analysis['roman_numerals'] == ['I', 'I6', 'IV', 'V7', 'ii6', 'Iadd9', 'vi7', 'IV6', 'III9']
+    assert analysis['functions'] == ['tonic', 'tonic', 'subdominant', 'dominant', 'subdominant',
+                                     'tonic', 'tonic', 'subdominant', 'tonic']
+
+def test_note_lists_are_recognized(analyzer):
+    analysis = analyze(analyzer, [['C', 'E', 'G'], ['C', 'E', 'G', 'A'], 'C6', ['G', 'B', 'D', 'F']])
+    assert analysis['chords'] == ['C', 'Am7', 'C6', 'G7']
+    assert analysis['roman_numerals'] == ['I', 'vi7', 'I6', 'V7']
+
+def test_minor_key_numerals(analyzer):
+    analysis = analyze(analyzer, ['Am', 'Dm', 'E7', 'Am', 'F', 'G', 'Am'])
+    assert analysis['key'] == 'A minor'
+    assert analysis['roman_numerals'] == ['i', 'iv', 'V7', 'i', 'VI', 'VII', 'i']
+    assert analysis['functions'] == ['tonic', 'subdominant', 'dominant', 'tonic', 'tonic', 'dominant', 'tonic']
+
+def test_flat_names_resolve_to_sharp_chords(analyzer):
+    assert analyze(analyzer, ['Db', 'C#'])['chords'] == ['C#', 'C#']
+
+def test_local_keys_follow_modulation(analyzer):
+    progression = ['C', 'F', 'G7', 'C'] * 4 + ['D', 'G', 'A7', 'D'] * 4
+    analysis = analyze(analyzer, progression, window=4)
+    assert analysis['local_keys'][:4] == ['C major'] * 4
+    assert analysis['local_keys'][-4:] == ['D major'] * 4
+
+def test_unknown_items_are_reported(analyzer):
+    _, chords, errors = analyzer.parse_progression(['C', 'Xyz', ['C', 'Q'], 'Xyz'])
+    assert errors == ["#1: unknown chord 'Xyz'", "#2: unknown note 'Q'", "#3: unknown chord 'Xyz'"]
+    assert chords[0].name == 'C'
+    assert chords[1:] == [None, None, None]
+
+def test_progression_length_is_bounded():
+    ProgressionAnalysisRequest(progression=['C'] * 65536)
+    with pytest.raises(ValidationError):
+        ProgressionAnalysisRequest(progression=['C'] * 65537)
+    with pytest.raises(ValidationError):
+        ProgressionAnalysisRequest(progression=['C'], window=None)
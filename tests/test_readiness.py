@@ -0,0 +1,111 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from readiness import LazyComponent, ReadinessMonitor
+
+async def ping_ok():
+    pass
+
+async def ping_down():
+    raise ConnectionError('connection refused')
+
+async def ping_hangs():
+    await asyncio.sleep(10)
+
+def state(monitor):
+    return json.loads(monitor.body)
+
+def test_concurrent_get_async_builds_once():
+    builds = []
+
+    def factory():
+        builds.append(threading.get_ident())
+        time.sleep(0.1)
+        return object()
+
+    component = LazyComponent('slow', factory)
+
+    async def scenario():
+        return await asyncio.gather(*(component.get_async() for _ in range(8)))
+
+    values = asyncio.run(scenario())
+    assert len(builds) == 1
+    assert all(value is values[0] for value in values)
+    # Built on a worker thread, never on the event loop
+    assert builds[0] != threading.get_ident()
+    assert component.build_seconds >= 0.1
+
+def test_failing_build_surfaces_in_readiness():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError('match table is corrupt')
+        return object()
+
+    component = LazyComponent('chord_engine', factory)
+    monitor = ReadinessMonitor(ping_ok, [component])
+    asyncio.run(monitor.check())
+
+    with pytest.raises(RuntimeError):
+        component.get()
+    monitor.refresh()
+    assert not monitor.ready
+    assert state(monitor)['chord_engine'] == 'failed'
+    assert state(monitor)['chord_engine_error'] == 'match table is corrupt'
+
+    # A later build can still succeed, and clears the error
+    component.get()
+    monitor.refresh()
+    assert monitor.ready
+    assert state(monitor)['chord_engine'] == 'initialized'
+    assert 'chord_engine_error' not in state(monitor)
+
+def test_pending_components_without_warm_up():
+    component = LazyComponent('midi_service', object)
+    monitor = ReadinessMonitor(ping_ok, [component], require_components=False)
+    assert state(monitor)['midi_service'] == 'pending'
+    assert not monitor.ready
+    asyncio.run(monitor.check())
+    # Components are built by the requests that need them, the database decides readiness
+    assert monitor.ready
+
+@pytest.mark.parametrize('ping, error', [(ping_down, 'connection refused'), (ping_hangs, 'TimeoutError')])
+def test_database_errors(ping, error):
+    monitor = ReadinessMonitor(ping, [], timeout=0.05)
+    asyncio.run(monitor.check())
+    body = state(monitor)
+    assert (body['ready'], body['database'], body['database_error']) == (False, 'disconnected', error)
+    assert body['database_checked_at'] is not None
+    assert 'database_ping_ms' not in body
+
+    monitor.ping = ping_ok
+    asyncio.run(monitor.check())
+    body = state(monitor)
+    assert (body['ready'], body['database']) == (True, 'connected')
+    assert 'database_error' not in body and body['database_ping_ms'] >= 0
+
+def test_health_stays_healthy_while_not_ready(monkeypatch):
+    import server
+
+    component = LazyComponent('chord_engine', lambda: 1 / 0)
+    monitor = ReadinessMonitor(ping_down, [component])
+    monkeypatch.setattr(server, 'readiness', monitor)
+    client = TestClient(server.app)
+
+    with pytest.raises(ZeroDivisionError):
+        component.get()
+    asyncio.run(monitor.check())
+    health = client.get('/api/health')
+    assert health.status_code == 200
+    assert health.json()['status'] == 'healthy'
+    assert health.json()['chord_engine'] == 'failed'
+    ready = client.get('/api/ready')
+    assert ready.status_code == 503
+    assert ready.content == health.content
@@ -0,0 +1,91 @@
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+C_MAJOR_MASK = 0b10010001
+MSGPACK = {'Accept': 'application/msgpack'}
+
+@pytest.fixture(scope='module')
+def client():
+    return TestClient(server.app)
+
+def test_mask_answers_like_notes(client):
+    by_notes = client.post('/api/recognize-chord', json={'notes': ['C', 'E', 'G']})
+    by_mask = client.post('/api/recognize-chord', json={'mask': C_MAJOR_MASK})
+    assert by_mask.status_code == 200
+    assert by_mask.json() == by_notes.json()
+    assert by_mask.json()['recognized_chords'][0]['name'] == 'C'
+
+def test_pitch_classes_answer_like_notes(client):
+    by_notes = client.post('/api/recognize-chord', json={'notes': ['A', 'C', 'E']})
+    by_pitch_classes = client.post('/api/recognize-chord', json={'pitch_classes': [9, 0, 4]})
+    assert by_pitch_classes.json() == by_notes.json()
+
+@pytest.mark.parametrize('body', [{'mask': 4096}, {'mask': -1}, {'mask': 'C'}])
+def test_invalid_mask_is_rejected(client, body):
+    assert client.post('/api/recognize-chord', json=body).status_code == 422
+
+def test_single_note_mask_is_rejected(client):
+    assert client.post('/api/recognize-chord', json={'mask': 1}).status_code == 400
+
+def test_pitch_class_out_of_range_is_rejected(client):
+    response = client.post('/api/recognize-chord', json={'pitch_classes': [0, 12]})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'Pitch classes must be 0-11, got 12'
+
+@pytest.mark.parametrize('body', [
+    {'mask': C_MAJOR_MASK, 'notes': ['C', 'E', 'G']},
+    {'mask': C_MAJOR_MASK, 'pitch_classes': [0, 4, 7]},
+    {'pitch_classes': [0, 4, 7], 'notes': ['C', 'E', 'G']},
+    {'tuning': 'standard', 'selected_positions': [{'string': 1, 'fret': 3, 'note': 'C'}], 'notes': ['C', 'E']},
+    {'tuning': 'standard', 'mask': C_MAJOR_MASK},
+])
+def test_more_than_one_input_form_is_rejected(client, body):
+    response = client.post('/api/recognize-chord', json=body)
+    assert response.status_code == 400
+    assert response.json()['detail'].startswith('Provide exactly one of')
+
+def test_positions_without_tuning_annotate_notes(client):
+    # As the fretboard UI sends them
+    positions = [{'string': 1, 'fret': 3, 'note': 'C'}, {'string': 2, 'fret': 2, 'note': 'E'},
+                 {'string': 3, 'fret': 0, 'note': 'G'}]
+    response = client.post('/api/recognize-chord', json={'notes': ['C', 'E', 'G'], 'selected_positions': positions})
+    assert response.status_code == 200
+    assert response.json()['recognized_chords'][0]['name'] == 'C'
+
+def test_positions_with_tuning(client):
+    positions = [{'string': 1, 'fret': 3, 'note': ''}, {'string': 2, 'fret': 2, 'note': ''},
+                 {'string': 3, 'fret': 0, 'note': ''}]
+    response = client.post('/api/recognize-chord', json={'tuning': 'standard', 'selected_positions': positions})
+    assert response.status_code == 200
+    assert response.json()['unique_notes'] == ['C', 'E', 'G']
+
+def test_msgpack_response(client):
+    json_response = client.post('/api/recognize-chord', json={'mask': C_MAJOR_MASK})
+    response = client.post('/api/recognize-chord', json={'mask': C_MAJOR_MASK}, headers=MSGPACK)
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/msgpack'
+    assert msgpack.unpackb(response.content) == json_response.json()
+
+def test_x_msgpack_is_accepted(client):
+    response = client.post('/api/recognize-chord', json={'notes': ['C', 'E', 'G']},
+                           headers={'Accept': 'application/x-msgpack'})
+    assert response.headers['content-type'] == 'application/msgpack'
+
+def test_batch_msgpack_response(client):
+    body = {'masks': [C_MAJOR_MASK, 1]}
+    json_response = client.post('/api/recognize-chords', json=body)
+    response = client.post('/api/recognize-chords', json=body, headers=MSGPACK)
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/msgpack'
+    decoded = msgpack.unpackb(response.content)
+    assert decoded == json_response.json()
+    chords = {chord['id']: chord['name'] for chord in decoded['chords']}
+    assert chords[decoded['chord_ids'][0][0]] == 'C'
+    assert decoded['chord_ids'][1] == [-1] * len(decoded['chord_ids'][1])
+
+def test_batch_rejects_more_than_one_input_form(client):
+    response = client.post('/api/recognize-chords', json={'masks': [C_MAJOR_MASK], 'notes': [['C', 'E', 'G']]})
+    assert response.status_code == 400
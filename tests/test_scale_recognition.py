@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from chord_recognition import ChordRecognitionEngine
+from scale_recognition import ScaleRecognitionEngine
+
+C_MAJOR = ['C', 'D', 'E', 'F', 'G', 'A', 'B']
+
+@pytest.fixture(scope='module')
+def engine():
+    return ScaleRecognitionEngine(ChordRecognitionEngine())
+
+def names(scales):
+    return [scale.name for scale in scales]
+
+def test_major_ranks_before_its_relative_minor(engine):
+    scales = engine.recognize_scales(C_MAJOR, limit=5)
+    assert names(scales) == ['C Major (Ionian)', 'A Natural Minor (Aeolian)', 'D Dorian', 'G Mixolydian',
+                             'E Phrygian']
+    assert all(scale.confidence == 100 and scale.is_exact_match for scale in scales)
+
+@pytest.mark.parametrize('first, expected', [
+    ('A', 'A Natural Minor (Aeolian)'),
+    ('D', 'D Dorian'),
+    ('G', 'G Mixolydian'),
+])
+def test_first_note_breaks_mode_ties(engine, first, expected):
+    start = C_MAJOR.index(first)
+    scales = engine.recognize_scales(C_MAJOR[start:] + C_MAJOR[:start], limit=2)
+    assert names(scales)[0] == expected
+    assert scales[0].notes[0] == first
+
+def test_pentatonic_subsets(engine):
+    scales = engine.recognize_scales(['C', 'D', 'E', 'G', 'A'], limit=5)
+    assert names(scales)[:2] == ['C Major Pentatonic', 'A Minor Pentatonic']
+    assert scales[2].missing_notes == 1 and not scales[2].is_exact_match
+
+def test_scales_holding_every_note_rank_first(engine):
+    # F and F# cannot both be in one mode, every candidate has one outside note
+    scales = engine.recognize_scales(['C', 'D', 'E', 'F', 'F#', 'G', 'A', 'B'], limit=3)
+    assert names(scales) == ['C Major (Ionian)', 'C Lydian', 'G Major (Ionian)']
+    assert [scale.confidence for scale in scales] == [85, 85, 85]
+    assert not any(scale.is_exact_match for scale in scales)
+
+def test_symmetric_scales_are_reported_once(engine):
+    scales = engine.recognize_scales(['C', 'D', 'E', 'F#', 'G#', 'A#'], limit=50)
+    assert [name for name in names(scales) if name.endswith('Whole Tone')] == ['C Whole Tone']
+
+def test_too_few_or_too_many_outside_notes(engine):
+    assert engine.recognize_scales(['C', 'E']) == []
+    assert engine.recognize_scales(C_MAJOR + ['C#', 'D#']) == []
+
+@pytest.mark.parametrize('limit', [1, 3, 50])
+def test_limit_caps_results(engine, limit):
+    assert len(engine.recognize_scales(['C', 'E', 'G'], limit=limit)) == limit
+
+@pytest.fixture(scope='module')
+def client():
+    return TestClient(server.app)
+
+def test_endpoint(client):
+    response = client.post('/api/recognize-scale', json={'notes': C_MAJOR + ['C'], 'limit': 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert [scale['name'] for scale in body['recognized_scales']] == ['C Major (Ionian)',
+                                                                       'A Natural Minor (Aeolian)']
+    assert body['unique_notes'] == C_MAJOR
+    assert body['total_notes'] == 8
+
+@pytest.mark.parametrize('limit', [0, 51])
+def test_endpoint_limit_bounds(client, limit):
+    response = client.post('/api/recognize-scale', json={'notes': C_MAJOR, 'limit': limit})
+    assert response.status_code == 422
+
+def test_endpoint_needs_three_notes(client):
+    assert client.post('/api/recognize-scale', json={'notes': ['C', 'E']}).status_code == 400
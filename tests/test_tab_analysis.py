@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from chord_recognition import ChordRecognitionEngine
+from instruments import InstrumentRegistry
+from tab_analysis import TabAnalyzer, staff_slices, tab_line_body
+
+C_MAJOR_STAFF = [
+    'e|--0--|',
+    'B|--1--|',
+    'G|--0--|',
+    'D|--2--|',
+    'A|--3--|',
+    'E|-----|',
+]
+
+@pytest.fixture(scope='module')
+def analyzer():
+    return TabAnalyzer(ChordRecognitionEngine())
+
+@pytest.fixture(scope='module')
+def guitar():
+    return InstrumentRegistry().table('standard')
+
+def test_tab_line_body_skips_text():
+    assert tab_line_body('e|--0--3--|') == '--0--3--|'
+    assert tab_line_body('Verse 1') is None
+    assert tab_line_body('   ') is None
+    assert tab_line_body('C    G    Am') is None
+
+def test_overlapping_frets_are_played_together():
+    slices = list(staff_slices(['--12--', '---3--', '--5---']))
+    assert slices == [(2, 0, [(0, 12), (1, 3), (2, 5)])]
+
+def test_overlaps_chain_across_lines():
+    # The "3" only overlaps the "12", which overlaps the "10"
+    assert list(staff_slices(['--10---', '---12--', '----3--'])) == [(2, 0, [(0, 10), (1, 12), (2, 3)])]
+
+def test_separate_columns_are_separate_slices():
+    slices = list(staff_slices(['-0-2-', '-----']))
+    assert slices == [(1, 0, [(0, 0)]), (3, 0, [(0, 2)])]
+
+def test_measures_are_counted_at_full_bars():
+    bodies = [
+        '-0-|-2-||-3-',
+        '-1-|-3-||-4-',
+        '---|-:--|---',
+    ]
+    measures = [measure for _, measure, _ in staff_slices(bodies)]
+    # A bar missing from one line does not end a measure, a double bar ends one
+    assert measures == [0, 1, 2]
+
+def test_session_recognizes_chords(analyzer, guitar):
+    session = analyzer.session(guitar)
+    records = []
+    for line in C_MAJOR_STAFF:
+        records.extend(session.feed(line))
+    records.extend(session.finish())
+
+    slices = [json.loads(record) for record in records]
+    assert len(slices) == 2
+    assert slices[0]['staff'] == 0
+    assert slices[0]['chord']['name'] == 'C'
+    assert [position['note'] for position in slices[0]['positions']] == ['C', 'E', 'G', 'C', 'E']
+    # Positions count strings from the lowest
+    assert slices[0]['positions'][0] == {'string': 1, 'fret': 3, 'note': 'C'}
+    assert slices[1] == {'done': True, 'tuning': 'standard', 'staves': 1, 'slices': 1, 'chords': 1}
+
+def test_session_splits_staves_without_blank_lines(analyzer, guitar):
+    session = analyzer.session(guitar)
+    records = []
+    for line in C_MAJOR_STAFF + C_MAJOR_STAFF:
+        records.extend(session.feed(line))
+    records.extend(session.finish())
+
+    assert [json.loads(record).get('staff') for record in records] == [0, 1, None]
+
+def test_session_reports_wrong_string_count(analyzer, guitar):
+    session = analyzer.session(guitar)
+    records = []
+    for line in C_MAJOR_STAFF[:4] + ['', 'Chorus'] + C_MAJOR_STAFF:
+        records.extend(session.feed(line))
+    records.extend(session.finish())
+
+    error = json.loads(records[0])
+    assert error == {'staff': 0, 'error': 'Staff has 4 lines, standard has 6 strings'}
+    assert json.loads(records[1])['staff'] == 1
+    assert json.loads(records[-1])['staves'] == 2
+
+def test_session_drops_frets_off_the_fretboard(analyzer):
+    ukulele = InstrumentRegistry().table('ukulele')
+    session = analyzer.session(ukulele)
+    records = []
+    for line in ['A|--20--', 'E|--0---', 'C|--0---', 'G|--0---']:
+        records.extend(session.feed(line))
+    positions = json.loads(records[0])['positions']
+    assert [position['string'] for position in positions] == [0, 1, 2]
@@ -0,0 +1,91 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from chord_recognition import ChordRecognitionEngine, PITCH_CLASSES
+from instruments import INSTRUMENT_PROFILES
+from voice_leading import MUTED, VoiceLeadingPlanner
+
+STANDARD = INSTRUMENT_PROFILES['standard']
+
+@pytest.fixture(scope='module')
+def engine():
+    return ChordRecognitionEngine()
+
+@pytest.fixture
+def planner(engine):
+    return VoiceLeadingPlanner(engine)
+
+def chords(engine, names):
+    return [engine.find_chord(name) for name in names]
+
+def test_voicings_play_the_chord_with_the_root_in_the_bass(engine, planner):
+    index = planner.voicing_index(STANDARD.open_strings, STANDARD.frets)
+    chord = engine.find_chord('G7')
+    voicings, difficulty = index.voicings(chord, 15)
+    assert 0 < len(voicings) <= index.max_candidates
+    assert list(difficulty) == sorted(difficulty)
+    for frets in voicings:
+        sounding = [(STANDARD.open_strings[string] + fret) for string, fret in enumerate(frets) if fret != MUTED]
+        assert {midi % 12 for midi in sounding} <= {PITCH_CLASSES[note] for note in chord.notes}
+        assert min(sounding) % 12 == chord.root
+
+@pytest.mark.parametrize('max_fret', [4, 7, 12, 24])
+def test_max_fret_filters_one_index(engine, planner, max_fret):
+    index = planner.voicing_index(STANDARD.open_strings, STANDARD.frets)
+    full, _ = index.voicings(engine.find_chord('E'))
+    voicings, _ = index.voicings(engine.find_chord('E'), max_fret)
+    assert voicings.max() <= max_fret
+    if max_fret == 24:
+        np.testing.assert_array_equal(voicings, full)
+
+def test_max_fret_does_not_build_new_indexes(engine, planner):
+    progression = chords(engine, ['C', 'G', 'Am', 'F'])
+    for max_fret in range(4, 25):
+        planner.plan(progression, STANDARD.open_strings, max_fret, STANDARD.frets)
+    assert len(planner._indexes) == 1
+
+def test_plan_prefers_nearby_voicings(engine, planner):
+    voicings, total_cost = planner.plan(chords(engine, ['C', 'G', 'Am', 'F']), STANDARD.open_strings, 15,
+                                        STANDARD.frets)
+    assert [list(frets) for frets in voicings] == [
+        [MUTED, 3, 2, 0, MUTED, MUTED],
+        [3, 2, 0, 0, MUTED, MUTED],
+        [MUTED, 0, 2, 2, 1, MUTED],
+        [1, 0, 3, 2, 1, MUTED],
+    ]
+    assert total_cost == pytest.approx(12.3)
+
+def test_unplayable_depends_on_max_fret(engine, planner):
+    bass = INSTRUMENT_PROFILES['bass']
+    progression = chords(engine, ['E', 'D'])
+    assert planner.unplayable(progression, bass.open_strings, 4, bass.frets) == ['D']
+    assert planner.unplayable(progression, bass.open_strings, 12, bass.frets) == []
+
+def test_endpoint_plans_off_the_event_loop(monkeypatch):
+    import server
+
+    on_event_loop = []
+    plan = VoiceLeadingPlanner.plan
+
+    def recording_plan(self, *args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return plan(self, *args, **kwargs)
+
+    monkeypatch.setattr(VoiceLeadingPlanner, 'plan', recording_plan)
+    client = TestClient(server.app)
+    response = client.post('/api/voice-leading', json={'chords': ['C', 'G'], 'max_fret': 5, 'tuning': 'drop_d'})
+    assert response.status_code == 200
+    assert response.json()['tuning'] == 'drop_d'
+    assert all(max(fret or 0 for fret in voicing['frets']) <= 5 for voicing in response.json()['voicings'])
+    assert on_event_loop == [False]
+
+    response = client.post('/api/voice-leading', json={'chords': ['D'], 'max_fret': 4, 'tuning': 'bass'})
+    assert response.status_code == 400
+    assert response.json()['detail'] == 'No playable voicing for: D'
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from chord_recognition import NOTE_NAMES, ChordRecognitionEngine
+
+@pytest.fixture(scope='module')
+def engine():
+    return ChordRecognitionEngine()
+
+def notes_for(mask):
+    return [NOTE_NAMES[pitch_class] for pitch_class in range(12) if mask >> pitch_class & 1]
+
+def test_equal_weights_rank_every_set_like_unweighted(engine):
+    masks = np.arange(4096)
+    salience = ((masks[:, None] >> np.arange(12)) & 1).astype(np.float64)
+    weighted = engine.recognize_weighted(salience, np.zeros(len(masks)))
+    unweighted = engine.recognize_masks(masks)
+    for weighted_answers, unweighted_answers in zip(weighted, unweighted):
+        np.testing.assert_array_equal(weighted_answers, unweighted_answers)
+
+@pytest.mark.parametrize('mask', [0b10010001, 0b10010010001, 0b100010110001, 0b10110101, 0b101010101010])
+@pytest.mark.parametrize('weight', [1, 0.7, 64])
+def test_equal_weights_answer_like_unweighted(engine, mask, weight):
+    notes = notes_for(mask)
+    expected = [chord.model_dump() for chord in engine.recognize_chords(notes)]
+    actual = [chord.model_dump() for chord in engine.recognize_weighted_notes(notes, [weight] * len(notes))]
+    assert actual == expected
+
+@pytest.mark.parametrize('notes', [
+    ['C', 'E', 'G', 'X'],
+    ['C', 'E', 'G', 'X', 'Y'],
+    ['Db', 'F', 'Ab', 'Db'],
+    ['C', 'E', 'F', 'G'],
+])
+def test_equal_weights_with_unknown_and_repeated_notes(engine, notes):
+    unique_notes = engine.normalize_notes(notes)
+    expected = [chord.model_dump() for chord in engine.rank_chords(engine.score_chords(unique_notes), unique_notes)]
+    actual = [chord.model_dump() for chord in engine.recognize_weighted_notes(notes, [1] * len(notes))]
+    assert actual == expected
+
+def test_equal_weights_score_like_unweighted(engine):
+    for chord_notes in (['C', 'E', 'G'], ['C', 'E', 'G', 'B'], ['D', 'F#', 'A', 'C', 'E']):
+        for input_notes in (['C', 'E', 'G'], ['C', 'E', 'G', 'B'], ['C', 'E'], ['C', 'D', 'E', 'G', 'A']):
+            expected = engine.calculate_chord_match(input_notes, chord_notes)
+            actual = engine.calculate_chord_match(input_notes, chord_notes, [0.5] * len(input_notes))
+            assert (actual['matching_notes'], actual['percentage'], actual['is_exact_match']) == \
+                (expected['matching_notes'], expected['percentage'], expected['is_exact_match'])
+
+def test_faint_note_lowers_its_chord(engine):
+    unweighted = engine.recognize_weighted_notes(['C', 'E', 'G', 'A#'], [1, 1, 1, 1])
+    faint = engine.recognize_weighted_notes(['C', 'E', 'G', 'A#'], [1, 1, 1, 0.2])
+    assert unweighted[0].name == 'C7'
+    assert faint[0].name == 'C'
+
+def test_weakly_heard_exact_match_scores_below_100(engine):
+    chords = engine.recognize_weighted_notes(['C', 'E', 'G'], [1, 1, 0.3])
+    exact = [chord for chord in chords if chord.is_exact_match]
+    assert [chord.name for chord in exact] == ['C']
+    assert exact[0].confidence < 100
+
+def test_zero_weight_drops_a_note(engine):
+    expected = [chord.model_dump() for chord in engine.recognize_chords(['C', 'E', 'G'])]
+    actual = [chord.model_dump() for chord in engine.recognize_weighted_notes(['C', 'E', 'G', 'F#'], [1, 1, 1, 0])]
+    assert actual == expected